@@ -0,0 +1,99 @@
+"""
+Chunking throughput (MB/s) and chunk-size accuracy for each tokenizer.
+
+Every tokenizer chunks the same corpus with the same chunk_size. Accuracy is measured
+by re-counting the finished chunks with a reference tokenizer (the BPE vocab when one
+is given), so the report shows how often each sizing method overshoots the limit.
+
+Usage:
+    python benchmarks/chunking.py --docs 2000
+    python benchmarks/chunking.py --input ./my_docs/ --vocab ./cl100k_base.tiktoken
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from improvers import Chunker, ApproxTokenizer, RegexTokenizer, BPETokenizer
+from models import ProcessingDocument, DocumentMetadata
+from main import iter_documents_from_dir
+from corpus import generate_corpus
+
+def run_tokenizer(config, tokenizer, corpus, reference):
+    chunker = Chunker(config, tokenizer=tokenizer)
+    docs = [ProcessingDocument(content=content, metadata=DocumentMetadata(doc_id=doc_id, source=source))
+            for content, doc_id, source in corpus]
+    input_bytes = sum(len(doc.content.encode("utf-8")) for doc in docs)
+
+    start = time.perf_counter()
+    for doc in docs:
+        chunker.improve(doc)
+    seconds = time.perf_counter() - start
+
+    chunk_size = chunker.chunk_size
+    sizes = [reference.count(chunk.content) for doc in docs for chunk in doc.chunks]
+    return {
+        "seconds": seconds,
+        "mb_per_sec": input_bytes / 1e6 / seconds if seconds > 0 else 0.0,
+        "chunks": len(sizes),
+        "reference_tokens_max": max(sizes, default=0),
+        "reference_tokens_mean": sum(sizes) / len(sizes) if sizes else 0.0,
+        "overshoot_rate": sum(1 for s in sizes if s > chunk_size) / len(sizes) if sizes else 0.0,
+        "fill_ratio": sum(min(s, chunk_size) for s in sizes) / (chunk_size * len(sizes)) if sizes else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chunker throughput per tokenizer")
+    parser.add_argument("--input", "-i", type=str, default=None, help="Directory of .txt/.md documents (default: synthetic corpus)")
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic corpus size / document limit")
+    parser.add_argument("--vocab", type=str, default=None, help="Local BPE vocab (.tiktoken, tokenizer.json or merges.txt)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Override chunking.chunk_size")
+    parser.add_argument("--mode", type=str, default=None, choices=("fixed", "semantic"), help="Override chunking.mode")
+    parser.add_argument("--output", "-o", type=str, default=os.path.join("benchmarks", "results", "chunking.json"))
+    args = parser.parse_args()
+
+    if args.input:
+        corpus = []
+        for item in iter_documents_from_dir(args.input):
+            corpus.append(item)
+            if len(corpus) >= args.docs:
+                break
+    else:
+        corpus, _ = generate_corpus(args.docs)
+    if not corpus:
+        print("No documents found.")
+        return
+
+    config = copy.deepcopy(CONFIG)
+    if args.chunk_size:
+        config["chunking"]["chunk_size"] = args.chunk_size
+    if args.mode:
+        config["chunking"]["mode"] = args.mode
+
+    tokenizers = {"approx": lambda: ApproxTokenizer(), "regex": lambda: RegexTokenizer()}
+    if args.vocab:
+        ranks = BPETokenizer.from_file(args.vocab).ranks
+        tokenizers["bpe"] = lambda: BPETokenizer(ranks) # Fresh instance each time: cold cache
+    reference = tokenizers["bpe" if args.vocab else "regex"]()
+
+    report = {
+        "documents": len(corpus),
+        "mb": sum(len(content.encode("utf-8")) for content, _, _ in corpus) / 1e6,
+        "chunk_size": config["chunking"]["chunk_size"],
+        "mode": config["chunking"]["mode"],
+        "reference_tokenizer": reference.name,
+        "tokenizers": {name: run_tokenizer(config, make(), corpus, reference) for name, make in tokenizers.items()},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
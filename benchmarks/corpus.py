@@ -0,0 +1,122 @@
+"""
+Deterministic synthetic corpus for benchmarks.
+
+Documents are prose built from a fixed pseudo-word vocabulary; a seeded share of them
+are exact duplicates, near-duplicates, noisy scrapes, very long or too short, so every
+filter and improver branch gets exercised.
+
+Usage: python benchmarks/corpus.py --docs 1000 --output ./bench_docs/
+"""
+import argparse
+import os
+import random
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+SYLLABLES = ("ka", "lo", "mi", "ren", "to", "sa", "vel", "dor", "an", "is", "por", "qu",
+             "el", "tra", "no", "ve", "li", "ga", "sim", "ur", "be", "thal", "co", "den")
+BOILERPLATE = ("Copyright 2024. All rights reserved.", "Click here to subscribe to our newsletter.",
+               "Share this on social media.", "Privacy policy | Terms of use", "Read more")
+
+def build_vocabulary(size: int = 5000, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+class CorpusGenerator:
+    """
+    Seeded generator of (content, doc_id, source) tuples.
+
+    Rates are per-document probabilities; whatever is left over is plain prose.
+    """
+
+    def __init__(self, seed: int = 42, duplicate_rate: float = 0.05, near_duplicate_rate: float = 0.05,
+                 noise_rate: float = 0.10, long_rate: float = 0.02, short_rate: float = 0.02):
+        self.seed = seed
+        self.rates = [("duplicate", duplicate_rate), ("near_duplicate", near_duplicate_rate),
+                      ("noisy", noise_rate), ("long", long_rate), ("short", short_rate)]
+        self.vocabulary = build_vocabulary(seed=seed)
+        self.kinds: Counter = Counter()
+
+    def _sentence(self, rng: random.Random) -> str:
+        words = rng.choices(self.vocabulary, k=rng.randint(8, 25))
+        return words[0].capitalize() + " " + " ".join(words[1:]) + rng.choice((".", ".", ".", "?", "!"))
+
+    def _paragraph(self, rng: random.Random) -> str:
+        return " ".join(self._sentence(rng) for _ in range(rng.randint(3, 6)))
+
+    def _prose(self, rng: random.Random, paragraphs: int) -> str:
+        return "\n\n".join(self._paragraph(rng) for _ in range(paragraphs))
+
+    def _noisy(self, rng: random.Random) -> str:
+        lines = []
+        for paragraph in self._prose(rng, rng.randint(2, 5)).split("\n\n"):
+            lines.append(f"<div class=\"post\"><p>{paragraph}</p></div>")
+            lines.append(rng.choice(BOILERPLATE))
+            lines.append(f"https://example.com/{rng.choice(self.vocabulary)}?id={rng.randint(1, 10 ** 6)}")
+        lines.append("".join(rng.choice("#*|=-_~") for _ in range(rng.randint(20, 200))))
+        return "\n".join(lines)
+
+    def _near_duplicate(self, rng: random.Random, original: str) -> str:
+        words = original.split(" ")
+        for _ in range(max(1, len(words) // 50)): # ~2% of words replaced
+            words[rng.randrange(len(words))] = rng.choice(self.vocabulary)
+        return " ".join(words)
+
+    def _pick_kind(self, rng: random.Random, have_originals: bool) -> str:
+        roll = rng.random()
+        for kind, rate in self.rates:
+            if roll < rate:
+                return kind if have_originals or kind not in ("duplicate", "near_duplicate") else "prose"
+            roll -= rate
+        return "prose"
+
+    def generate(self, count: int) -> Iterator[Tuple[str, str, str]]:
+        """Yields `count` documents; the same seed and count always give the same corpus."""
+        rng = random.Random(self.seed)
+        originals: List[str] = [] # Recent plain documents that duplicates are copied from
+        self.kinds = Counter()
+        for i in range(count):
+            kind = self._pick_kind(rng, bool(originals))
+            if kind == "duplicate":
+                content = rng.choice(originals)
+            elif kind == "near_duplicate":
+                content = self._near_duplicate(rng, rng.choice(originals))
+            elif kind == "noisy":
+                content = self._noisy(rng)
+            elif kind == "long":
+                content = self._prose(rng, rng.randint(40, 120))
+            elif kind == "short":
+                content = self._sentence(rng)
+            else:
+                content = self._prose(rng, rng.randint(3, 8))
+                originals.append(content)
+                if len(originals) > 1000:
+                    originals.pop(0)
+            self.kinds[kind] += 1
+            yield content, f"synthetic-{i:07d}", f"synthetic/{kind}/{i:07d}.txt"
+
+def generate_corpus(count: int, seed: int = 42, **rates) -> Tuple[List[Tuple[str, str, str]], Dict[str, int]]:
+    """Returns (documents, count per kind)."""
+    generator = CorpusGenerator(seed=seed, **rates)
+    docs = list(generator.generate(count))
+    return docs, dict(generator.kinds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic benchmark corpus as .txt files")
+    parser.add_argument("--docs", type=int, default=1000, help="Number of documents")
+    parser.add_argument("--output", "-o", type=str, required=True, help="Directory to write into")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    generator = CorpusGenerator(seed=args.seed)
+    for content, doc_id, _ in generator.generate(args.docs):
+        with open(os.path.join(args.output, f"{doc_id}.txt"), 'w', encoding='utf-8') as f:
+            f.write(content)
+    print(f"Wrote {args.docs} documents to {args.output}: {dict(generator.kinds)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compares the combined single-call evaluator against the default three-call mode.
+
+Both modes score the same documents with the same LLM; the report covers per-document
+latency and how closely the combined scores and PASS/IMPROVE/REJECT decisions agree.
+
+Usage: python benchmarks/eval_modes.py --input ./my_docs/ --limit 20
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from statistics import mean, median
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from llm import create_llm
+from evaluators import ScoreAggregator
+from models import ProcessingDocument, DocumentMetadata
+from main import iter_documents_from_dir
+
+CRITERIA = ("coherence", "completeness", "factual_clarity", "rag_suitability", "language_quality")
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+def run_mode(llm, config, mode, docs):
+    config = copy.deepcopy(config)
+    config["evaluation"]["mode"] = mode
+    aggregator = ScoreAggregator(llm, config)
+    results = []
+    try:
+        for content, doc_id, source in docs:
+            doc = ProcessingDocument(content=content, metadata=DocumentMetadata(doc_id=doc_id, source=source))
+            start = time.perf_counter()
+            aggregator.evaluate(doc)
+            results.append({"latency": time.perf_counter() - start, "doc": doc})
+    finally:
+        aggregator.shutdown()
+    return results, len(aggregator.evaluators)
+
+def summarize_latency(results):
+    latencies = [r["latency"] for r in results]
+    return {
+        "mean_s": mean(latencies),
+        "p50_s": median(latencies),
+        "p95_s": percentile(latencies, 0.95),
+        "total_s": sum(latencies),
+    }
+
+def compare(config, docs):
+    # Fresh backend without the response cache so both modes really hit the model
+    config = copy.deepcopy(config)
+    config.setdefault("cache", {})["enabled"] = False
+    llm = create_llm(config)
+
+    separate, separate_calls = run_mode(llm, config, "separate", docs)
+    combined, combined_calls = run_mode(llm, config, "combined", docs)
+    llm.close()
+
+    abs_diffs = {c: [] for c in CRITERIA + ("final_score",)}
+    status_agree = 0
+    for a, b in zip(separate, combined):
+        ea, eb = a["doc"].eval_details, b["doc"].eval_details
+        for c in abs_diffs:
+            abs_diffs[c].append(abs(getattr(ea, c) - getattr(eb, c)))
+        status_agree += a["doc"].status == b["doc"].status
+
+    return {
+        "documents": len(docs),
+        "model": llm.model,
+        "separate": dict(summarize_latency(separate), llm_calls_per_doc=separate_calls),
+        "combined": dict(summarize_latency(combined), llm_calls_per_doc=combined_calls),
+        "speedup": summarize_latency(separate)["total_s"] / max(summarize_latency(combined)["total_s"], 1e-9),
+        "agreement": {
+            "status_agreement": status_agree / len(docs),
+            "mean_abs_diff": {c: mean(v) for c, v in abs_diffs.items()},
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark combined vs separate evaluation modes")
+    parser.add_argument("--input", "-i", type=str, required=True, help="Directory of .txt/.md documents")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of documents to score")
+    parser.add_argument("--output", "-o", type=str, default=os.path.join("benchmarks", "results", "eval_modes.json"))
+    args = parser.parse_args()
+
+    docs = []
+    for item in iter_documents_from_dir(args.input):
+        docs.append(item)
+        if len(docs) >= args.limit:
+            break
+    if not docs:
+        print("No documents found.")
+        return
+
+    report = compare(CONFIG, docs)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
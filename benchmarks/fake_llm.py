@@ -0,0 +1,94 @@
+"""
+Deterministic stand-in for the Ollama backend, for benchmarks that must run offline.
+
+Scores are derived from a hash of the document body, so the same corpus always takes
+the same PASS/IMPROVE/REJECT path; latency is a fixed delay plus hash-derived jitter.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+from llm.base_llm import BaseLLM
+from llm.prompting import DOCUMENT_HEADER
+from evaluators.batch_evaluator import DOC_MARKER
+
+CRITERIA = ("coherence", "completeness", "factual_clarity", "rag_suitability", "language_quality")
+TASK_SEPARATOR = "\n\n---\nTask"
+PACKED_DOC = re.compile(rf"^{re.escape(DOC_MARKER)}(D\d+)\n", re.MULTILINE)
+
+class FakeLLM(BaseLLM):
+    """
+    BaseLLM returning canned JSON scores after a configurable synthetic latency.
+
+    Args:
+        latency: Fixed delay per call in seconds (0 measures RAGRefiner's own overhead).
+        jitter: Extra delay of up to this many seconds, derived from the prompt hash.
+        score_range: Range the per-document base score is spread over.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, latency: float = 0.0, jitter: float = 0.0,
+                 score_range: Tuple[float, float] = (0.3, 1.0)):
+        super().__init__(dict({"model": "fake", "max_retries": 1}, **(config or {})))
+        self.latency = latency
+        self.jitter = jitter
+        self.score_range = score_range
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.json_calls = 0
+
+    @staticmethod
+    def _document(prompt: str, system_prompt: Optional[str]) -> str:
+        """Recovers the document body from either prompt layout."""
+        if prompt.startswith(DOCUMENT_HEADER):
+            return prompt[len(DOCUMENT_HEADER):].split(TASK_SEPARATOR, 1)[0]
+        return prompt.split("\n\n", 1)[-1]
+
+    @staticmethod
+    def _unit(text: str, salt: str = "") -> float:
+        """Stable value in [0, 1) for `text`."""
+        digest = hashlib.md5(f"{salt}\0{text}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+    def _scores(self, document: str) -> Dict[str, float]:
+        low, high = self.score_range
+        base = low + (high - low) * self._unit(document)
+        # Small per-criterion spread around the base so the weighted sum is not trivial
+        return {c: round(min(1.0, max(0.0, base + 0.1 * (self._unit(document, c) - 0.5))), 3) for c in CRITERIA}
+
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                  required_keys: Optional[Sequence[str]] = None) -> str:
+        with self._lock:
+            self.calls += 1
+            self.json_calls += json_format
+        delay = self.latency + self.jitter * self._unit(prompt, "latency")
+        if delay > 0:
+            time.sleep(delay)
+
+        if json_format and prompt.startswith(DOC_MARKER):
+            # Packed evaluation: "### D1\n<text>\n\n### D2\n<text>..." -> one entry per document
+            parts = PACKED_DOC.split(prompt)[1:]
+            return json.dumps([dict(self._scores(text.strip()), id=doc_id, reasoning="Synthetic score.",
+                                    improvement_hints=["Tighten the wording."])
+                               for doc_id, text in zip(parts[::2], parts[1::2])])
+            
+        document = self._document(prompt, system_prompt)
+        if not json_format:
+            return document # Rewrite: hand the text back unchanged
+
+        words = document.split()
+        answer = dict(self._scores(document),
+                      reasoning="Synthetic score.",
+                      improvement_hints=["Tighten the wording."],
+                      keywords=words[:5],
+                      summary=" ".join(words[:20]),
+                      topic_tags=["synthetic"],
+                      language="en")
+        return json.dumps(answer)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats["fake"] = {"calls": self.calls, "json_calls": self.json_calls}
+        return stats
@@ -0,0 +1,169 @@
+"""
+Memory per document and per chunk, before and after the slotted models.
+
+"legacy" rebuilds the old representation: regular (__dict__) dataclasses and one
+ProcessingDocument per chunk holding a deep copy of the parent's metadata. "current"
+uses models.py as shipped: slotted classes and Chunk objects sharing the parent metadata.
+Both sides chunk the same text at the same offsets and carry the same enriched metadata,
+so the difference is object overhead only. Measured with tracemalloc.
+
+Usage: python benchmarks/memory.py --docs 5000
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from models import ProcessingDocument, DocumentMetadata, EvalScore, DocStatus
+from improvers import Chunker
+from corpus import generate_corpus
+
+@dataclass
+class LegacyEvalScore:
+    coherence: float = 0.0
+    completeness: float = 0.0
+    factual_clarity: float = 0.0
+    rag_suitability: float = 0.0
+    language_quality: float = 0.0
+    final_score: float = 0.0
+    reasoning: str = ""
+    improvement_hints: List[str] = field(default_factory=list)
+
+@dataclass
+class LegacyMetadata:
+    doc_id: str
+    source: str
+    chunk_id: Optional[int] = None
+    keywords: List[str] = field(default_factory=list)
+    summary: str = ""
+    topic_tags: List[str] = field(default_factory=list)
+    language: str = "en"
+    eval_score: float = 0.0
+    created_at: str = ""
+    improve_attempts: int = 0
+    evaluator_calls_saved: int = 0
+    reject_reason: str = ""
+
+@dataclass
+class LegacyDocument:
+    content: str
+    metadata: LegacyMetadata
+    status: DocStatus = DocStatus.PENDING
+    eval_details: Optional[LegacyEvalScore] = None
+    chunks: List["LegacyDocument"] = field(default_factory=list)
+
+def enrichment(content: str) -> Dict[str, Any]:
+    """Metadata and scores of the size a real run attaches to every passed document."""
+    words = content.split()
+    return {
+        "keywords": words[:5],
+        "summary": " ".join(words[:30]),
+        "topic_tags": ["AI", "NLP"],
+        "eval": {"coherence": 0.8, "completeness": 0.8, "factual_clarity": 0.8, "rag_suitability": 0.8,
+                 "language_quality": 0.8, "final_score": 0.8, "reasoning": " ".join(words[:25]),
+                 "improvement_hints": ["Tighten the wording."]},
+    }
+
+def build_current(corpus, extras, created_at: str) -> List[ProcessingDocument]:
+    docs = []
+    for (content, doc_id, source), extra in zip(corpus, extras):
+        metadata = DocumentMetadata(doc_id=doc_id, source=source, keywords=list(extra["keywords"]),
+                                    summary=extra["summary"], topic_tags=list(extra["topic_tags"]),
+                                    eval_score=0.8, created_at=created_at)
+        docs.append(ProcessingDocument(content=content, metadata=metadata, status=DocStatus.PASS,
+                                       eval_details=EvalScore(**copy.deepcopy(extra["eval"]))))
+    return docs
+
+def build_legacy(corpus, extras, created_at: str) -> List[LegacyDocument]:
+    docs = []
+    for (content, doc_id, source), extra in zip(corpus, extras):
+        metadata = LegacyMetadata(doc_id=doc_id, source=source, keywords=list(extra["keywords"]),
+                                  summary=extra["summary"], topic_tags=list(extra["topic_tags"]),
+                                  eval_score=0.8, created_at=created_at)
+        docs.append(LegacyDocument(content=content, metadata=metadata, status=DocStatus.PASS,
+                                   eval_details=LegacyEvalScore(**copy.deepcopy(extra["eval"]))))
+    return docs
+
+def chunk_legacy(docs: List[LegacyDocument], spans: List[List[Tuple[int, int]]]) -> None:
+    """The old Chunker's output: a ProcessingDocument per chunk with deep-copied metadata."""
+    for doc, doc_spans in zip(docs, spans):
+        doc.chunks = []
+        for i, (start, end) in enumerate(doc_spans):
+            chunk_metadata = copy.deepcopy(doc.metadata)
+            chunk_metadata.chunk_id = i
+            doc.chunks.append(LegacyDocument(content=doc.content[start:end], metadata=chunk_metadata,
+                                             eval_details=doc.eval_details))
+
+def measure(fn) -> int:
+    """Bytes still allocated after fn() returns (fn's result is kept alive while measuring)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = fn()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bytes per document and per chunk")
+    parser.add_argument("--docs", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Override chunking.chunk_size")
+    parser.add_argument("--output", "-o", type=str, default=os.path.join("benchmarks", "results", "memory.json"))
+    args = parser.parse_args()
+
+    config = copy.deepcopy(CONFIG)
+    if args.chunk_size:
+        config["chunking"]["chunk_size"] = args.chunk_size
+    corpus, _ = generate_corpus(args.docs)
+    extras = [enrichment(content) for content, _, _ in corpus]
+    created_at = "2026-01-01T00:00:00Z"
+
+    # Chunk once up front so both sides slice the same spans and chunking scratch space is not counted
+    chunker = Chunker(config)
+    current_docs = build_current(corpus, extras, created_at)
+    for doc in current_docs:
+        chunker.improve(doc)
+    spans = [[(c.start_char, c.end_char) for c in doc.chunks] for doc in current_docs]
+    chunks = sum(len(s) for s in spans)
+    # A chunk spanning the whole document is the parent's own string, so only real slices allocate text
+    text_bytes = sum(sys.getsizeof(c.content) for doc in current_docs for c in doc.chunks if c.content is not doc.content)
+    del current_docs
+
+    report: Dict[str, Any] = {"documents": len(corpus), "chunks": chunks,
+                              "chunk_size": config["chunking"]["chunk_size"],
+                              "chunk_text_bytes_per_chunk": text_bytes / chunks if chunks else 0.0}
+    for name, build, attach in (
+        ("legacy", build_legacy, chunk_legacy),
+        ("current", build_current,
+         lambda docs, _: [chunker.improve(doc) for doc in docs]),
+    ):
+        docs = build(corpus, extras, created_at)
+        doc_bytes = measure(lambda: build(corpus, extras, created_at))
+        chunk_bytes = measure(lambda: attach(docs, spans) or docs)
+        del docs
+        report[name] = {
+            "bytes_per_document": doc_bytes / len(corpus),
+            "bytes_per_chunk": chunk_bytes / chunks if chunks else 0.0,
+            "overhead_bytes_per_chunk": (chunk_bytes - text_bytes) / chunks if chunks else 0.0,
+        }
+    if report["current"]["bytes_per_chunk"]:
+        report["chunk_reduction"] = 1 - report["current"]["bytes_per_chunk"] / report["legacy"]["bytes_per_chunk"]
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Offline benchmark suite: RAGRefiner's own throughput, without a live Ollama.
+
+Runs each component (QualityFilter, DedupFilter, TextCleaner, Chunker, ChunkDeduplicator,
+Exporter) and end-to-end RAGPipeline.process_batch over synthetic corpora of several sizes, with a
+deterministic FakeLLM standing in for the model. Results go to a JSON file tagged with
+the git commit; pass an earlier file with --compare to flag regressions.
+
+Usage:
+    python benchmarks/suite.py --sizes 1000 10000 100000
+    python benchmarks/suite.py --sizes 1000 --compare benchmarks/results/suite-main.json
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from models import ProcessingDocument, DocumentMetadata, DocStatus
+from filters import QualityFilter, DedupFilter, ChunkDeduplicator
+from improvers import TextCleaner, Chunker
+from output import Exporter
+from pipeline import RAGPipeline
+from corpus import generate_corpus
+from fake_llm import FakeLLM
+
+BENCHMARKS = ("quality_filter", "dedup_filter", "text_cleaner", "chunker", "chunk_dedup", "exporter", "pipeline")
+
+def make_docs(corpus: List[Tuple[str, str, str]]) -> List[ProcessingDocument]:
+    return [ProcessingDocument(content=content, metadata=DocumentMetadata(doc_id=doc_id, source=source))
+            for content, doc_id, source in corpus]
+
+def result(count: int, seconds: float, input_bytes: int, **extra) -> Dict[str, Any]:
+    return dict({
+        "docs": count,
+        "seconds": seconds,
+        "docs_per_sec": count / seconds if seconds > 0 else 0.0,
+        "mb_per_sec": input_bytes / 1e6 / seconds if seconds > 0 else 0.0,
+    }, **extra)
+
+def bench_filter(filter_instance, docs: List[ProcessingDocument], input_bytes: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    rejected = sum(1 for doc in docs if not filter_instance.filter(doc).passed)
+    return result(len(docs), time.perf_counter() - start, input_bytes, rejected=rejected)
+
+def bench_text_cleaner(docs: List[ProcessingDocument], input_bytes: int) -> Dict[str, Any]:
+    cleaner = TextCleaner()
+    start = time.perf_counter()
+    for doc in docs:
+        cleaner.improve(doc)
+    return result(len(docs), time.perf_counter() - start, input_bytes)
+
+def bench_chunker(config: Dict[str, Any], docs: List[ProcessingDocument], input_bytes: int) -> Dict[str, Any]:
+    chunker = Chunker(config)
+    start = time.perf_counter()
+    for doc in docs:
+        chunker.improve(doc)
+    seconds = time.perf_counter() - start
+    return result(len(docs), seconds, input_bytes, chunks=sum(len(doc.chunks) for doc in docs))
+
+def bench_chunk_dedup(config: Dict[str, Any], docs: List[ProcessingDocument], input_bytes: int) -> Dict[str, Any]:
+    deduplicator = ChunkDeduplicator(config)
+    chunks = sum(len(doc.chunks) for doc in docs)
+    start = time.perf_counter()
+    removed = deduplicator.run(docs)
+    return result(len(docs), time.perf_counter() - start, input_bytes, chunks=chunks, chunks_removed=removed)
+
+def bench_exporter(chunked: List[ProcessingDocument], rejected: List[ProcessingDocument], input_bytes: int) -> Dict[str, Any]:
+    output_dir = tempfile.mkdtemp(prefix="ragrefiner-bench-")
+    try:
+        exporter = Exporter(output_dir)
+        start = time.perf_counter()
+        exporter.export_passed(chunked)
+        exporter.export_rejected(rejected)
+        seconds = time.perf_counter() - start
+        written = sum(os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return result(len(chunked) + len(rejected), seconds, input_bytes, bytes_written=written)
+
+def pipeline_config(batch_size: int) -> Dict[str, Any]:
+    """CONFIG with everything that would touch the network or persist between runs switched off."""
+    config = copy.deepcopy(CONFIG)
+    config["cache"]["enabled"] = False
+    config["pipeline"]["checkpoint"] = False
+    config["pipeline"]["stream_batch_size"] = batch_size
+    config["metrics"] = {"prometheus": False, "prometheus_port": None}
+    return config
+
+def bench_pipeline(corpus: List[Tuple[str, str, str]], input_bytes: int, batch_size: int,
+                   latency: float, jitter: float) -> Dict[str, Any]:
+    output_dir = tempfile.mkdtemp(prefix="ragrefiner-bench-")
+    llm = FakeLLM(latency=latency, jitter=jitter)
+    pipeline = RAGPipeline(pipeline_config(batch_size), output_dir, llm=llm)
+    try:
+        start = time.perf_counter()
+        totals: Dict[str, int] = {}
+        for i in range(0, len(corpus), batch_size):
+            for key, value in pipeline.process_batch(corpus[i:i + batch_size]).items():
+                totals[key] = totals.get(key, 0) + value
+        seconds = time.perf_counter() - start
+        stages = {stage: {k: s[k] for k in ("count", "mean_s", "p95_s")}
+                  for stage, s in pipeline.metrics_summary()["stages"].items()}
+    finally:
+        pipeline.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return result(len(corpus), seconds, input_bytes, llm_calls=llm.calls,
+                  passed=totals.get("passed", 0), chunks=totals.get("total_chunks_exported", 0), stages=stages)
+
+def run_size(size: int, args) -> Dict[str, Any]:
+    corpus, kinds = generate_corpus(size, seed=args.seed)
+    input_bytes = sum(len(content.encode("utf-8")) for content, _, _ in corpus)
+    report: Dict[str, Any] = {"corpus": {"docs": size, "mb": input_bytes / 1e6, "kinds": kinds}}
+    config = copy.deepcopy(CONFIG)
+
+    # Components run in pipeline order on one document set, so the Chunker sees cleaned text
+    docs = make_docs(corpus)
+    if "quality_filter" in args.only:
+        report["quality_filter"] = bench_filter(QualityFilter(), docs, input_bytes)
+    if "dedup_filter" in args.only:
+        report["dedup_filter"] = bench_filter(DedupFilter(), docs, input_bytes)
+    if "text_cleaner" in args.only:
+        report["text_cleaner"] = bench_text_cleaner(docs, input_bytes)
+    if "chunker" in args.only or "chunk_dedup" in args.only or "exporter" in args.only:
+        chunker_result = bench_chunker(config, docs, input_bytes)
+        if "chunker" in args.only:
+            report["chunker"] = chunker_result
+    if "chunk_dedup" in args.only:
+        report["chunk_dedup"] = bench_chunk_dedup(config, docs, input_bytes)
+    if "exporter" in args.only:
+        passed, rejected = [d for i, d in enumerate(docs) if i % 10], docs[::10]
+        for doc in rejected:
+            doc.status = DocStatus.REJECT
+            doc.metadata.reject_reason = "[Benchmark] synthetic rejection"
+        report["exporter"] = bench_exporter(passed, rejected, input_bytes)
+    del docs
+
+    if "pipeline" in args.only:
+        report["pipeline"] = bench_pipeline(corpus, input_bytes, args.batch_size, args.latency, args.jitter)
+    return report
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Prints docs_per_sec ratios against a previous report; returns the regressions."""
+    regressions = []
+    for size, benches in current["results"].items():
+        for name, bench in benches.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if name == "corpus" or not old or not old.get("docs_per_sec"):
+                continue
+            ratio = bench["docs_per_sec"] / old["docs_per_sec"]
+            flag = ""
+            if ratio < 1 - tolerance:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}@{size}")
+            print(f"{name:>15} @ {size:>7}: {old['docs_per_sec']:10.1f} -> {bench['docs_per_sec']:10.1f} docs/s ({ratio:.2f}x){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAGRefiner benchmark suite (fake LLM)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Corpus sizes")
+    parser.add_argument("--only", type=str, nargs="+", default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM delay per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra fake LLM delay of up to this (s)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per process_batch call")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                        help="Result file (default: benchmarks/results/suite-<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Slowdown flagged as a regression")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR) # Per-document warnings would dominate the timings
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"seed": args.seed, "latency": args.latency, "jitter": args.jitter, "batch_size": args.batch_size},
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Running {size} documents...")
+        report["results"][str(size)] = run_size(size, args)
+        for name, bench in report["results"][str(size)].items():
+            if name != "corpus":
+                print(f"  {name:>15}: {bench['docs_per_sec']:10.1f} docs/s  {bench['mb_per_sec']:7.2f} MB/s")
+
+    output = args.output or os.path.join("benchmarks", "results", f"suite-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Checkpoint journal that lets an interrupted pipeline run resume without repeating LLM work."""
+import json
+import os
+import threading
+import logging
+from dataclasses import asdict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from models import ProcessingDocument, DocumentMetadata, EvalScore, DocStatus
+
+logger = logging.getLogger(__name__)
+
+# Stages recorded per document, in pipeline order
+STAGE_EVALUATED = "evaluated"
+STAGE_IMPROVED = "improved"
+STAGE_ENRICHED = "enriched"
+STAGE_EXPORTING = "exporting" # Marker only: written before export, superseded by "done" after it
+STAGE_DONE = "done"
+STAGE_FORGOTTEN = "forgotten" # Marker only: clears "done" once a document's output was retracted
+
+class CheckpointJournal:
+    """
+    Append-only journal of per-document stage completion, stored in the output directory.
+
+    Documents are keyed by their content-addressed doc_id. Each completed stage stores a
+    snapshot of the document so a restarted run can continue from the last stage; once
+    a document is exported it is recorded as done and skipped on later runs. Documents
+    whose export was interrupted (marked exporting but never done) are reported by
+    interrupted_exports() so their partial output can be retracted before they are redone.
+    """
+
+    FILENAME = "checkpoint.jsonl"
+
+    def __init__(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self._lock = threading.Lock()
+        self._done = set()
+        self._exporting = set()
+        self._in_progress: Dict[str, Tuple[str, Dict[str, Any]]] = {} # doc_id -> (stage, snapshot)
+
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        """Replays the journal, then rewrites it with only the latest state per document."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Partial line from a crash mid-write
+                doc_id, stage = record.get("doc_id"), record.get("stage")
+                if stage == STAGE_DONE:
+                    self._done.add(doc_id)
+                    self._exporting.discard(doc_id)
+                    self._in_progress.pop(doc_id, None)
+                elif stage == STAGE_FORGOTTEN:
+                    self._done.discard(doc_id)
+                elif stage == STAGE_EXPORTING:
+                    if doc_id not in self._done:
+                        self._exporting.add(doc_id)
+                elif doc_id not in self._done:
+                    self._in_progress[doc_id] = (stage, record.get("doc", {}))
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for doc_id in self._done:
+                f.write(json.dumps({"doc_id": doc_id, "stage": STAGE_DONE}) + "\n")
+            for doc_id, (stage, snapshot) in self._in_progress.items():
+                f.write(json.dumps({"doc_id": doc_id, "stage": stage, "doc": snapshot}, ensure_ascii=False) + "\n")
+            for doc_id in self._exporting:
+                f.write(json.dumps({"doc_id": doc_id, "stage": STAGE_EXPORTING}) + "\n")
+        os.replace(tmp_path, self.path)
+
+        logger.info(f"Checkpoint loaded: {len(self._done)} documents done, {len(self._in_progress)} in progress, "
+                    f"{len(self._exporting)} with an interrupted export")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush() # Each completed stage must survive a crash right after it
+
+    @staticmethod
+    def _snapshot(doc: ProcessingDocument) -> Dict[str, Any]:
+        return {
+            "content": doc.content,
+            "status": doc.status.value,
+            "metadata": asdict(doc.metadata),
+            "eval_details": asdict(doc.eval_details) if doc.eval_details else None,
+        }
+
+    def is_done(self, doc_id: str) -> bool:
+        return doc_id in self._done
+
+    def stage_of(self, doc_id: str) -> Optional[str]:
+        if doc_id in self._done:
+            return STAGE_DONE
+        entry = self._in_progress.get(doc_id)
+        return entry[0] if entry else None
+
+    def record(self, doc: ProcessingDocument, stage: str) -> None:
+        """Records that `doc` has completed `stage`, with a snapshot of its current state."""
+        snapshot = self._snapshot(doc)
+        with self._lock:
+            self._in_progress[doc.metadata.doc_id] = (stage, snapshot)
+        self._write({"doc_id": doc.metadata.doc_id, "stage": stage, "doc": snapshot})
+
+    def restore(self, doc: ProcessingDocument) -> Optional[str]:
+        """Applies the last recorded snapshot to `doc` and returns its stage (None if unseen)."""
+        entry = self._in_progress.get(doc.metadata.doc_id)
+        if entry is None:
+            return None
+        stage, snapshot = entry
+        doc.content = snapshot["content"]
+        doc.status = DocStatus(snapshot["status"])
+        doc.metadata = DocumentMetadata(**snapshot["metadata"])
+        if snapshot.get("eval_details"):
+            doc.eval_details = EvalScore(**snapshot["eval_details"])
+        logger.info(f"Resuming doc {doc.metadata.doc_id} after stage '{stage}'")
+        return stage
+
+    def interrupted_exports(self) -> List[str]:
+        """doc_ids whose export started but was never marked done (output may be partial)."""
+        return sorted(self._exporting)
+
+    def mark_exporting(self, docs: Iterable[ProcessingDocument]) -> None:
+        """Records documents about to be exported; call before writing any of their output."""
+        for doc in docs:
+            doc_id = doc.metadata.doc_id
+            with self._lock:
+                self._exporting.add(doc_id)
+            self._write({"doc_id": doc_id, "stage": STAGE_EXPORTING})
+
+    def mark_done(self, docs: Iterable[ProcessingDocument]) -> None:
+        """Records documents whose results have been exported."""
+        for doc in docs:
+            doc_id = doc.metadata.doc_id
+            with self._lock:
+                self._done.add(doc_id)
+                self._exporting.discard(doc_id)
+                self._in_progress.pop(doc_id, None)
+            self._write({"doc_id": doc_id, "stage": STAGE_DONE})
+
+    def forget(self, doc_ids: Iterable[str]) -> None:
+        """Clears the done state of documents whose output was retracted, so they are processed again."""
+        for doc_id in doc_ids:
+            with self._lock:
+                if doc_id not in self._done:
+                    continue
+                self._done.discard(doc_id)
+            self._write({"doc_id": doc_id, "stage": STAGE_FORGOTTEN})
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -4,17 +4,93 @@ CONFIG = {
     "llm": {
         "model": "llama3.2",                    # change model here
         "base_url": "http://localhost:11434",
+        "base_urls": None,                       # list of Ollama hosts to load-balance across (overrides base_url)
+        "balance_policy": "least_outstanding",   # or "latency": (in-flight + 1) x EWMA latency
+        "unhealthy_after": 3,                    # consecutive failures before a host leaves rotation
+        "health_check_interval": 5,              # seconds between /api/tags probes of unhealthy hosts
         "temperature": 0.3,
         "max_retries": 3,
         "timeout": 60, # seconds
+        "pool_size": 8,                          # keep-alive HTTP connections to Ollama
+        "stream": True,                          # stream tokens as they are generated
+        "stream_tail_tokens": 64,                # tokens allowed after a complete JSON answer before cutting off
+        "prefix_prompts": True,                  # document body first so a doc's calls share a cached prefix
+        "keep_alive": "30m",                     # keep the model and its prompt cache loaded between calls
+        "adaptive_concurrency": {
+            "enabled": True,                     # AIMD limit on in-flight requests to Ollama
+            "initial": 4,
+            "min": 1,
+            "max": 32,                           # also bounded by worker threads / pool_size
+            "latency_tolerance": 1.5,            # back off once latency > 1.5x the best seen
+            "backoff_ratio": 0.5,                # limit multiplier on errors/timeouts
+        },
     },
     "evaluation": {
         "pass_threshold": 0.75,                  # PASS if score >= 0.75
         "improve_threshold": 0.40,               # IMPROVE if score >= 0.40
         "max_improve_attempts": 2,
+        "targeted_improve": True,                # after a rewrite, re-run only evaluators with a failing criterion
+        "criterion_threshold": 0.75,             # a criterion below this counts as failing
+        "mode": "separate",                      # "separate" (3 LLM calls) or "combined" (1 call)
+        "concurrent_evaluators": True,           # run the 3 evaluators in parallel
+        "evaluator_workers": 3,                  # thread pool fan-out for evaluators
+        "batching": {
+            "enabled": False,                    # score several short documents per LLM request
+            "max_doc_tokens": 200,               # only documents up to this size (~800 chars) are packed
+            "token_budget": 2048,                # prompt + expected answer tokens per packed request
+            "max_docs": 8,                       # documents per packed request
+        },
+    },
+    "prescoring": {
+        "enabled": True,                         # rule-based gate before the LLM evaluators
+        "reject_below": 0.25,                    # REJECT without LLM if heuristic score < this
+        "pass_above": None,                      # PASS without LLM if score >= this (e.g. 0.9); None = reject-only
+        "pass_min_words": 120,                   # ...and only documents with at least this many words,
+        "pass_min_sentences": 5,                 # this many sentences,
+        "pass_min_real_word_ratio": 0.9,         # this share of pronounceable words
+        "pass_min_function_word_ratio": 0.2,     # and this share of common English function words
+    },
+    "cache": {
+        "enabled": True,                         # persistent LLM response cache
+        "path": None,                            # default: <output_dir>/llm_cache.sqlite
+        "max_size_mb": 512,                      # LRU eviction above this size
+    },
+    "pipeline": {
+        "max_workers": 4,                        # documents evaluated/improved concurrently
+        "stream_batch_size": 32,                 # micro-batch size for --stream mode
+        "async": False,                          # asyncio driver instead of the thread pool
+        "max_in_flight": 256,                    # documents in flight on the event loop (async driver)
+        "checkpoint": True,                      # resumable runs via <output_dir>/checkpoint.jsonl
+    },
+    "metrics": {
+        "prometheus": False,                     # also write <output_dir>/metrics.prom (text exposition format)
+        "prometheus_port": None,                 # serve live metrics at http://<prometheus_host>:<port>/metrics during the run
+        "prometheus_host": "127.0.0.1",          # bind address; "0.0.0.0" exposes the endpoint on every interface
+    },
+    "output": {
+        "rotate_max_mb": 256,                    # rotate rejected/eval_report .jsonl logs above this size
     },
     "chunking": {
-        "chunk_size": 512,                       # tokens (approximate)
+        "chunk_size": 512,                       # tokens, as counted by the tokenizer below
         "chunk_overlap": 64,
+        "tokenizer": "regex",                    # "bpe" (needs vocab_path), "regex" (conservative estimate) or "approx" (4 chars/token)
+        "vocab_path": None,                      # local .tiktoken rank file, tokenizer.json or merges.txt for "bpe"
+        "mode": "fixed",                         # "fixed" (pack sentences by size) or "semantic" (also cut at topic shifts)
+        "semantic": {
+            "embedding_model": None,             # local Ollama embedding model (e.g. "nomic-embed-text"); None = hashing vectorizer
+            "embedding_batch_size": 64,          # sentences per /api/embed request
+            "hashing_dim": 512,                  # vector size of the hashing fallback
+            "window": 2,                         # sentences averaged on each side of a candidate boundary
+            "breakpoint_percentile": 90,         # cut at the 10% sharpest similarity drops of each document
+            "similarity_threshold": None,        # or cut wherever similarity < this (overrides the percentile)
+            "min_chunk_tokens": 64,              # smaller chunks are merged into a neighbour when it fits
+        },
+        "dedup": {
+            "enabled": True,                     # drop chunks repeating one already exported (boilerplate)
+            "across_runs": True,                 # also compare with the chunks earlier runs left in documents.jsonl
+            "method": "simhash",                 # "simhash" (word shingles) or "embedding" (semantic embedder + hyperplanes)
+            "max_hamming": 4,                    # near duplicate if the 64-bit fingerprints differ in <= this many bits
+            "min_words": 8,                      # shorter chunks are only checked for exact repeats
+        },
     },
 }
@@ -1,3 +1,4 @@
+import copy
 import os
 import sys
 
@@ -21,8 +22,12 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     
     # Initialize pipeline
-    print(f"\nInitializing pipeline with model {CONFIG['llm']['model']}...")
-    pipeline = RAGPipeline(CONFIG, output_dir)
+    # The demo ids are fixed, so a checkpoint would make every rerun skip all documents
+    config = copy.deepcopy(CONFIG)
+    config["pipeline"]["checkpoint"] = False
+    
+    print(f"\nInitializing pipeline with model {config['llm']['model']}...")
+    pipeline = RAGPipeline(config, output_dir)
     
     # Load docs directly for the demo
     docs_input = []
@@ -40,7 +45,10 @@ def main():
         return
 
     print(f"\nProcessing {len(docs_input)} demo documents...")
-    stats = pipeline.process_batch(docs_input)
+    try:
+        stats = pipeline.process_batch(docs_input)
+    finally:
+        pipeline.close()
     
     print("\n" + "="*40)
     print("📊 Demo Execution Complete 📊")
@@ -49,7 +57,8 @@ def main():
         print(f"{k}: {v}")
     
     print(f"\nOutputs written to: {output_dir}")
-    print("Check documents.jsonl for passing chunks, and eval_report.json for AI scoring details.")
+    print("Check documents.jsonl for passing chunks, eval_report.jsonl for AI scoring details, and rejected.jsonl for rejections.")
+    print(f"Run `python -m output.compact --output {output_dir}` for the legacy eval_report.json / rejected.json arrays.")
 
 if __name__ == "__main__":
     main()
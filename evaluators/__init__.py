@@ -2,4 +2,6 @@ from .base_evaluator import BaseEvaluator
 from .quality_evaluator import QualityEvaluator
 from .completeness_evaluator import CompletenessEvaluator
 from .rag_evaluator import RAGEvaluator
+from .combined_evaluator import CombinedEvaluator
 from .score_aggregator import ScoreAggregator
+from .heuristic_scorer import HeuristicScorer
@@ -1,15 +1,38 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Optional
 import json
 import logging
 from llm.base_llm import BaseLLM
+from llm.async_base_llm import AsyncBaseLLM
 from models import ProcessingDocument
 
 logger = logging.getLogger(__name__)
 
+def parse_json_response(response: str) -> Optional[Any]:
+    """Parses a possibly markdown-wrapped JSON answer; returns None if it is not valid JSON."""
+    try:
+        # Simple cleanup in case the LLM wraps it in markdown blocks
+        clean_json = response.strip()
+        if clean_json.startswith("```json"):
+            clean_json = clean_json[7:]
+        if clean_json.startswith("```"):
+            clean_json = clean_json[3:]
+        if clean_json.endswith("```"):
+            clean_json = clean_json[:-3]
+            
+        return json.loads(clean_json.strip())
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON from LLM: {e}\nResponse: {response}")
+        return None
+
 class BaseEvaluator(ABC):
     """Abstract base class for all AI evaluators."""
     
+    # Rubric criteria this evaluator scores; the improve loop re-runs it only when one of them fails
+    CRITERIA: Tuple[str, ...] = ()
+    # Score keys the JSON answer must contain; lets a streaming backend stop once they are in
+    REQUIRED_KEYS: Tuple[str, ...] = ()
+    
     def __init__(self, llm: BaseLLM):
         self.llm = llm
         
@@ -29,26 +52,25 @@ class BaseEvaluator(ABC):
         
         try:
             # We request JSON format from the LLM
-            response_text = self.llm.generate(user_prompt, system_prompt, json_format=True)
+            response_text = self.llm.generate(user_prompt, system_prompt, json_format=True, required_keys=self.REQUIRED_KEYS)
             return self.parse_response(response_text)
         except Exception as e:
             logger.error(f"Evaluation failed for document {doc.metadata.doc_id}: {e}")
             # Return empty scores on failure; the aggregator will handle it
             return {}
 
-    def _safe_parse_json(self, response: str) -> Dict[str, Any]:
-        """Helper to safely parse potentially malformed JSON responses."""
+    async def aevaluate(self, doc: ProcessingDocument, llm: AsyncBaseLLM) -> Dict[str, Any]:
+        """Async variant of evaluate() using an asyncio LLM backend."""
+        system_prompt, user_prompt = self.get_prompt(doc.content)
+        
         try:
-            # Simple cleanup in case the LLM wraps it in markdown blocks
-            clean_json = response.strip()
-            if clean_json.startswith("```json"):
-                clean_json = clean_json[7:]
-            if clean_json.startswith("```"):
-                clean_json = clean_json[3:]
-            if clean_json.endswith("```"):
-                clean_json = clean_json[:-3]
-                
-            return json.loads(clean_json.strip())
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from LLM: {e}\nResponse: {response}")
+            response_text = await llm.generate(user_prompt, system_prompt, json_format=True, required_keys=self.REQUIRED_KEYS)
+            return self.parse_response(response_text)
+        except Exception as e:
+            logger.error(f"Evaluation failed for document {doc.metadata.doc_id}: {e}")
             return {}
+            
+    def _safe_parse_json(self, response: str) -> Dict[str, Any]:
+        """Helper to safely parse potentially malformed JSON responses."""
+        data = parse_json_response(response)
+        return data if data is not None else {}
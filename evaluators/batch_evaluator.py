@@ -0,0 +1,144 @@
+import re
+import textwrap
+from typing import Dict, Any, List, Tuple, Optional
+import logging
+from llm.base_llm import BaseLLM
+from llm.async_base_llm import AsyncBaseLLM
+from models import ProcessingDocument
+from .base_evaluator import parse_json_response
+from .combined_evaluator import CombinedEvaluator
+
+logger = logging.getLogger(__name__)
+
+DOC_MARKER = "### "
+DOC_OVERHEAD_TOKENS = 8 # id line and separators per packed document
+ANSWER_TOKENS_PER_DOC = 80 # scores + short reasoning/hints per document in the reply
+
+class BatchEvaluator:
+    """
+    Scores several short documents in a single LLM call.
+
+    Each packed document gets a short local id ("D1", "D2", ...) and the model answers
+    with a JSON array of per-document scores on the combined five-criteria rubric. Only
+    entries with a known id and all five scores in 0..1 are returned; callers fall back
+    to single-document evaluation for the rest.
+    """
+
+    CRITERIA = CombinedEvaluator.CRITERIA
+
+    def __init__(self, llm: BaseLLM, config: Dict[str, Any]):
+        self.llm = llm
+        self.max_doc_tokens = config.get("max_doc_tokens", 200)
+        self.token_budget = config.get("token_budget", 2048)
+        self.max_docs = config.get("max_docs", 8)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return len(text) // 4 + 1 # Approx 4 chars per token, as in Chunker
+
+    def is_short(self, doc: ProcessingDocument) -> bool:
+        return self.estimate_tokens(doc.content) <= self.max_doc_tokens
+
+    def pack(self, docs: List[ProcessingDocument]) -> List[List[ProcessingDocument]]:
+        """Greedily groups documents, in order, into packs that fit the token budget."""
+        packs: List[List[ProcessingDocument]] = []
+        current: List[ProcessingDocument] = []
+        used = 0
+        for doc in docs:
+            cost = self.estimate_tokens(doc.content) + DOC_OVERHEAD_TOKENS + ANSWER_TOKENS_PER_DOC
+            if current and (used + cost > self.token_budget or len(current) >= self.max_docs):
+                packs.append(current)
+                current, used = [], 0
+            current.append(doc)
+            used += cost
+        if current:
+            packs.append(current)
+        return packs
+
+    def get_prompt(self, docs: List[ProcessingDocument]) -> Tuple[str, str]:
+        system_prompt = textwrap.dedent("""
+        You are an expert AI evaluator assessing documents for a Retrieval-Augmented Generation (RAG) system.
+        You will receive several short documents, each introduced by a line "### <id>".
+        Score EACH document independently on five criteria from 0.0 to 1.0:
+        1. coherence: Does the text flow logically? Are the sentences well-connected?
+        2. completeness: Does the text contain complete thoughts? Is it missing crucial context or cut off abruptly?
+        3. factual_clarity: Are the facts and statements stated clearly without ambiguity?
+        4. rag_suitability: Is the text information-dense? Does it avoid excessive boilerplate or formatting artifacts?
+        5. language_quality: Is the spelling and grammar correct? Is the tone appropriate?
+
+        Provide constructive feedback for every criterion scored below 0.8.
+
+        Respond ONLY with a valid JSON array holding one object per document, in the same order:
+        [
+            {
+                "id": "D1",
+                "coherence": float,
+                "completeness": float,
+                "factual_clarity": float,
+                "rag_suitability": float,
+                "language_quality": float,
+                "reasoning": "brief explanation",
+                "improvement_hints": ["hint 1", "hint 2"]
+            }
+        ]
+        """).strip()
+
+        user_prompt = "\n\n".join(f"{DOC_MARKER}D{i}\n{doc.content.strip()}" for i, doc in enumerate(docs, 1))
+        return system_prompt, user_prompt
+
+    @staticmethod
+    def _entries(data: Any) -> List[Tuple[Optional[str], Any]]:
+        """(id, entry) pairs from an array, an object wrapping one, or an object keyed by id."""
+        if isinstance(data, dict):
+            if "id" in data:
+                return [(str(data["id"]), data)] # A lone object for a one-document pack
+            wrapped = next((v for v in data.values() if isinstance(v, list)), None)
+            if wrapped is not None:
+                data = wrapped
+            else:
+                return [(str(key), value) for key, value in data.items()]
+        if not isinstance(data, list):
+            return []
+        return [(str(entry.get("id")) if isinstance(entry, dict) else None, entry) for entry in data]
+
+    def parse_response(self, response: str, count: int) -> Dict[int, Dict[str, Any]]:
+        """Maps pack positions (0-based) to well-formed score dicts; anything else is left out."""
+        results: Dict[int, Dict[str, Any]] = {}
+        for doc_id, entry in self._entries(parse_json_response(response)):
+            match = re.fullmatch(r"D?(\d+)", (doc_id or "").strip(), re.IGNORECASE)
+            if not match or not isinstance(entry, dict):
+                continue
+            position = int(match.group(1)) - 1
+            if not 0 <= position < count or position in results:
+                continue
+            try:
+                scores = {criterion: float(entry[criterion]) for criterion in self.CRITERIA}
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not all(0.0 <= score <= 1.0 for score in scores.values()):
+                continue
+            scores["reasoning"] = str(entry.get("reasoning") or "")
+            hints = entry.get("improvement_hints", [])
+            scores["improvement_hints"] = hints if isinstance(hints, list) else []
+            results[position] = scores
+        return results
+
+    def evaluate(self, docs: List[ProcessingDocument]) -> Dict[int, Dict[str, Any]]:
+        """Scores one pack; returns {pack position: scores} for the documents answered correctly."""
+        system_prompt, user_prompt = self.get_prompt(docs)
+        try:
+            response_text = self.llm.generate(user_prompt, system_prompt, json_format=True)
+        except Exception as e:
+            logger.error(f"Batched evaluation of {len(docs)} documents failed: {e}")
+            return {}
+        return self.parse_response(response_text, len(docs))
+
+    async def aevaluate(self, docs: List[ProcessingDocument], llm: AsyncBaseLLM) -> Dict[int, Dict[str, Any]]:
+        """Async variant of evaluate() using an asyncio LLM backend."""
+        system_prompt, user_prompt = self.get_prompt(docs)
+        try:
+            response_text = await llm.generate(user_prompt, system_prompt, json_format=True)
+        except Exception as e:
+            logger.error(f"Batched evaluation of {len(docs)} documents failed: {e}")
+            return {}
+        return self.parse_response(response_text, len(docs))
@@ -0,0 +1,41 @@
+from typing import Dict, Any, Tuple
+from .base_evaluator import BaseEvaluator
+
+class CombinedEvaluator(BaseEvaluator):
+    """Scores all five rubric criteria in a single LLM call, so the document is only prefilled once."""
+    
+    CRITERIA = ("coherence", "completeness", "factual_clarity", "rag_suitability", "language_quality")
+    REQUIRED_KEYS = CRITERIA
+    
+    def get_prompt(self, text: str) -> Tuple[str, str]:
+        system_prompt = """
+        You are an expert AI evaluator assessing documents for a Retrieval-Augmented Generation (RAG) system.
+        Evaluate the following text on five criteria from 0.0 to 1.0:
+        1. coherence: Does the text flow logically? Are the sentences well-connected?
+        2. completeness: Does the text contain complete thoughts? Is it missing crucial context or cut off abruptly?
+        3. factual_clarity: Are the facts and statements stated clearly without ambiguity?
+        4. rag_suitability: Is the text information-dense? Can it be easily split into meaningful chunks? Does it avoid excessive boilerplate or formatting artifacts?
+        5. language_quality: Is the spelling and grammar correct? Is the tone appropriate?
+        
+        Provide constructive feedback for every criterion scored below 0.8.
+        
+        Respond ONLY with a valid JSON object matching this schema:
+        {
+            "coherence": float,
+            "completeness": float,
+            "factual_clarity": float,
+            "rag_suitability": float,
+            "language_quality": float,
+            "reasoning": "brief explanation",
+            "improvement_hints": ["hint 1", "hint 2"]
+        }
+        """
+        
+        return self.llm.document_prompt(system_prompt, text, "Text to evaluate")
+        
+    def parse_response(self, response: str) -> Dict[str, Any]:
+        data = self._safe_parse_json(response)
+        result = {criterion: float(data.get(criterion, 0.0)) for criterion in self.CRITERIA}
+        result["reasoning"] = data.get("reasoning", "")
+        result["improvement_hints"] = data.get("improvement_hints", [])
+        return result
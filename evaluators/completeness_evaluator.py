@@ -4,6 +4,9 @@ from .base_evaluator import BaseEvaluator
 class CompletenessEvaluator(BaseEvaluator):
     """Evaluates if the document contains complete thoughts and clear facts."""
     
+    CRITERIA = ("completeness", "factual_clarity")
+    REQUIRED_KEYS = CRITERIA
+    
     def get_prompt(self, text: str) -> Tuple[str, str]:
         system_prompt = """
         You are an expert AI evaluator assessing document completeness for a RAG system.
@@ -22,8 +25,7 @@ class CompletenessEvaluator(BaseEvaluator):
         }
         """
         
-        user_prompt = f"Text to evaluate:\n\n{text}"
-        return system_prompt, user_prompt
+        return self.llm.document_prompt(system_prompt, text, "Text to evaluate")
         
     def parse_response(self, response: str) -> Dict[str, Any]:
         data = self._safe_parse_json(response)
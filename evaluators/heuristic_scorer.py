@@ -0,0 +1,172 @@
+import re
+import threading
+from statistics import mean, pstdev
+from typing import Dict, Any, Optional, Tuple
+from models import ProcessingDocument, EvalScore, DocStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+BOILERPLATE_PATTERN = re.compile(
+    r"(copyright|all rights reserved|cookie|privacy policy|terms of (use|service)|subscribe|"
+    r"sign up|log ?in|click here|read more|share (this|on)|follow us|advertisement|"
+    r"unsubscribe|powered by)", re.IGNORECASE
+)
+MARKUP_PATTERN = re.compile(r"<[^>]+>|https?://\S+|&[a-z]+;")
+STRUCTURE_PATTERN = re.compile(r"^\s*(#{1,6}\s|[-*•]\s|\d+[.)]\s)", re.MULTILINE)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+WORD_TOKEN = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+CONSONANT_RUN = re.compile(r"[bcdfghjklmnpqrstvwxz]{5}")
+PROMO_PATTERN = re.compile(
+    r"(buy now|order now|shop now|act now|limited[- ]time|free trial|best[- ]in[- ]class|world[- ]class|"
+    r"game[- ]chang|revolutionary|unbeatable|don'?t miss|\d+% off|money[- ]back)", re.IGNORECASE
+)
+# Most frequent English function words: about a third of natural prose, rare in Lorem ipsum or keyword soup
+FUNCTION_WORDS = frozenset(
+    "the of and to a in is that for it as with was on be by are this or an from at which not have has "
+    "can but their its these more also they than other into when we our".split()
+)
+
+class HeuristicScorer:
+    """
+    Cheap rule-based pre-scoring gate that runs before the LLM evaluators.
+
+    Documents scoring below `reject_below` are rejected without any LLM call. The PASS
+    shortcut is off by default (`pass_above` None): style signals alone cannot tell prose
+    from fluent filler, so when set, a document must also be long enough, have enough
+    sentences, consist of real words (see pass_blocker) and score at least `pass_above`.
+    Everything else goes on to ScoreAggregator.
+    """
+
+    def __init__(self, config: Dict[str, Any], llm_calls_per_eval: int = 3):
+        prescoring = config.get("prescoring", {})
+        self.enabled = prescoring.get("enabled", False)
+        self.reject_below = prescoring.get("reject_below", 0.25)
+        self.pass_above: Optional[float] = prescoring.get("pass_above")
+        self.pass_min_words = prescoring.get("pass_min_words", 120)
+        self.pass_min_sentences = prescoring.get("pass_min_sentences", 5)
+        self.pass_min_real_word_ratio = prescoring.get("pass_min_real_word_ratio", 0.9)
+        self.pass_min_function_word_ratio = prescoring.get("pass_min_function_word_ratio", 0.2)
+        self.llm_calls_per_eval = llm_calls_per_eval
+
+        self._lock = threading.Lock()
+        self.stats = {"prescore_pass": 0, "prescore_reject": 0, "prescore_uncertain": 0, "llm_calls_avoided": 0}
+
+    def signals(self, text: str) -> Dict[str, float]:
+        """Computes the individual heuristic signals, each normalised to 0..1."""
+        words = text.split()
+        if not words:
+            return {"sentence_length": 0.0, "lexical_diversity": 0.0, "boilerplate": 0.0, "markup": 0.0, "alpha_ratio": 0.0, "structure": 0.0}
+
+        # Sentence length: natural prose sits around 8-30 words with some variation
+        sentences = [s for s in SENTENCE_SPLIT.split(text.strip()) if s.strip()]
+        lengths = [len(s.split()) for s in sentences]
+        avg_len = mean(lengths)
+        if 8 <= avg_len <= 30:
+            sentence_score = 1.0
+        elif avg_len < 8:
+            sentence_score = avg_len / 8
+        else:
+            sentence_score = max(0.0, 1.0 - (avg_len - 30) / 60)
+        if len(lengths) > 3 and pstdev(lengths) < 1.0:
+            sentence_score *= 0.7 # Suspiciously uniform: templated or generated lists
+
+        # Lexical diversity: type-token ratio over a fixed window so long docs aren't penalised
+        window = [w.lower() for w in words[:1000]]
+        ttr = len(set(window)) / len(window)
+        diversity_score = min(1.0, ttr / 0.5)
+
+        # Boilerplate: lines that look like navigation/legal text or repeat verbatim
+        lines = [l.strip() for l in text.splitlines() if l.strip()]
+        repeated = len(lines) - len(set(lines))
+        boilerplate_lines = sum(1 for l in lines if len(l) < 200 and BOILERPLATE_PATTERN.search(l))
+        boilerplate_ratio = (boilerplate_lines + repeated) / len(lines) if lines else 0.0
+        boilerplate_score = max(0.0, 1.0 - 2 * boilerplate_ratio)
+
+        # Markup: HTML tags, URLs and entities left over from scraping
+        markup_chars = sum(len(m) for m in MARKUP_PATTERN.findall(text))
+        markup_score = max(0.0, 1.0 - 3 * markup_chars / len(text))
+        
+        non_space = re.sub(r"\s", "", MARKUP_PATTERN.sub(" ", text))
+        alpha_ratio = sum(1 for c in non_space if c.isalpha()) / len(non_space) if non_space else 0.0
+        alpha_score = min(1.0, alpha_ratio / 0.75)
+
+        paragraphs = len([p for p in re.split(r"\n\s*\n", text) if p.strip()])
+        markers = len(STRUCTURE_PATTERN.findall(text))
+        structure_score = min(1.0, 0.5 + 0.15 * (paragraphs - 1) + 0.05 * markers)
+
+        return {
+            "sentence_length": sentence_score,
+            "lexical_diversity": diversity_score,
+            "boilerplate": boilerplate_score,
+            "markup": markup_score,
+            "alpha_ratio": alpha_score,
+            "structure": structure_score,
+        }
+
+    def score(self, text: str) -> Tuple[float, Dict[str, float]]:
+        signals = self.signals(text)
+        weights = {"sentence_length": 0.2, "lexical_diversity": 0.2, "boilerplate": 0.2, "markup": 0.2, "alpha_ratio": 0.1, "structure": 0.1}
+        total = sum(signals[k] * w for k, w in weights.items())
+        # Noise is a veto rather than just another signal: heavy boilerplate or markup drags the whole score down
+        total *= 0.5 + 0.5 * min(signals["boilerplate"], signals["markup"])
+        return total, signals
+
+    def pass_blocker(self, text: str) -> Optional[str]:
+        """Why `text` may not take the PASS shortcut (None if it may): too short or not ordinary prose."""
+        sentences = [s for s in SENTENCE_SPLIT.split(text.strip()) if s.strip()]
+        tokens = [t.lower() for t in WORD_TOKEN.findall(text)]
+        if len(tokens) < self.pass_min_words:
+            return f"{len(tokens)} words < {self.pass_min_words}"
+        if len(sentences) < self.pass_min_sentences:
+            return f"{len(sentences)} sentences < {self.pass_min_sentences}"
+        # Real words: pronounceable Latin-script tokens of plausible length (rules out keyboard mash and hashes)
+        real = sum(1 for t in tokens if len(t) <= 20 and re.search(r"[aeiouy]", t) and not CONSONANT_RUN.search(t))
+        if real / len(tokens) < self.pass_min_real_word_ratio:
+            return f"real-word ratio {real / len(tokens):.2f} < {self.pass_min_real_word_ratio:.2f}"
+        # Function words: real grammar between the words (rules out Lorem ipsum and keyword lists)
+        function_ratio = sum(1 for t in tokens if t in FUNCTION_WORDS) / len(tokens)
+        if function_ratio < self.pass_min_function_word_ratio:
+            return f"function-word ratio {function_ratio:.2f} < {self.pass_min_function_word_ratio:.2f}"
+        if PROMO_PATTERN.search(text) or sum(1 for s in sentences if s.rstrip().endswith("!")) * 10 > len(sentences):
+            return "promotional wording"
+        return None
+
+    def _bump(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def gate(self, doc: ProcessingDocument) -> bool:
+        """
+        Decides PASS/REJECT for confident cases.
+
+        Returns True if the document was decided here (no LLM evaluation needed).
+        """
+        if not self.enabled:
+            return False
+
+        score, signals = self.score(doc.content)
+        passes = self.pass_above is not None and score >= self.pass_above and self.pass_blocker(doc.content) is None
+        if score >= self.reject_below and not passes:
+            self._bump("prescore_uncertain")
+            return False
+
+        summary = ", ".join(f"{k}={v:.2f}" for k, v in signals.items())
+        doc.eval_details = EvalScore(final_score=score, reasoning=f"Heuristic pre-score {score:.2f} ({summary})",
+                                     decided_by="prescore")
+        doc.metadata.eval_score = score
+        if passes:
+            doc.status = DocStatus.PASS
+            self._bump("prescore_pass")
+        else:
+            doc.status = DocStatus.REJECT
+            doc.metadata.reject_reason = f"Heuristic pre-score too low ({score:.2f} < {self.reject_below:.2f})"
+            self._bump("prescore_reject")
+        self._bump("llm_calls_avoided", self.llm_calls_per_eval)
+
+        logger.info(f"Doc {doc.metadata.doc_id} decided by pre-score: Score={score:.2f}, Status={doc.status.value}")
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
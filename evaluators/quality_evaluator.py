@@ -5,6 +5,9 @@ from .base_evaluator import BaseEvaluator
 class QualityEvaluator(BaseEvaluator):
     """Evaluates the general quality of the text (coherence, language)."""
     
+    CRITERIA = ("coherence", "language_quality")
+    REQUIRED_KEYS = CRITERIA
+    
     def get_prompt(self, text: str) -> Tuple[str, str]:
         system_prompt = """
         You are an expert AI evaluator assessing document quality for a Retrieval-Augmented Generation (RAG) system.
@@ -23,8 +26,7 @@ class QualityEvaluator(BaseEvaluator):
         }
         """
         
-        user_prompt = f"Text to evaluate:\n\n{text}"
-        return system_prompt, user_prompt
+        return self.llm.document_prompt(system_prompt, text, "Text to evaluate")
         
     def parse_response(self, response: str) -> Dict[str, Any]:
         data = self._safe_parse_json(response)
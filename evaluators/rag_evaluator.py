@@ -4,6 +4,9 @@ from .base_evaluator import BaseEvaluator
 class RAGEvaluator(BaseEvaluator):
     """Evaluates how suitable the document is for chunking and retrieval."""
     
+    CRITERIA = ("rag_suitability",)
+    REQUIRED_KEYS = CRITERIA
+    
     def get_prompt(self, text: str) -> Tuple[str, str]:
         system_prompt = """
         You are an expert AI evaluator assessing document suitability for a RAG system.
@@ -20,8 +23,7 @@ class RAGEvaluator(BaseEvaluator):
         }
         """
         
-        user_prompt = f"Text to evaluate:\n\n{text}"
-        return system_prompt, user_prompt
+        return self.llm.document_prompt(system_prompt, text, "Text to evaluate")
         
     def parse_response(self, response: str) -> Dict[str, Any]:
         data = self._safe_parse_json(response)
@@ -1,10 +1,17 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 from models import ProcessingDocument, EvalScore, DocStatus
+from metrics import Metrics
 from llm.base_llm import BaseLLM
+from llm.async_base_llm import AsyncBaseLLM
 from .base_evaluator import BaseEvaluator
 from .quality_evaluator import QualityEvaluator
 from .completeness_evaluator import CompletenessEvaluator
 from .rag_evaluator import RAGEvaluator
+from .combined_evaluator import CombinedEvaluator
+from .batch_evaluator import BatchEvaluator
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,16 +19,40 @@ logger = logging.getLogger(__name__)
 class ScoreAggregator:
     """Runs all evaluators and aggregates their scores based on configured weights."""
     
-    def __init__(self, llm: BaseLLM, config: Dict[str, Any]):
+    def __init__(self, llm: BaseLLM, config: Dict[str, Any], metrics: Optional[Metrics] = None):
         self.config = config.get("evaluation", {})
+        self.metrics = metrics or Metrics()
         self.pass_threshold = self.config.get("pass_threshold", 0.75)
         self.improve_threshold = self.config.get("improve_threshold", 0.40)
+        # Targeted re-evaluation: after a rewrite only evaluators owning a failing criterion run again
+        self.targeted = self.config.get("targeted_improve", False)
+        self.criterion_threshold = self.config.get("criterion_threshold", self.pass_threshold)
         
-        self.evaluators: List[BaseEvaluator] = [
-            QualityEvaluator(llm),
-            CompletenessEvaluator(llm),
-            RAGEvaluator(llm)
-        ]
+        # Concurrent mode fans the evaluator calls out to a shared thread pool so the
+        # wall-clock time per document is roughly the slowest evaluator, not the sum.
+        self.concurrent = self.config.get("concurrent_evaluators", False)
+        self.max_workers = self.config.get("evaluator_workers", 3)
+        # Documents processed in parallel by RAGPipeline share this pool, so size it for all of them
+        self.doc_workers = max(1, config.get("pipeline", {}).get("max_workers", 1))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock() # Document workers may all ask for the pool at once
+        
+        # "separate": one call per evaluator (3 calls); "combined": all five criteria in one call
+        self.mode = self.config.get("mode", "separate")
+        if self.mode == "combined":
+            self.evaluators: List[BaseEvaluator] = [CombinedEvaluator(llm)]
+        elif self.mode == "separate":
+            self.evaluators = [
+                QualityEvaluator(llm),
+                CompletenessEvaluator(llm),
+                RAGEvaluator(llm)
+            ]
+        else:
+            raise ValueError(f"Unknown evaluation mode: {self.mode!r} (expected 'separate' or 'combined')")
+            
+        # Short documents can be scored several to a request instead (evaluation.batching)
+        batching = self.config.get("batching", {})
+        self.batcher: Optional[BatchEvaluator] = BatchEvaluator(llm, batching) if batching.get("enabled", False) else None
         
         # Weights according to README.md scoring rubric
         self.weights = {
@@ -32,18 +63,180 @@ class ScoreAggregator:
             "language_quality": 0.10
         }
         
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily creates the thread pool used in concurrent mode."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.max_workers) * self.doc_workers,
+                    thread_name_prefix="evaluator"
+                )
+            return self._executor
+        
+    def _timed_evaluate(self, evaluator: BaseEvaluator, doc: ProcessingDocument) -> Dict[str, Any]:
+        with self.metrics.time(f"evaluator.{evaluator.__class__.__name__}"):
+            return evaluator.evaluate(doc)
+            
+    async def _timed_aevaluate(self, evaluator: BaseEvaluator, doc: ProcessingDocument, llm: AsyncBaseLLM) -> Dict[str, Any]:
+        with self.metrics.time(f"evaluator.{evaluator.__class__.__name__}"):
+            return await evaluator.aevaluate(doc, llm)
+            
+    def _run_evaluators(self, doc: ProcessingDocument, evaluators: Optional[List[BaseEvaluator]] = None) -> List[Dict[str, Any]]:
+        """Runs the given evaluators (default: all) on the document, returning results in evaluator order."""
+        evaluators = self.evaluators if evaluators is None else evaluators
+        if not self.concurrent or len(evaluators) < 2:
+            return [self._timed_evaluate(evaluator, doc) for evaluator in evaluators]
+            
+        executor = self._get_executor()
+        futures = [executor.submit(self._timed_evaluate, evaluator, doc) for evaluator in evaluators]
+        
+        results = []
+        for evaluator, future in zip(evaluators, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Mirror BaseEvaluator.evaluate: a failed evaluator contributes no scores
+                logger.error(f"{evaluator.__class__.__name__} failed for doc {doc.metadata.doc_id}: {e}")
+                results.append({})
+        return results
+        
+    def can_batch(self, doc: ProcessingDocument) -> bool:
+        """True if the document is short enough to be packed with others by evaluate_packed()."""
+        return self.batcher is not None and self.batcher.is_short(doc)
+        
+    def _evaluate_pack(self, pack: List[ProcessingDocument]) -> Dict[int, Dict[str, Any]]:
+        with self.metrics.time("evaluator.BatchEvaluator"):
+            return self.batcher.evaluate(pack)
+            
+    def _apply_packs(self, packs: List[List[ProcessingDocument]], answers: List[Dict[int, Dict[str, Any]]]) -> List[ProcessingDocument]:
+        """Aggregates the answered documents of each pack; returns the ones that need a single-document call."""
+        fallback = []
+        for pack, answered in zip(packs, answers):
+            for position, doc in enumerate(pack):
+                if position in answered:
+                    self._aggregate(doc, [answered[position]], calls=0)
+                else:
+                    fallback.append(doc)
+                    
+        docs = sum(len(pack) for pack in packs)
+        self.metrics.inc("llm_evaluator_calls", len(packs))
+        self.metrics.inc("batch_eval_packs", len(packs))
+        self.metrics.inc("batch_eval_docs", docs)
+        self.metrics.inc("batch_eval_fallbacks", len(fallback))
+        logger.info(f"Packed evaluation: {docs} documents in {len(packs)} requests, {len(fallback)} falling back to single calls")
+        return fallback
+        
+    def evaluate_packed(self, docs: List[ProcessingDocument]) -> List[ProcessingDocument]:
+        """
+        Evaluates short documents several to an LLM request (see can_batch()).
+        
+        Packs are sized by evaluation.batching.token_budget; any document whose entry in
+        the answer is missing or malformed is evaluated on its own with evaluate().
+        """
+        packs = self.batcher.pack(docs)
+        with self.metrics.time("evaluate_packed"):
+            if self.concurrent and len(packs) > 1:
+                answers = list(self._get_executor().map(self._evaluate_pack, packs))
+            else:
+                answers = [self._evaluate_pack(pack) for pack in packs]
+            # Sequential on purpose: evaluate() itself fans out to the executor
+            for doc in self._apply_packs(packs, answers):
+                self.evaluate(doc)
+        return docs
+        
+    async def aevaluate_packed(self, docs: List[ProcessingDocument], llm: AsyncBaseLLM) -> List[ProcessingDocument]:
+        """Async variant of evaluate_packed(): packs and fallbacks are awaited together on the event loop."""
+        packs = self.batcher.pack(docs)
+        
+        async def evaluate_pack(pack: List[ProcessingDocument]) -> Dict[int, Dict[str, Any]]:
+            with self.metrics.time("evaluator.BatchEvaluator"):
+                return await self.batcher.aevaluate(pack, llm)
+                
+        with self.metrics.time("evaluate_packed"):
+            answers = await asyncio.gather(*(evaluate_pack(pack) for pack in packs))
+            fallback = self._apply_packs(packs, list(answers))
+            await asyncio.gather(*(self.aevaluate(doc, llm) for doc in fallback))
+        return docs
+        
+    def shutdown(self) -> None:
+        """Releases the evaluator thread pool, if one was created."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        
     def evaluate(self, doc: ProcessingDocument) -> ProcessingDocument:
         """Runs the document against all internal evaluators and assigns a final status."""
         logger.info(f"AI Evaluation started for doc {doc.metadata.doc_id}")
+        with self.metrics.time("evaluate"):
+            return self._aggregate(doc, self._run_evaluators(doc))
+        
+    def failing_criteria(self, doc: ProcessingDocument) -> List[str]:
+        """Criteria of the document's last evaluation scored below evaluation.criterion_threshold."""
+        if doc.eval_details is None:
+            return list(self.weights)
+        return [c for c in self.weights if getattr(doc.eval_details, c) < self.criterion_threshold]
+        
+    def _plan_reevaluation(self, doc: ProcessingDocument) -> List[Optional[Dict[str, Any]]]:
+        """
+        Per evaluator (in order): None if it must run again, else the previous scores to carry over.
+        Evaluators whose criteria all passed last time are not re-run.
+        """
+        failing = set(self.failing_criteria(doc))
+        if not self.targeted or doc.eval_details is None:
+            return [None] * len(self.evaluators)
+        plan = [None if failing.intersection(e.CRITERIA) or not e.CRITERIA
+                else {c: getattr(doc.eval_details, c) for c in e.CRITERIA} for e in self.evaluators]
+        # Nothing attributable to a single evaluator (e.g. a looser criterion_threshold): run them all
+        return plan if any(p is None for p in plan) else [None] * len(self.evaluators)
+        
+    def _record_saved(self, doc: ProcessingDocument, plan: List[Optional[Dict[str, Any]]]) -> int:
+        saved = sum(1 for p in plan if p is not None)
+        if saved:
+            doc.metadata.evaluator_calls_saved += saved
+            self.metrics.inc("evaluator_calls_saved", saved)
+            logger.info(f"Doc {doc.metadata.doc_id}: re-evaluating {len(plan) - saved}/{len(plan)} evaluators")
+        return len(plan) - saved
+        
+    def reevaluate(self, doc: ProcessingDocument) -> ProcessingDocument:
+        """
+        Re-scores a rewritten document. With evaluation.targeted_improve, only evaluators owning
+        a criterion that failed last time run again; the others keep their previous scores.
+        """
+        plan = self._plan_reevaluation(doc)
+        calls = self._record_saved(doc, plan)
+        with self.metrics.time("evaluate"):
+            fresh = iter(self._run_evaluators(doc, [e for e, p in zip(self.evaluators, plan) if p is None]))
+            return self._aggregate(doc, [next(fresh) if p is None else p for p in plan], calls=calls)
+            
+    async def areevaluate(self, doc: ProcessingDocument, llm: AsyncBaseLLM) -> ProcessingDocument:
+        """Async variant of reevaluate()."""
+        plan = self._plan_reevaluation(doc)
+        calls = self._record_saved(doc, plan)
+        with self.metrics.time("evaluate"):
+            fresh = iter(await asyncio.gather(*(self._timed_aevaluate(e, doc, llm)
+                                                for e, p in zip(self.evaluators, plan) if p is None)))
+            return self._aggregate(doc, [next(fresh) if p is None else p for p in plan], calls=calls)
+        
+    async def aevaluate(self, doc: ProcessingDocument, llm: AsyncBaseLLM) -> ProcessingDocument:
+        """Async variant of evaluate(): all evaluator calls are awaited together on the event loop."""
+        logger.info(f"AI Evaluation started for doc {doc.metadata.doc_id}")
+        with self.metrics.time("evaluate"):
+            results = await asyncio.gather(*(self._timed_aevaluate(evaluator, doc, llm) for evaluator in self.evaluators))
+            return self._aggregate(doc, list(results))
         
+    def _aggregate(self, doc: ProcessingDocument, evaluator_results: List[Dict[str, Any]],
+                   calls: Optional[int] = None) -> ProcessingDocument:
+        """
+        Merges evaluator results (in evaluator order) into an EvalScore and assigns a final status.
+        `calls` is the number of LLM calls to count for the document (default: one per result).
+        """
         all_scores = {}
         all_hints = []
         all_reasoning = []
         
-        # Run all evaluators
-        # Note: In a production system, these LLM calls could be done asynchronously
-        for evaluator in self.evaluators:
-            results = evaluator.evaluate(doc)
+        # Results are merged in evaluator order so concurrent and sequential runs match exactly
+        for results in evaluator_results:
             all_scores.update(results)
             
             if "reasoning" in results and results["reasoning"]:
@@ -75,6 +268,7 @@ class ScoreAggregator:
         doc.metadata.eval_score = final_score
         
         # Determine status based on thresholds
+        self.metrics.inc("llm_evaluator_calls", len(evaluator_results) if calls is None else calls)
         if final_score >= self.pass_threshold:
             doc.status = DocStatus.PASS
         elif final_score >= self.improve_threshold:
@@ -3,3 +3,4 @@ from .quality_filter import QualityFilter
 from .dedup_filter import DedupFilter
 from .relevance_filter import RelevanceFilter
 from .filter_pipeline import FilterPipeline
+from .chunk_dedup import ChunkDeduplicator
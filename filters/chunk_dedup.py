@@ -0,0 +1,136 @@
+import hashlib
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import logging
+from .minhash_lsh import hash_token
+from .simhash import simhash, HyperplaneHasher, HammingIndex
+from models import ProcessingDocument, Chunk
+
+logger = logging.getLogger(__name__)
+
+class ChunkDeduplicator:
+    """
+    Drops chunks that repeat, exactly or nearly, a chunk kept earlier in the run.
+
+    DedupFilter only compares whole documents, so boilerplate shared by otherwise
+    different documents (headers, footers, legal notices) survives it and is chunked
+    into many copies. Here every chunk gets a 64-bit SimHash - of its word-bigram
+    shingles, or with method="embedding" of its embedding via random hyperplanes - and
+    a HammingIndex finds any earlier chunk within max_hamming bits. Exact repeats are
+    caught first by content hash, whatever their length.
+
+    State lives for the whole run, and documents must be passed in input order so the
+    same chunks are kept for any worker count. seed() loads the chunks earlier runs
+    exported, so a rerun or an incremental run doesn't repeat those either; a document
+    is never a duplicate of the chunks it exported itself in an earlier run.
+    """
+
+    def __init__(self, config: Dict[str, Any], embedder=None):
+        dedup_config = config.get("chunking", {}).get("dedup", {})
+        self.method = dedup_config.get("method", "simhash")
+        if self.method not in ("simhash", "embedding"):
+            raise ValueError(f"Unknown chunk dedup method: {self.method!r} (expected 'simhash' or 'embedding')")
+        self._owns_embedder = self.method == "embedding" and embedder is None
+        if self._owns_embedder:
+            from improvers.embeddings import create_embedder
+            embedder = create_embedder(config)
+        self.embedder = embedder
+        self.hyperplanes = HyperplaneHasher()
+        self.min_words = dedup_config.get("min_words", 8)
+
+        # Content hash / index item -> doc_id that exported it in an earlier run (None: kept in this run)
+        self.seen_hashes: Dict[bytes, Optional[str]] = {}
+        self.index = HammingIndex(dedup_config.get("max_hamming", 4))
+        self.owners: List[str] = [] # index item id -> "doc_id#chunk_id" of the kept chunk
+        self.seeded_by: List[Optional[str]] = []
+        self.removed = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _shingle_simhash(self, words: List[str]) -> int:
+        shingles = Counter(hash_token(" ".join(words[i:i + 2])) for i in range(len(words) - 1))
+        return simhash(shingles)
+
+    def _fingerprints(self, texts: List[str]) -> List[Optional[int]]:
+        """SimHash per chunk; None for chunks too short for a meaningful fingerprint."""
+        words = [text.split() for text in texts]
+        eligible = [i for i, w in enumerate(words) if len(w) >= self.min_words]
+        fingerprints: List[Optional[int]] = [None] * len(texts)
+        if self.method == "embedding":
+            # One batched embedding call per document
+            vectors = self.embedder.embed([texts[i] for i in eligible]) if eligible else []
+            for i, fingerprint in zip(eligible, self.hyperplanes.fingerprints(vectors)):
+                fingerprints[i] = fingerprint
+        else:
+            for i in eligible:
+                fingerprints[i] = self._shingle_simhash(words[i])
+        return fingerprints
+
+    def dedup(self, doc: ProcessingDocument) -> int:
+        """Removes this document's duplicate chunks (keeping ids and offsets of the rest); returns how many."""
+        if not doc.chunks:
+            return 0
+        texts = [self._normalize(chunk.content) for chunk in doc.chunks]
+        fingerprints = self._fingerprints(texts)
+
+        kept: List[Chunk] = []
+        for chunk, text, fingerprint in zip(doc.chunks, texts, fingerprints):
+            if self._keep(text, fingerprint, doc.metadata.doc_id, chunk.chunk_id):
+                kept.append(chunk)
+
+        removed = len(doc.chunks) - len(kept)
+        doc.chunks = kept
+        self.removed += removed
+        return removed
+
+    def _keep(self, text: str, fingerprint: Optional[int], doc_id: str, chunk_id: Optional[int],
+              seeding: bool = False) -> bool:
+        """
+        Adds a normalized chunk to the index unless it duplicates one already there; returns True if added.
+        Outside seeding, chunks seeded from the same doc_id don't count: they are this document's own output.
+        """
+        owner = f"{doc_id}#{chunk_id}"
+        digest = hashlib.md5(text.encode("utf-8")).digest()
+        if digest in self.seen_hashes and (seeding or self.seen_hashes[digest] != doc_id):
+            logger.debug(f"Chunk {owner} is an exact duplicate")
+            return False
+        if fingerprint is not None:
+            skip = None if seeding else (lambda item_id: self.seeded_by[item_id] == doc_id)
+            match = self.index.query(fingerprint, skip)
+            if match is not None:
+                logger.debug(f"Chunk {owner} is a near duplicate of {self.owners[match]}")
+                return False
+            self.index.insert(fingerprint)
+            self.owners.append(owner)
+            self.seeded_by.append(doc_id if seeding else None)
+        self.seen_hashes[digest] = doc_id if seeding else None
+        return True
+
+    def seed(self, chunks: Iterable[Tuple[str, str, Optional[int]]], batch_size: int = 256) -> int:
+        """Indexes (content, doc_id, chunk_id) of chunks already exported; returns how many were added."""
+        added = 0
+        batch: List[Tuple[str, str, Optional[int]]] = []
+        for item in chunks:
+            batch.append(item)
+            if len(batch) == batch_size:
+                added += self._seed_batch(batch)
+                batch = []
+        if batch:
+            added += self._seed_batch(batch)
+        return added
+
+    def _seed_batch(self, batch: List[Tuple[str, str, Optional[int]]]) -> int:
+        texts = [self._normalize(content) for content, _, _ in batch]
+        fingerprints = self._fingerprints(texts)
+        return sum(self._keep(text, fingerprint, doc_id, chunk_id, seeding=True)
+                   for text, fingerprint, (_, doc_id, chunk_id) in zip(texts, fingerprints, batch))
+
+    def run(self, docs: List[ProcessingDocument]) -> int:
+        """Deduplicates the chunks of `docs` in order; returns the number of chunks removed."""
+        return sum(self.dedup(doc) for doc in docs)
+
+    def close(self) -> None:
+        if self._owns_embedder:
+            self.embedder.close()
@@ -1,15 +1,41 @@
 import hashlib
-from typing import Set, Dict
+from array import array
+from typing import Set, Dict, List, Optional
 from .base_filter import BaseFilter
+from .minhash_lsh import MinHasher, LSHIndex, choose_bands, hash_token, packed_hash_set
 from models import ProcessingDocument, FilterResult
 
 class DedupFilter(BaseFilter):
-    """Filters out exact duplicates and near-duplicates using Jaccard similarity."""
+    """
+    Filters out exact duplicates and near-duplicates using Jaccard similarity.
     
-    def __init__(self, jaccard_threshold: float = 0.85):
+    Near-duplicate candidates come from a MinHash/LSH band index, so each document is
+    compared against a handful of likely matches instead of every document seen so far.
+    By default the MinHash estimate decides and only the fixed-size signature (1 KB at
+    128 permutations) is kept per document, so memory does not grow with document length.
+    Documents with at most num_perm trigrams also keep their trigram hashes (no larger
+    than the signature), because the estimate is unreliable when most bins are empty.
+    verify=True confirms every candidate with exact trigram Jaccard instead, which avoids
+    estimate errors near the threshold at the cost of keeping 8 bytes per distinct
+    trigram of every document.
+    """
+    
+    def __init__(self, jaccard_threshold: float = 0.85, num_perm: int = 128,
+                 bands: Optional[int] = None, verify: bool = False):
         self.jaccard_threshold = jaccard_threshold
+        self.verify = verify
+        self.exact_max_shingles = num_perm # Small enough to compare exactly within the signature's footprint
         self.seen_hashes: Set[str] = set()
-        self.seen_trigrams: Dict[str, Set[str]] = {} # doc_id -> trigram set
+        
+        if bands is None:
+            # Every candidate is checked (exactly or against its signature), so favour recall
+            bands, _ = choose_bands(num_perm, jaccard_threshold, fp_weight=0.1)
+        self.minhasher = MinHasher(num_perm)
+        self.index = LSHIndex(num_perm, bands)
+        
+        self.seen_ids: List[str] = [] # index position -> doc_id
+        self.seen_shingles: Dict[int, array] = {} # index position -> packed trigram hashes (verify mode, small docs)
+        self.seen_signatures: Dict[int, array] = {} # index position -> MinHash signature (estimate mode)
         
     def _get_trigrams(self, text: str) -> Set[str]:
         words = text.lower().split()
@@ -17,6 +43,14 @@ class DedupFilter(BaseFilter):
             return set(words)
         return set([" ".join(words[i:i+3]) for i in range(len(words)-2)])
         
+    def _similarity(self, position: int, doc_hashes: Set[int], signature: array) -> float:
+        seen = self.seen_shingles.get(position)
+        if seen is not None and (self.verify or len(doc_hashes) <= self.exact_max_shingles):
+            intersection = len(doc_hashes.intersection(seen))
+            union = len(doc_hashes) + len(seen) - intersection
+            return intersection / union if union > 0 else 0.0
+        return MinHasher.estimate_jaccard(signature, self.seen_signatures[position])
+        
     def filter(self, doc: ProcessingDocument) -> FilterResult:
         text = doc.content.strip()
         
@@ -25,23 +59,27 @@ class DedupFilter(BaseFilter):
         if md5_hash in self.seen_hashes:
             return FilterResult(False, "Exact duplicate found (MD5)")
             
-        # Near-duplicate match (Jaccard Trigram)
-        doc_trigrams = self._get_trigrams(text)
-        
-        for seen_id, seen_trigrams in self.seen_trigrams.items():
-            if not doc_trigrams or not seen_trigrams:
-                continue
-                
-            intersection = len(doc_trigrams.intersection(seen_trigrams))
-            union = len(doc_trigrams.union(seen_trigrams))
-            
-            if union > 0:
-                jaccard_sim = intersection / union
+        # Near-duplicate match (Jaccard Trigram via MinHash/LSH candidates)
+        doc_hashes = {hash_token(t) for t in self._get_trigrams(text)}
+        signature = self.minhasher.signature(doc_hashes)
+        
+        if signature is not None:
+            # Candidates come back in insertion order, so the first match reported is
+            # the earliest qualifying document - same as the previous linear scan
+            for position in self.index.query(signature):
+                jaccard_sim = self._similarity(position, doc_hashes, signature)
                 if jaccard_sim >= self.jaccard_threshold:
-                    return FilterResult(False, f"Near duplicate found (Jaccard sim: {jaccard_sim:.2f} with doc {seen_id})")
+                    return FilterResult(False, f"Near duplicate found (Jaccard sim: {jaccard_sim:.2f} with doc {self.seen_ids[position]})")
                     
         # If passed, store for future comparisons
         self.seen_hashes.add(md5_hash)
-        self.seen_trigrams[doc.metadata.doc_id] = doc_trigrams
+        if signature is not None:
+            position = len(self.seen_ids)
+            self.seen_ids.append(doc.metadata.doc_id)
+            self.index.insert(position, signature)
+            if self.verify or len(doc_hashes) <= self.exact_max_shingles:
+                self.seen_shingles[position] = packed_hash_set(doc_hashes)
+            if not self.verify:
+                self.seen_signatures[position] = signature
         
         return FilterResult(True)
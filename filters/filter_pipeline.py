@@ -1,5 +1,6 @@
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 from models import ProcessingDocument, DocStatus
+from metrics import Metrics
 from .base_filter import BaseFilter
 import logging
 
@@ -8,14 +9,17 @@ logger = logging.getLogger(__name__)
 class FilterPipeline:
     """Runs a sequence of pre-filters on documents."""
     
-    def __init__(self, filters: List[BaseFilter]):
+    def __init__(self, filters: List[BaseFilter], metrics: Optional[Metrics] = None):
         self.filters = filters
+        self.metrics = metrics or Metrics()
         
     def run(self, doc: ProcessingDocument) -> ProcessingDocument:
         """Runs the document through all filters."""
         for filter_instance in self.filters:
-            result = filter_instance.filter(doc)
+            with self.metrics.time(f"filter.{filter_instance.__class__.__name__}"):
+                result = filter_instance.filter(doc)
             if not result.passed:
+                self.metrics.inc(f"filter_rejects.{filter_instance.__class__.__name__}")
                 doc.status = DocStatus.REJECT
                 doc.metadata.reject_reason = f"[{filter_instance.__class__.__name__}] {result.reason}"
                 logger.info(f"Document {doc.metadata.doc_id} rejected: {doc.metadata.reject_reason}")
@@ -30,7 +34,8 @@ class FilterPipeline:
         rejected = []
         
         for doc in docs:
-             processed_doc = self.run(doc)
+             with self.metrics.time("filter"):
+                 processed_doc = self.run(doc)
              if processed_doc.status == DocStatus.REJECT:
                  rejected.append(processed_doc)
              else:
@@ -0,0 +1,108 @@
+import hashlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_MAX_HASH = (1 << 64) - 1
+
+def hash_token(token: str) -> int:
+    """Stable 64-bit hash of a token (independent of PYTHONHASHSEED)."""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+def choose_bands(num_perm: int, threshold: float, fp_weight: float = 0.5) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) with bands * rows == num_perm minimising the weighted
+    false-positive / false-negative area of the LSH S-curve around `threshold`.
+    """
+    def candidate_prob(s: float, b: int, r: int) -> float:
+        return 1.0 - (1.0 - s ** r) ** b
+
+    def area(f, lo: float, hi: float, steps: int = 200) -> float:
+        width = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * width) for i in range(steps)) * width
+
+    best, best_err = (num_perm, 1), float("inf")
+    for r in range(1, num_perm + 1):
+        if num_perm % r:
+            continue
+        b = num_perm // r
+        fp = area(lambda s: candidate_prob(s, b, r), 0.0, threshold)
+        fn = area(lambda s: 1.0 - candidate_prob(s, b, r), threshold, 1.0)
+        err = fp_weight * fp + (1.0 - fp_weight) * fn
+        if err < best_err:
+            best, best_err = (b, r), err
+    return best
+
+class MinHasher:
+    """
+    One-permutation MinHash with rotation densification.
+
+    Each token is hashed once and routed to one of `num_perm` bins, so a
+    signature costs O(tokens + num_perm) instead of O(tokens * num_perm) and
+    takes a fixed 8 * num_perm bytes regardless of document length.
+    """
+
+    def __init__(self, num_perm: int = 128):
+        self.num_perm = num_perm
+        # Offset added per hop when an empty bin borrows from a neighbour, keeping
+        # borrowed values distinguishable from genuine minima in that bin.
+        self._offset = (_MAX_HASH // num_perm) // (num_perm + 1)
+
+    def signature(self, hashes: Iterable[int]) -> Optional[array]:
+        k = self.num_perm
+        bins = [_MAX_HASH] * k
+        for h in hashes:
+            idx = h % k
+            value = h // k
+            if value < bins[idx]:
+                bins[idx] = value
+
+        filled = [i for i in range(k) if bins[i] != _MAX_HASH]
+        if not filled:
+            return None
+        if len(filled) == k:
+            return array("Q", bins)
+
+        # Rotation densification: an empty bin takes the value of the next non-empty bin to its right
+        sig = list(bins)
+        for i in range(k):
+            if bins[i] != _MAX_HASH:
+                continue
+            hops = 1
+            while bins[(i + hops) % k] == _MAX_HASH:
+                hops += 1
+            sig[i] = bins[(i + hops) % k] + hops * self._offset
+        return array("Q", sig)
+
+    @staticmethod
+    def estimate_jaccard(sig_a: array, sig_b: array) -> float:
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+class LSHIndex:
+    """Banded locality-sensitive hash index over MinHash signatures."""
+
+    def __init__(self, num_perm: int, bands: int):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, sig: array) -> List[int]:
+        raw = sig.tobytes()
+        width = self.rows * sig.itemsize
+        return [hash(raw[i * width:(i + 1) * width]) for i in range(self.bands)]
+
+    def query(self, sig: array) -> List[int]:
+        """Returns candidate item ids sharing at least one band, in insertion order."""
+        found: Set[int] = set()
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            found.update(band.get(key, ()))
+        return sorted(found)
+
+    def insert(self, item_id: int, sig: array) -> None:
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            band.setdefault(key, []).append(item_id)
+
+def packed_hash_set(hashes: Set[int]) -> array:
+    """Stores a hashed shingle set compactly (8 bytes per shingle) for exact verification."""
+    return array("Q", sorted(hashes))
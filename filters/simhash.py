@@ -0,0 +1,112 @@
+import random
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np # Optional: projects a whole batch of embeddings at once
+except ImportError:
+    np = None
+
+FINGERPRINT_BITS = 64
+_LANE = 24 # Bits per counter lane when summing feature bits; room for 16M feature weight
+_LANE_MASK = (1 << _LANE) - 1
+# Per byte position: byte value -> its 8 bits spread one per lane, already shifted into place,
+# so a feature's 64 bits are added to all 64 counters with 8 lookups and one big-int add
+_SPREAD = [[sum(((b >> i) & 1) << ((8 * position + i) * _LANE) for i in range(8)) for b in range(256)]
+           for position in range(8)]
+
+def simhash(weights: Dict[int, int]) -> int:
+    """
+    64-bit SimHash of weighted 64-bit feature hashes: bit i is set when the features
+    with bit i set outweigh those without. Similar feature sets give fingerprints a
+    small Hamming distance apart.
+    """
+    t0, t1, t2, t3, t4, t5, t6, t7 = _SPREAD
+    counts = 0
+    total = 0
+    for h, weight in weights.items():
+        b = h.to_bytes(8, "little")
+        spread = t0[b[0]] | t1[b[1]] | t2[b[2]] | t3[b[3]] | t4[b[4]] | t5[b[5]] | t6[b[6]] | t7[b[7]]
+        counts += spread if weight == 1 else weight * spread
+        total += weight
+    fingerprint = 0
+    for i in range(FINGERPRINT_BITS):
+        if ((counts >> (i * _LANE)) & _LANE_MASK) * 2 > total:
+            fingerprint |= 1 << i
+    return fingerprint
+
+class HyperplaneHasher:
+    """
+    SimHash for dense embeddings: bit i is the side of random hyperplane i the vector
+    falls on, so the Hamming distance tracks the angle between two embeddings.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._planes: Dict[int, List[List[float]]] = {} # dimension -> hyperplanes
+
+    def _hyperplanes(self, dim: int) -> List[List[float]]:
+        if dim not in self._planes:
+            rng = random.Random(self.seed)
+            self._planes[dim] = [[rng.gauss(0.0, 1.0) for _ in range(dim)] for _ in range(FINGERPRINT_BITS)]
+        return self._planes[dim]
+
+    def fingerprints(self, vectors: Sequence[Sequence[float]]) -> List[int]:
+        if not vectors:
+            return []
+        planes = self._hyperplanes(len(vectors[0]))
+        if np is not None:
+            signs = (np.asarray(vectors, dtype=np.float64) @ np.asarray(planes).T) > 0
+            weights = np.left_shift(np.uint64(1), np.arange(FINGERPRINT_BITS, dtype=np.uint64))
+            return [int(v) for v in (signs.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)]
+        fingerprints = []
+        for vector in vectors:
+            fingerprint = 0
+            for i, plane in enumerate(planes):
+                if sum(a * b for a, b in zip(vector, plane)) > 0:
+                    fingerprint |= 1 << i
+            fingerprints.append(fingerprint)
+        return fingerprints
+
+class HammingIndex:
+    """
+    Approximate nearest-neighbour index over 64-bit fingerprints.
+
+    Fingerprints are split into max_distance + 1 blocks; two fingerprints at most
+    max_distance bits apart must agree exactly on at least one block (pigeonhole), so
+    only items sharing a block bucket are compared instead of every item stored.
+    """
+
+    def __init__(self, max_distance: int = 4):
+        blocks = max_distance + 1
+        if blocks > FINGERPRINT_BITS:
+            raise ValueError(f"max_distance must be below {FINGERPRINT_BITS}")
+        self.max_distance = max_distance
+        edges = [FINGERPRINT_BITS * i // blocks for i in range(blocks + 1)]
+        self._blocks = [(low, (1 << (high - low)) - 1) for low, high in zip(edges, edges[1:])]
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in self._blocks]
+        self.fingerprints = array("Q")
+
+    def query(self, fingerprint: int, skip: Optional[Callable[[int], bool]] = None) -> Optional[int]:
+        """Earliest inserted item within max_distance bits (ignoring items `skip` returns True for), or None."""
+        best = None
+        for bucket, (shift, mask) in zip(self._buckets, self._blocks):
+            for item_id in bucket.get((fingerprint >> shift) & mask, ()): # In insertion order
+                if best is not None and item_id >= best:
+                    break
+                if (self.fingerprints[item_id] ^ fingerprint).bit_count() <= self.max_distance \
+                        and not (skip and skip(item_id)):
+                    best = item_id
+                    break
+        return best
+
+    def insert(self, fingerprint: int) -> int:
+        """Stores a fingerprint; returns its item id (0, 1, 2, ...)."""
+        item_id = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        for bucket, (shift, mask) in zip(self._buckets, self._blocks):
+            bucket.setdefault((fingerprint >> shift) & mask, []).append(item_id)
+        return item_id
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
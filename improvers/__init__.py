@@ -1,5 +1,7 @@
 from .base_improver import BaseImprover
 from .text_cleaner import TextCleaner
+from .tokenizer import BaseTokenizer, ApproxTokenizer, RegexTokenizer, BPETokenizer, create_tokenizer
+from .embeddings import BaseEmbedder, HashingEmbedder, OllamaEmbedder, create_embedder
 from .chunker import Chunker
 from .metadata_enricher import MetadataEnricher
 from .improve_pipeline import ImprovePipeline
@@ -1,71 +1,182 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from .base_improver import BaseImprover
-from models import ProcessingDocument, DocumentMetadata
-import copy
+from .tokenizer import BaseTokenizer, create_tokenizer
+from .embeddings import BaseEmbedder, create_embedder, adjacent_similarities, similarity_breakpoints
+from models import ProcessingDocument, Chunk
+
+# Split on ., !, ? followed by whitespace and a capital letter
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+WORD = re.compile(r'\S+')
+
+# (start, end, tokens) of a span of the document text
+Piece = Tuple[int, int, int]
 
 class Chunker(BaseImprover):
-    """Splits a document into smaller, sentence-aware chunks."""
+    """
+    Splits a document into smaller, sentence-aware chunks sized in tokenizer tokens.
+    
+    Chunks are slices of the document's final content with their character offsets;
+    they share the parent's metadata object instead of copying it.
     
-    def __init__(self, config: Dict[str, Any]):
+    In "semantic" mode, sentences are embedded and chunks are also cut wherever the
+    similarity between neighbouring sentences drops sharply, so a chunk rarely spans two
+    topics; chunk_size still caps every chunk.
+    """
+    
+    def __init__(self, config: Dict[str, Any], tokenizer: Optional[BaseTokenizer] = None,
+                 embedder: Optional[BaseEmbedder] = None):
         chunk_config = config.get("chunking", {})
-        self.chunk_size_chars = chunk_config.get("chunk_size", 512) * 4 # Approx 4 chars per token
-        self.chunk_overlap_chars = chunk_config.get("chunk_overlap", 64) * 4
+        self.chunk_size = chunk_config.get("chunk_size", 512)
+        self.chunk_overlap = chunk_config.get("chunk_overlap", 64)
+        self.tokenizer = tokenizer or create_tokenizer(chunk_config)
+        
+        self.mode = chunk_config.get("mode", "fixed")
+        if self.mode not in ("fixed", "semantic"):
+            raise ValueError(f"Unknown chunking mode: {self.mode!r} (expected 'fixed' or 'semantic')")
+        semantic = chunk_config.get("semantic", {})
+        self.window = semantic.get("window", 2)
+        self.breakpoint_percentile = semantic.get("breakpoint_percentile", 90)
+        self.similarity_threshold = semantic.get("similarity_threshold")
+        self.min_chunk_tokens = semantic.get("min_chunk_tokens", 64)
+        self.embedder = embedder or (create_embedder(config) if self.mode == "semantic" else None)
+        
+    @staticmethod
+    def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+        """Simple regex-based sentence splitter; returns (start, end) with surrounding whitespace trimmed."""
+        spans = []
+        position = 0
+        for boundary in list(SENTENCE_BOUNDARY.finditer(text)) + [None]:
+            end = boundary.start() if boundary else len(text)
+            segment = text[position:end]
+            stripped = segment.strip()
+            if stripped:
+                left = position + len(segment) - len(segment.lstrip())
+                spans.append((left, left + len(stripped)))
+            if boundary:
+                position = boundary.end()
+        return spans
         
     def _split_into_sentences(self, text: str) -> List[str]:
-        """Simple regex-based sentence splitter."""
-        # Split on ., !, ? followed by whitespace or end of string
-        sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])|(?<=[.!?])\s*$', text)
-        return [s.strip() for s in sentences if s.strip()]
-
-    def improve(self, doc: ProcessingDocument) -> ProcessingDocument:
-        sentences = self._split_into_sentences(doc.content)
-        chunks = []
-        current_chunk = []
-        current_length = 0
+        return [text[start:end] for start, end in self._sentence_spans(text)]
         
-        for sentence in sentences:
-            sentence_len = len(sentence)
-            
-            # If a single sentence is larger than chunk size, we have to add it anyway
-            # (or we could split it further, but keeping logic simple for now)
-            if current_length + sentence_len > self.chunk_size_chars and current_chunk:
-                # Store current chunk
-                chunks.append(" ".join(current_chunk))
-                
-                # Start new chunk with overlap
-                # Walk backwards through current_chunk to fill overlap
-                overlap_chunk = []
-                overlap_length = 0
-                for s in reversed(current_chunk):
-                    if overlap_length + len(s) <= self.chunk_overlap_chars:
-                        overlap_chunk.insert(0, s)
-                        overlap_length += len(s) + 1 # +1 for space
-                    else:
-                        break
-                        
-                current_chunk = overlap_chunk
-                current_length = overlap_length
-                
-            current_chunk.append(sentence)
-            current_length += sentence_len + 1 # +1 for space
-            
-        # Add the last chunk
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-            
-        # Create ProcessingDocument sub-chunks
-        doc.chunks = []
-        for i, chunk_text in enumerate(chunks):
-            # Deep copy metadata so each chunk can have its own without affecting others
-            chunk_metadata = copy.deepcopy(doc.metadata)
-            chunk_metadata.chunk_id = i
+    def _cut_blob(self, text: str, start: int, end: int, tokens: int) -> List[Piece]:
+        """Cuts a single "word" over the limit (e.g. an inline blob) by characters; cuts still over are halved."""
+        step = max(1, (end - start) * self.chunk_size // tokens)
+        cuts = [(i, min(i + step, end)) for i in range(start, end, step)]
+        pieces: List[Piece] = []
+        for (a, b), count in zip(cuts, self.tokenizer.count_many([text[a:b] for a, b in cuts])):
+            if count > self.chunk_size and b - a > 1:
+                middle = (a + b) // 2
+                pieces.extend(self._cut_blob(text, a, middle, self.tokenizer.count(text[a:middle]) or 1))
+                pieces.extend(self._cut_blob(text, middle, b, self.tokenizer.count(text[middle:b]) or 1))
+            else:
+                pieces.append((a, b, count))
+        return pieces
+        
+    def _split_oversized(self, text: str, start: int, end: int) -> List[Piece]:
+        """Splits a sentence longer than chunk_size at word boundaries into pieces that fit."""
+        words = [(m.start(), m.end()) for m in WORD.finditer(text, start, end)]
+        # Like sentences, each word is counted with the whitespace before it, so merged runs of
+        # words never count less than their joined text (a 4-chars-per-token estimate counts spaces)
+        gaps = [start] + [e for _, e in words[:-1]]
+        counts = self.tokenizer.count_many([(text[gap:s] or " ") + text[s:e] for gap, (s, e) in zip(gaps, words)])
+        parts: List[Piece] = []
+        for gap, (s, e), tokens in zip(gaps, words, counts):
+            if tokens <= self.chunk_size:
+                parts.append((s, e, tokens))
+                continue
+            cuts = self._cut_blob(text, s, e, tokens)
+            a, b, _ = cuts[0] # The first cut carries the blob's leading whitespace, as whole words do
+            cuts[0] = (a, b, self.tokenizer.count((text[gap:s] or " ") + text[a:b]))
+            parts.extend(cuts)
             
-            chunk_doc = ProcessingDocument(
-                content=chunk_text,
-                metadata=chunk_metadata,
-                eval_details=doc.eval_details # Carry over evaluation details if any
-            )
-            doc.chunks.append(chunk_doc)
+        pieces: List[Piece] = []
+        for s, e, tokens in parts:
+            # Cuts of one blob stay separate: counted apart, adjacent cuts would undercount once joined
+            if pieces and pieces[-1][1] < s and pieces[-1][2] + tokens <= self.chunk_size:
+                pieces[-1] = (pieces[-1][0], e, pieces[-1][2] + tokens)
+            else:
+                pieces.append((s, e, tokens))
+        return pieces
+        
+    def _sized_pieces(self, text: str) -> List[Piece]:
+        """Sentences with their token counts, each counted once; oversized ones are split."""
+        spans = self._sentence_spans(text)
+        # Counted as they appear inside a chunk, together with the whitespace before them,
+        # since BPE tokenizes "\n\nWord" differently from "Word"
+        gaps = [0] + [end for _, end in spans[:-1]]
+        counts = self.tokenizer.count_many([(text[gap:s] or " ") + text[s:e] for gap, (s, e) in zip(gaps, spans)])
+        pieces: List[Piece] = []
+        for (start, end), tokens in zip(spans, counts):
+            if tokens > self.chunk_size:
+                pieces.extend(self._split_oversized(text, start, end))
+            else:
+                pieces.append((start, end, tokens))
+        return pieces
+        
+    def _pack(self, pieces: List[Piece], prefix: List[int], low: int, high: int) -> List[Tuple[int, int]]:
+        """
+        Greedy sentence packing of pieces[low:high] with overlap in one linear pass;
+        returns [first, end) piece ranges.
+        
+        Chunk = pieces[first:j]. When piece j does not fit, the next chunk starts at the
+        earliest piece whose suffix fits in chunk_overlap (and leaves room for piece j);
+        `first` only moves forward, so the whole pass is O(pieces).
+        """
+        ranges = []
+        first = low
+        for j in range(low, high):
+            tokens = pieces[j][2]
+            if j > first and prefix[j] - prefix[first] + tokens > self.chunk_size:
+                ranges.append((first, j))
+                first += 1
+                while first < j and (prefix[j] - prefix[first] > self.chunk_overlap
+                                     or prefix[j] - prefix[first] + tokens > self.chunk_size):
+                    first += 1
+        if high > low:
+            ranges.append((first, high))
+        return ranges
+        
+    def _semantic_ranges(self, text: str, pieces: List[Piece], prefix: List[int]) -> List[Tuple[int, int]]:
+        """Packs each run of pieces between similarity breakpoints, then merges undersized neighbours."""
+        vectors = self.embedder.embed([text[start:end] for start, end, _ in pieces])
+        similarities = adjacent_similarities(vectors, self.window)
+        cuts = similarity_breakpoints(similarities, self.breakpoint_percentile, self.similarity_threshold)
+        bounds = [0] + [i + 1 for i in cuts] + [len(pieces)]
+        
+        ranges: List[Tuple[int, int]] = []
+        for low, high in zip(bounds, bounds[1:]):
+            for first, end in self._pack(pieces, prefix, low, high):
+                # A fragment (a one-line heading, say) joins its neighbour while both still fit
+                if ranges and end > ranges[-1][1] and prefix[end] - prefix[ranges[-1][0]] <= self.chunk_size and (
+                        prefix[end] - prefix[first] < self.min_chunk_tokens
+                        or prefix[ranges[-1][1]] - prefix[ranges[-1][0]] < self.min_chunk_tokens):
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((first, end))
+        return ranges
+        
+    def _chunk_spans(self, text: str, pieces: List[Piece]) -> List[Tuple[int, int]]:
+        """(start, end) character spans of the chunks."""
+        prefix = [0]
+        for _, _, tokens in pieces:
+            prefix.append(prefix[-1] + tokens)
             
+        if self.mode == "semantic" and len(pieces) > 2:
+            ranges = self._semantic_ranges(text, pieces, prefix)
+        else:
+            ranges = self._pack(pieces, prefix, 0, len(pieces))
+        return [(pieces[first][0], pieces[end - 1][1]) for first, end in ranges]
+
+    def improve(self, doc: ProcessingDocument) -> ProcessingDocument:
+        text = doc.content
+        spans = self._chunk_spans(text, self._sized_pieces(text))
+        # Each chunk is a slice of the content plus offsets; metadata is shared, not copied
+        doc.chunks = [Chunk(content=text[start:end], metadata=doc.metadata, chunk_id=i, start_char=start, end_char=end)
+                      for i, (start, end) in enumerate(spans)]
         return doc
+        
+    def close(self) -> None:
+        if self.embedder is not None:
+            self.embedder.close()
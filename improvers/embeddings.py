@@ -0,0 +1,182 @@
+import http.client
+import json
+import math
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+import logging
+
+from llm.http_pool import HTTPConnectionPool
+
+try:
+    import numpy as np # Optional: vectorized similarity over the whole sentence matrix
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+FEATURE_PATTERN = re.compile(r"\w+")
+
+Vector = List[float]
+
+class BaseEmbedder(ABC):
+    """Embeds a batch of texts into dense vectors of one fixed dimension."""
+
+    name = "base"
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[Vector]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Model-free fallback: words hashed into `dim` signed buckets (so collisions cancel
+    out on average), log-scaled and L2-normalized. Captures lexical overlap only, which
+    is enough to spot the vocabulary shift at most topic boundaries.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _vector(self, text: str) -> Vector:
+        words = FEATURE_PATTERN.findall(text.lower())
+        counts: Dict[int, float] = {}
+        for word in words:
+            h = zlib.crc32(word.encode("utf-8"))
+            index = h % self.dim
+            counts[index] = counts.get(index, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        weights = {i: math.copysign(1.0 + math.log(abs(v)), v) for i, v in counts.items() if v}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vector = [0.0] * self.dim
+        for index, weight in weights.items():
+            vector[index] = weight / norm
+        return vector
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        return [self._vector(text) for text in texts]
+
+class OllamaEmbedder(BaseEmbedder):
+    """
+    Embeddings from a local Ollama embedding model (e.g. nomic-embed-text) via /api/embed,
+    `batch_size` texts per request. If the model is missing or Ollama is unreachable, the
+    rest of the run uses the hashing fallback instead of failing every document.
+    """
+
+    name = "ollama"
+
+    def __init__(self, model: str, base_url: str = "http://localhost:11434", batch_size: int = 64,
+                 timeout: float = 60, fallback: Optional[BaseEmbedder] = None):
+        self.model = model
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.pool = HTTPConnectionPool(base_url.rstrip("/"), timeout=timeout)
+        self.fallback = fallback or HashingEmbedder()
+        self.failed = False
+
+    def _embed_batch(self, texts: List[str]) -> List[Vector]:
+        data = json.dumps({"model": self.model, "input": texts}).encode("utf-8")
+        try:
+            status, body = self.pool.request("POST", "/api/embed", body=data,
+                                             headers={"Content-Type": "application/json"}, timeout=self.timeout)
+        except (http.client.HTTPException, OSError) as e:
+            raise Exception(f"Failed to connect to Ollama for embeddings: {e}")
+        if status >= 400:
+            raise Exception(f"Ollama embedding error: HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+        embeddings = json.loads(body.decode("utf-8")).get("embeddings") or []
+        if len(embeddings) != len(texts):
+            raise Exception(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs")
+        return embeddings
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        if not self.failed:
+            try:
+                vectors: List[Vector] = []
+                for i in range(0, len(texts), self.batch_size):
+                    vectors.extend(self._embed_batch(texts[i:i + self.batch_size]))
+                return vectors
+            except Exception as e:
+                logger.warning(f"Embedding model {self.model!r} unavailable, using the hashing vectorizer: {e}")
+                self.failed = True
+        # A document never mixes backends, so its vectors always share one dimension
+        return self.fallback.embed(texts)
+
+    def close(self) -> None:
+        self.pool.close()
+
+def create_embedder(config: Dict[str, Any]) -> BaseEmbedder:
+    """Builds the embedder for semantic chunking from chunking.semantic (and llm.base_url)."""
+    semantic = config.get("chunking", {}).get("semantic", {})
+    fallback = HashingEmbedder(semantic.get("hashing_dim", 512))
+    model = semantic.get("embedding_model")
+    if not model:
+        return fallback
+    base_url = semantic.get("base_url") or config.get("llm", {}).get("base_url", "http://localhost:11434")
+    return OllamaEmbedder(model, base_url, semantic.get("embedding_batch_size", 64),
+                          config.get("llm", {}).get("timeout", 60), fallback)
+
+def adjacent_similarities(vectors: List[Vector], window: int = 1) -> List[float]:
+    """
+    Cosine similarity at each boundary between consecutive sentences: the mean of the
+    `window` sentences before it against the mean of the `window` sentences after it.
+    Result i is the boundary between sentence i and i + 1.
+    """
+    n = len(vectors)
+    if n < 2:
+        return []
+    window = max(1, window)
+    if np is not None:
+        matrix = np.asarray(vectors, dtype=np.float64)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+        cumulative = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(matrix, axis=0)])
+        cut = np.arange(1, n)
+        left = cumulative[cut] - cumulative[np.maximum(0, cut - window)]
+        right = cumulative[np.minimum(n, cut + window)] - cumulative[cut]
+        denominator = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+        similarities = np.einsum("ij,ij->i", left, right) / np.where(denominator == 0, 1.0, denominator)
+        return similarities.tolist()
+
+    unit = []
+    for vector in vectors:
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        unit.append([v / norm for v in vector])
+    cumulative = [[0.0] * len(unit[0])]
+    for vector in unit:
+        cumulative.append([a + b for a, b in zip(cumulative[-1], vector)])
+    similarities = []
+    for cut in range(1, n):
+        low, high = cumulative[max(0, cut - window)], cumulative[min(n, cut + window)]
+        left = [a - b for a, b in zip(cumulative[cut], low)]
+        right = [a - b for a, b in zip(high, cumulative[cut])]
+        denominator = math.sqrt(sum(v * v for v in left)) * math.sqrt(sum(v * v for v in right))
+        similarities.append(sum(a * b for a, b in zip(left, right)) / denominator if denominator else 0.0)
+    return similarities
+
+def _percentile(values: List[float], q: float) -> float:
+    if np is not None:
+        return float(np.percentile(values, q))
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def similarity_breakpoints(similarities: List[float], percentile: float = 90,
+                           threshold: Optional[float] = None) -> List[int]:
+    """
+    Boundaries to cut at: those whose similarity drop (1 - similarity) is above the
+    given percentile of the document's drops, or below an absolute `threshold` if set.
+    """
+    if not similarities:
+        return []
+    if threshold is None:
+        if len(similarities) < 2:
+            return []
+        threshold = 1.0 - _percentile([1.0 - s for s in similarities], percentile)
+    return [i for i, s in enumerate(similarities) if s < threshold]
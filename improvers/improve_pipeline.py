@@ -1,10 +1,13 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from models import ProcessingDocument, DocStatus
 from llm.base_llm import BaseLLM
+from llm.async_base_llm import AsyncBaseLLM
 from evaluators.score_aggregator import ScoreAggregator
 from .text_cleaner import TextCleaner
 from .chunker import Chunker
 from .metadata_enricher import MetadataEnricher
+from checkpoint import CheckpointJournal, STAGE_IMPROVED, STAGE_ENRICHED
+from metrics import Metrics
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,8 +15,9 @@ logger = logging.getLogger(__name__)
 class ImprovePipeline:
     """Orchestrates the document improvement and chunking process."""
     
-    def __init__(self, llm: BaseLLM, config: Dict[str, Any], evaluator: ScoreAggregator):
+    def __init__(self, llm: BaseLLM, config: Dict[str, Any], evaluator: ScoreAggregator, metrics: Optional[Metrics] = None):
         self.config = config
+        self.metrics = metrics or Metrics()
         self.max_attempts = config.get("evaluation", {}).get("max_improve_attempts", 2)
         
         self.cleaner = TextCleaner()
@@ -22,63 +26,144 @@ class ImprovePipeline:
         self.evaluator = evaluator # Need this for the re-evaluate loop
         self.llm = llm # Need this for rewriting
         
-    def _rewrite(self, doc: ProcessingDocument) -> None:
-         """Uses LLM to rewrite document based on evaluation hints."""
+    def _rewrite_prompt(self, doc: ProcessingDocument) -> Tuple[str, str]:
+         """Returns (system_prompt, user_prompt) for rewriting the document based on evaluation hints."""
          hints = doc.eval_details.improvement_hints if doc.eval_details else []
          hint_str = "\n- ".join(hints) if hints else "Improve clarity and completeness."
          
+         # Point the rewrite at the criteria that failed, so the ones that passed are left alone
+         focus = ""
+         failing = self.evaluator.failing_criteria(doc) if doc.eval_details else []
+         if failing:
+             scores = ", ".join(f"{c} ({getattr(doc.eval_details, c):.2f})" for c in failing)
+             focus = f"Focus on the weak criteria: {scores}. Keep what already works unchanged."
+         
          system_prompt = f"""
          You are an expert editor refining text for a RAG system.
          Improve the given text based on this feedback from an evaluator:
          - {hint_str}
+         {focus}
          
          Maintain the original meaning and language. DO NOT add conversational filler like 'Here is the improved version'.
          Output ONLY the improved text.
          """
          
-         user_prompt = f"Original text:\n\n{doc.content}"
+         return self.llm.document_prompt(system_prompt, doc.content, "Original text")
+         
+    def _apply_rewrite(self, doc: ProcessingDocument, improved_text: str) -> None:
+         doc.content = improved_text.strip()
+         logger.info(f"Doc {doc.metadata.doc_id} successfully rewritten (Attempt {doc.metadata.improve_attempts})")
+         
+    def _rewrite(self, doc: ProcessingDocument) -> bool:
+         """Uses LLM to rewrite document based on evaluation hints; returns False if the rewrite failed."""
+         system_prompt, user_prompt = self._rewrite_prompt(doc)
+         # A failed rewrite still uses up an attempt, so an LLM outage cannot keep the loop going
+         doc.metadata.improve_attempts += 1
          
          try:
              improved_text = self.llm.generate(user_prompt, system_prompt, json_format=False)
-             doc.content = improved_text.strip()
-             doc.metadata.improve_attempts += 1
-             logger.info(f"Doc {doc.metadata.doc_id} successfully rewritten (Attempt {doc.metadata.improve_attempts})")
+             self._apply_rewrite(doc, improved_text)
+             return True
          except Exception as e:
              logger.error(f"Failed to rewrite doc {doc.metadata.doc_id}: {e}")
+             return False
              
-    def process_and_chunk(self, docs: List[ProcessingDocument]) -> List[ProcessingDocument]:
-        """Runs documents through the improve/eval loop, then enriches and chunks the passed ones."""
-        final_docs = []
+    async def _arewrite(self, doc: ProcessingDocument, llm: AsyncBaseLLM) -> bool:
+         """Async variant of _rewrite()."""
+         system_prompt, user_prompt = self._rewrite_prompt(doc)
+         doc.metadata.improve_attempts += 1
+         
+         try:
+             improved_text = await llm.generate(user_prompt, system_prompt, json_format=False)
+             self._apply_rewrite(doc, improved_text)
+             return True
+         except Exception as e:
+             logger.error(f"Failed to rewrite doc {doc.metadata.doc_id}: {e}")
+             return False
+             
+    def _should_improve(self, doc: ProcessingDocument) -> bool:
+        if doc.status == DocStatus.IMPROVE and doc.metadata.improve_attempts < self.max_attempts:
+            logger.info(f"Improving doc {doc.metadata.doc_id} (Attempt {doc.metadata.improve_attempts + 1}/{self.max_attempts})")
+            return True
+        return False
+        
+    def _reject_if_exhausted(self, doc: ProcessingDocument) -> None:
+        """Final check after the improvement loop."""
+        if doc.status == DocStatus.IMPROVE:
+             logger.warning(f"Doc {doc.metadata.doc_id} failed to pass after max attempts. Rejecting.")
+             doc.status = DocStatus.REJECT
+             doc.metadata.reject_reason = f"Failed to pass after {self.max_attempts} improvement attempts."
+             
+    @staticmethod
+    def _needs_enrichment(doc: ProcessingDocument, checkpoint: Optional[CheckpointJournal]) -> bool:
+        """False when a resumed run already enriched this document."""
+        return checkpoint is None or checkpoint.stage_of(doc.metadata.doc_id) != STAGE_ENRICHED
         
-        for doc in docs:
+
+    def process_one(self, doc: ProcessingDocument, checkpoint: Optional[CheckpointJournal] = None) -> ProcessingDocument:
+        """Runs a single evaluated document through the improve/eval loop, then enriches and chunks it if it passed."""
+        # Improvement Loop for documents marked 'IMPROVE'
+        while self._should_improve(doc):
+             # 1. Clean first
+             with self.metrics.time("improve.clean"):
+                 self.cleaner.improve(doc)
+             
+             # 2. Rewrite using LLM and feedback
+             with self.metrics.time("improve.rewrite"):
+                 rewritten = self._rewrite(doc)
+             if not rewritten:
+                 continue # Nothing new to score; the failed attempt still counts
+             
+             # 3. Re-evaluate (only the evaluators whose criteria failed, if targeted_improve)
+             self.evaluator.reevaluate(doc)
+             if checkpoint:
+                 checkpoint.record(doc, STAGE_IMPROVED)
+             
+        # Final check after loops
+        self._reject_if_exhausted(doc)
+             
+        # If doc passed (either initially or after improvements)
+        if doc.status == DocStatus.PASS:
+            # 4. Enrich metadata (keywords, summary) - unless a resumed run already did
+            if self._needs_enrichment(doc, checkpoint):
+                with self.metrics.time("improve.enrich"):
+                    self.enricher.improve(doc)
+                if checkpoint:
+                    checkpoint.record(doc, STAGE_ENRICHED)
             
-            # Improvement Loop for documents marked 'IMPROVE'
-            while doc.status == DocStatus.IMPROVE and doc.metadata.improve_attempts < self.max_attempts:
-                 logger.info(f"Improving doc {doc.metadata.doc_id} (Attempt {doc.metadata.improve_attempts + 1}/{self.max_attempts})")
-                 
-                 # 1. Clean first
+            # 5. Chunking
+            with self.metrics.time("improve.chunk"):
+                self.chunker.improve(doc)
+            
+        return doc
+        
+    async def aprocess_one(self, doc: ProcessingDocument, llm: AsyncBaseLLM,
+                           checkpoint: Optional[CheckpointJournal] = None) -> ProcessingDocument:
+        """Async variant of process_one(): same loop, with LLM calls awaited on the event loop."""
+        while self._should_improve(doc):
+             with self.metrics.time("improve.clean"):
                  self.cleaner.improve(doc)
+             with self.metrics.time("improve.rewrite"):
+                 rewritten = await self._arewrite(doc, llm)
+             if not rewritten:
+                 continue
+             await self.evaluator.areevaluate(doc, llm)
+             if checkpoint:
+                 checkpoint.record(doc, STAGE_IMPROVED)
                  
-                 # 2. Rewrite using LLM and feedback
-                 self._rewrite(doc)
-                 
-                 # 3. Re-evaluate
-                 self.evaluator.evaluate(doc)
-                 
-            # Final check after loops
-            if doc.status == DocStatus.IMPROVE:
-                 logger.warning(f"Doc {doc.metadata.doc_id} failed to pass after max attempts. Rejecting.")
-                 doc.status = DocStatus.REJECT
-                 doc.metadata.reject_reason = f"Failed to pass after {self.max_attempts} improvement attempts."
-                 
-            # If doc passed (either initially or after improvements)
-            if doc.status == DocStatus.PASS:
-                # 4. Enrich metadata (keywords, summary)
-                self.enricher.improve(doc)
-                
-                # 5. Chunking
+        self._reject_if_exhausted(doc)
+        
+        if doc.status == DocStatus.PASS:
+            if self._needs_enrichment(doc, checkpoint):
+                with self.metrics.time("improve.enrich"):
+                    await self.enricher.aimprove(doc, llm)
+                if checkpoint:
+                    checkpoint.record(doc, STAGE_ENRICHED)
+            with self.metrics.time("improve.chunk"):
                 self.chunker.improve(doc)
-                
-            final_docs.append(doc)
             
-        return final_docs
+        return doc
+        
+    def process_and_chunk(self, docs: List[ProcessingDocument]) -> List[ProcessingDocument]:
+        """Runs documents through the improve/eval loop, then enriches and chunks the passed ones."""
+        return [self.process_one(doc) for doc in docs]
@@ -1,8 +1,10 @@
 import json
+import sys
 from typing import Dict, Any, Tuple
 from .base_improver import BaseImprover
 from models import ProcessingDocument
 from llm.base_llm import BaseLLM
+from llm.async_base_llm import AsyncBaseLLM
 from evaluators.base_evaluator import BaseEvaluator
 import logging
 
@@ -29,7 +31,8 @@ class MetadataEnricher(BaseImprover):
              logger.error(f"Failed to parse metadata JSON from LLM: {e}\nResponse: {response}")
              return {}
         
-    def improve(self, doc: ProcessingDocument) -> ProcessingDocument:
+    def get_prompt(self, doc: ProcessingDocument) -> Tuple[str, str]:
+        """Returns (system_prompt, user_prompt) for metadata extraction."""
         system_prompt = """
         You are an expert AI document analyzer. Given a text, extract meaningful metadata for a RAG system.
         Analyze the text and provide the following:
@@ -47,19 +50,42 @@ class MetadataEnricher(BaseImprover):
         }
         """
         
-        user_prompt = f"Text to analyze:\n\n{doc.content}"
+        return self.llm.document_prompt(system_prompt, doc.content, "Text to analyze")
+        
+    def apply_response(self, doc: ProcessingDocument, response_text: str) -> None:
+        """Copies the extracted metadata from the LLM response onto the document."""
+        data = self._safe_parse_json(response_text)
+        
+        if data:
+            doc.metadata.keywords = data.get("keywords", [])
+            doc.metadata.summary = data.get("summary", "")
+            # Tags and language codes repeat across the corpus: intern them so documents share one copy
+            topic_tags = data.get("topic_tags", [])
+            if isinstance(topic_tags, list):
+                topic_tags = [sys.intern(t) if isinstance(t, str) else t for t in topic_tags]
+            doc.metadata.topic_tags = topic_tags
+            language = data.get("language", "en")
+            doc.metadata.language = sys.intern(language) if isinstance(language, str) else language
+            logger.debug(f"Metadata enriched for doc {doc.metadata.doc_id}")
+            
+    def improve(self, doc: ProcessingDocument) -> ProcessingDocument:
+        system_prompt, user_prompt = self.get_prompt(doc)
         
         try:
              response_text = self.llm.generate(user_prompt, system_prompt, json_format=True)
-             data = self._safe_parse_json(response_text)
+             self.apply_response(doc, response_text)
+        except Exception as e:
+             logger.error(f"Metadata enrichment failed for doc {doc.metadata.doc_id}: {e}")
              
-             if data:
-                 doc.metadata.keywords = data.get("keywords", [])
-                 doc.metadata.summary = data.get("summary", "")
-                 doc.metadata.topic_tags = data.get("topic_tags", [])
-                 doc.metadata.language = data.get("language", "en")
-                 logger.debug(f"Metadata enriched for doc {doc.metadata.doc_id}")
-                 
+        return doc
+        
+    async def aimprove(self, doc: ProcessingDocument, llm: AsyncBaseLLM) -> ProcessingDocument:
+        """Async variant of improve() for the asyncio pipeline driver."""
+        system_prompt, user_prompt = self.get_prompt(doc)
+        
+        try:
+             response_text = await llm.generate(user_prompt, system_prompt, json_format=True)
+             self.apply_response(doc, response_text)
         except Exception as e:
              logger.error(f"Metadata enrichment failed for doc {doc.metadata.doc_id}: {e}")
              
@@ -0,0 +1,178 @@
+import base64
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# GPT-2 style pre-tokenization (contractions, letters, 1-3 digit runs, punctuation, whitespace)
+# without the \p{..} classes the stdlib `re` lacks; BPE merges never cross these boundaries
+PRETOKENIZE_PATTERN = re.compile(r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+""")
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class BaseTokenizer(ABC):
+    """Counts tokens for chunk sizing; only counts are needed, never token ids."""
+
+    name = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        pass
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+class ApproxTokenizer(BaseTokenizer):
+    """The original estimate: about 4 characters per token."""
+
+    name = "approx"
+
+    def count(self, text: str) -> int:
+        return (len(text) + 3) // 4
+
+class RegexTokenizer(BaseTokenizer):
+    """
+    Dependency-free estimate meant to err on the high side, so chunks stay under the limit.
+
+    Each word or punctuation mark is one token; long ASCII words (identifiers, compounds)
+    count one more per 6 characters, digit runs one per 3 digits and non-ASCII words
+    one per 2 characters, since English-centric BPE vocabularies split those finely.
+    """
+
+    name = "regex"
+
+    def __init__(self, cache_size: int = 200000):
+        self.cache_size = cache_size
+        self._cache: Dict[str, int] = {}
+
+    @staticmethod
+    def _word_tokens(word: str) -> int:
+        if word.isdigit():
+            return (len(word) + 2) // 3
+        if word.isascii():
+            return 1 + len(word) // 6
+        return 1 + len(word) // 2
+
+    def count(self, text: str) -> int:
+        cache = self._cache
+        total = 0
+        for word in WORD_PATTERN.findall(text):
+            tokens = cache.get(word)
+            if tokens is None:
+                tokens = self._word_tokens(word)
+                if len(cache) >= self.cache_size:
+                    cache.clear()
+                cache[word] = tokens
+            total += tokens
+        return total
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """GPT-2's reversible byte -> printable character table used in tokenizer.json / merges.txt."""
+    printable = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    chars = printable[:]
+    extra = 0
+    for b in range(256):
+        if b not in printable:
+            printable.append(b)
+            chars.append(256 + extra)
+            extra += 1
+    return dict(zip(printable, map(chr, chars)))
+
+def load_bpe_ranks(path: str) -> Dict[bytes, int]:
+    """
+    Loads byte-level BPE merge ranks from a local vocabulary file:
+    a tiktoken rank file (`<base64 token> <rank>` per line), a Hugging Face
+    tokenizer.json with a BPE model, or a GPT-2 style merges.txt.
+    """
+    if path.endswith(".json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            model = json.load(f).get("model", {})
+        if model.get("type") != "BPE":
+            raise ValueError(f"{path} does not contain a BPE model")
+        merges = [m.split(" ", 1) if isinstance(m, str) else m for m in model.get("merges", [])]
+        return _ranks_from_merges(merges)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    first = lines[0].split() if lines else []
+    if len(first) == 2 and first[1].isdigit():
+        ranks = {}
+        for line in lines:
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+        return ranks
+    return _ranks_from_merges([line.split(" ", 1) for line in lines if not line.startswith("#version")])
+
+def _ranks_from_merges(merges: List[List[str]]) -> Dict[bytes, int]:
+    decoder = {c: b for b, c in _bytes_to_unicode().items()}
+    decode = lambda token: bytes(decoder[c] for c in token)
+    ranks = {bytes([b]): b for b in range(256)}
+    for i, (left, right) in enumerate(merges):
+        ranks.setdefault(decode(left) + decode(right), 256 + i)
+    return ranks
+
+class BPETokenizer(BaseTokenizer):
+    """
+    Pure-Python byte-level BPE token counter driven by a local merge-rank table.
+
+    Text is pre-split into words, and each distinct word is merged once and cached,
+    so the quadratic merge loop only runs on vocabulary not seen before.
+    """
+
+    name = "bpe"
+
+    def __init__(self, ranks: Dict[bytes, int], cache_size: int = 200000):
+        self.ranks = ranks
+        self.cache_size = cache_size
+        self._cache: Dict[str, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "BPETokenizer":
+        return cls(load_bpe_ranks(path))
+
+    def _merge_count(self, piece: bytes) -> int:
+        ranks = self.ranks
+        if piece in ranks:
+            return 1
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best, best_rank = -1, None
+            for i in range(len(parts) - 1):
+                rank = ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best, best_rank = i, rank
+            if best < 0:
+                break
+            parts[best:best + 2] = [parts[best] + parts[best + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        cache = self._cache
+        total = 0
+        for word in PRETOKENIZE_PATTERN.findall(text):
+            tokens = cache.get(word)
+            if tokens is None:
+                tokens = self._merge_count(word.encode("utf-8"))
+                if len(cache) >= self.cache_size:
+                    cache.clear()
+                cache[word] = tokens
+            total += tokens
+        return total
+
+def create_tokenizer(chunk_config: Dict[str, Any]) -> BaseTokenizer:
+    """Builds the tokenizer named by chunking.tokenizer ("bpe", "regex" or "approx")."""
+    name = chunk_config.get("tokenizer", "regex")
+    if name == "bpe":
+        vocab_path: Optional[str] = chunk_config.get("vocab_path")
+        if vocab_path and os.path.exists(vocab_path):
+            return BPETokenizer.from_file(vocab_path)
+        logger.warning(f"BPE vocab file {vocab_path!r} not found; falling back to the regex tokenizer")
+        return RegexTokenizer()
+    if name == "regex":
+        return RegexTokenizer()
+    if name == "approx":
+        return ApproxTokenizer()
+    raise ValueError(f"Unknown tokenizer: {name!r} (expected 'bpe', 'regex' or 'approx')")
@@ -1,9 +1,46 @@
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Optional, List
 from .base_llm import BaseLLM
 from .ollama_llm import OllamaLLM
+from .http_pool import HTTPConnectionPool
+from .response_cache import ResponseCache, CachedLLM, AsyncCachedLLM
+from .async_base_llm import AsyncBaseLLM
+from .async_ollama_llm import AsyncOllamaLLM
+from .concurrency import AdaptiveConcurrencyLimiter, AsyncAdaptiveConcurrencyLimiter, limiter_from_config
+from .load_balancer import EndpointSet, LoadBalancedLLM, AsyncLoadBalancedLLM
 
-def create_llm(config: Dict[str, Any]) -> BaseLLM:
+def _endpoint_urls(llm_config: Dict[str, Any]) -> List[str]:
+    """Ollama hosts to use: `base_urls` if given, else the single `base_url`."""
+    return list(llm_config.get("base_urls") or [llm_config.get("base_url", "http://localhost:11434")])
+
+def create_llm(config: Dict[str, Any], output_dir: Optional[str] = None) -> BaseLLM:
     """Factory function to instantiate the configured LLM."""
     llm_config = config.get("llm", {})
     # Currently only supporting Ollama, but easy to extend
-    return OllamaLLM(llm_config)
+    backends = []
+    for url in _endpoint_urls(llm_config):
+        backend = OllamaLLM(dict(llm_config, base_url=url))
+        backend.limiter = limiter_from_config(llm_config)
+        backends.append(backend)
+    llm = backends[0] if len(backends) == 1 else LoadBalancedLLM(llm_config, backends)
+    
+    cache_config = config.get("cache", {})
+    if cache_config.get("enabled", False):
+        cache_path = cache_config.get("path") or os.path.join(output_dir or ".", "llm_cache.sqlite")
+        cache = ResponseCache(cache_path, max_size_mb=cache_config.get("max_size_mb", 512))
+        llm = CachedLLM(llm, cache)
+        
+    return llm
+
+def create_async_llm(config: Dict[str, Any], cache: Optional[ResponseCache] = None) -> AsyncBaseLLM:
+    """Factory for the asyncio backend; pass the sync backend's ResponseCache to share it."""
+    llm_config = config.get("llm", {})
+    backends = []
+    for url in _endpoint_urls(llm_config):
+        backend = AsyncOllamaLLM(dict(llm_config, base_url=url))
+        backend.limiter = limiter_from_config(llm_config, async_mode=True)
+        backends.append(backend)
+    llm = backends[0] if len(backends) == 1 else AsyncLoadBalancedLLM(llm_config, backends)
+    if cache is not None:
+        llm = AsyncCachedLLM(llm, cache)
+    return llm
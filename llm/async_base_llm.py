@@ -0,0 +1,72 @@
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Sequence, Tuple
+import asyncio
+import random
+import logging
+
+from .prompting import document_prompt
+
+logger = logging.getLogger(__name__)
+
+class AsyncBaseLLM(ABC):
+    """Asyncio counterpart of BaseLLM: many requests share one event loop instead of one thread each."""
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.model = config.get("model", "llama3.2")
+        self.max_retries = config.get("max_retries", 3)
+        self.timeout = config.get("timeout", 60)
+        self.temperature = config.get("temperature", 0.3)
+        self.prefix_prompts = config.get("prefix_prompts", False)
+        self.limiter = None # Optional AsyncAdaptiveConcurrencyLimiter, attached by create_async_llm
+        
+    @abstractmethod
+    async def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                        required_keys: Optional[Sequence[str]] = None) -> str:
+        """Internal method to be implemented by subclasses."""
+        pass
+        
+    async def generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                       required_keys: Optional[Sequence[str]] = None) -> str:
+        """
+        Generates text using the LLM with built-in retry logic.
+        
+        Each attempt is bounded by `timeout`; backoff uses asyncio.sleep so waiting
+        requests never block others. Cancelling the calling task cancels the request.
+        
+        Raises:
+            Exception: If all retry attempts fail.
+        """
+        last_exception = None
+        
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if attempt > 1:
+                    delay = 2 ** (attempt - 1) # Exponential backoff: 2s, 4s, ...
+                    await asyncio.sleep(random.uniform(0, delay) if self.limiter else delay)
+                    
+                async with self.limiter.slot() if self.limiter else nullcontext():
+                    return await asyncio.wait_for(self._generate(prompt, system_prompt, json_format, required_keys), timeout=self.timeout)
+                
+            except asyncio.TimeoutError:
+                last_exception = Exception(f"LLM request timed out after {self.timeout}s")
+                logger.warning(f"LLM generation timed out (Attempt {attempt}/{self.max_retries})")
+            except Exception as e:
+                last_exception = e
+                logger.warning(f"LLM generation failed (Attempt {attempt}/{self.max_retries}): {e}")
+                
+        logger.error(f"LLM generation failed after {self.max_retries} attempts.")
+        raise last_exception or Exception("Unknown LLM error")
+        
+    def document_prompt(self, instructions: str, document: str, heading: str = "Text") -> Tuple[str, str]:
+        """Returns (system_prompt, user_prompt) for a task on a document, laid out per `prefix_prompts`."""
+        return document_prompt(instructions, document, heading, prefix_first=self.prefix_prompts)
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns backend-specific runtime counters (limiter state if one is attached)."""
+        return {"concurrency": self.limiter.get_stats()} if self.limiter else {}
+        
+    def close(self) -> None:
+        """Releases any resources held by the backend (no-op by default)."""
+        pass
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Tuple, List, AsyncIterator
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+class _BodyReader:
+    """Reads one response body (chunked, content-length or until close) piece by piece."""
+
+    def __init__(self, reader: asyncio.StreamReader, headers: Dict[str, str]):
+        self.reader = reader
+        self.chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        self.remaining = int(headers["content-length"]) if "content-length" in headers and not self.chunked else None
+        self.complete = False
+
+    async def read_chunk(self) -> bytes:
+        """Returns the next piece of the body, or b"" once it has been fully read."""
+        if self.complete:
+            return b""
+        if self.chunked:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                self.complete = True
+                return b""
+            data = await self.reader.readexactly(size)
+            await self.reader.readline()
+            return data
+        if self.remaining is not None:
+            if self.remaining == 0:
+                self.complete = True
+                return b""
+            data = await self.reader.read(min(self.remaining, 65536))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", self.remaining)
+            self.remaining -= len(data)
+            return data
+        data = await self.reader.read(65536)
+        self.complete = not data
+        return data
+
+    async def read(self) -> bytes:
+        parts = []
+        while True:
+            data = await self.read_chunk()
+            if not data:
+                return b"".join(parts)
+            parts.append(data)
+
+    async def lines(self) -> AsyncIterator[bytes]:
+        """Yields the body line by line as it arrives (e.g. an NDJSON stream)."""
+        buffer = b""
+        while True:
+            data = await self.read_chunk()
+            if not data:
+                break
+            buffer += data
+            *complete_lines, buffer = buffer.split(b"\n")
+            for line in complete_lines:
+                yield line
+        if buffer:
+            yield buffer
+
+class AsyncHTTPConnectionPool:
+    """
+    Minimal asyncio HTTP/1.1 client with keep-alive connection reuse for a single host.
+
+    At most `max_size` requests are on the wire at once; further requests wait on a
+    semaphore without holding an OS thread.
+    """
+
+    def __init__(self, base_url: str, max_size: int = 8, timeout: float = 60):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "connections_discarded": 0,
+            "errors": 0,
+        }
+
+    def _ensure_loop(self) -> None:
+        """Connections and semaphores belong to one event loop; start fresh if it changed."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.max_size)
+            self._loop = loop
+
+    async def _open(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=(self.scheme == "https") or None)
+        self._stats["connections_created"] += 1
+        return _Connection(reader, writer)
+
+    def _discard(self, conn: _Connection) -> None:
+        self._stats["connections_discarded"] += 1
+        conn.close()
+
+    async def _read_head(self, conn: _Connection) -> Tuple[int, Dict[str, str]]:
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() != "chunked" and "content-length" not in headers:
+            headers["connection"] = "close" # Body runs until the server closes the socket
+        return status, headers
+
+    async def _roundtrip(self, conn: _Connection, request: bytes) -> Tuple[int, Dict[str, str]]:
+        conn.writer.write(request)
+        await conn.writer.drain()
+        return await self._read_head(conn)
+
+    def _build_request(self, method: str, path: str, body: Optional[bytes], headers: Optional[Dict[str, str]]) -> bytes:
+        body = body or b""
+        lines = [f"{method} {self.base_path}{path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 "Connection: keep-alive", f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _start(self, request: bytes) -> Tuple[_Connection, bool, int, Dict[str, str]]:
+        """Sends a request and reads the response head; caller must hold a slot."""
+        reused = bool(self._idle)
+        conn = self._idle.pop() if reused else await self._open()
+        try:
+            try:
+                status, resp_headers = await self._roundtrip(conn, request)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive socket; retry once on a fresh one
+                logger.debug(f"Stale pooled connection to {self.host}, retrying on a new one: {e}")
+                self._discard(conn)
+                conn, reused = await self._open(), False
+                status, resp_headers = await self._roundtrip(conn, request)
+        except BaseException:
+            self._discard(conn)
+            self._stats["errors"] += 1
+            raise
+        return conn, reused, status, resp_headers
+
+    def _release(self, conn: _Connection, reused: bool, resp_headers: Dict[str, str], complete: bool) -> None:
+        if reused:
+            self._stats["connections_reused"] += 1
+        # A partly read body would corrupt the next response on this socket
+        if not complete or resp_headers.get("connection", "").lower() == "close":
+            self._discard(conn)
+        else:
+            self._idle.append(conn)
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        """
+        Sends a request over a pooled connection and returns (status, body).
+
+        Timeouts and cancellation are left to the caller (e.g. asyncio.wait_for); a
+        connection interrupted mid-request is closed rather than returned to the pool.
+        """
+        self._ensure_loop()
+        request = self._build_request(method, path, body, headers)
+
+        self._stats["requests"] += 1
+        async with self._slots:
+            conn, reused, status, resp_headers = await self._start(request)
+            try:
+                data = await _BodyReader(conn.reader, resp_headers).read()
+            except BaseException:
+                # Includes cancellation: the socket may hold a half-read response
+                self._discard(conn)
+                self._stats["errors"] += 1
+                raise
+            self._release(conn, reused, resp_headers, complete=True)
+            return status, data
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, body: Optional[bytes] = None,
+                     headers: Optional[Dict[str, str]] = None) -> AsyncIterator[Tuple[int, _BodyReader]]:
+        """
+        Sends a request and yields (status, body reader) for incremental reading.
+
+        Leaving the block before the body is fully read closes the connection, which
+        also tells a streaming server to stop generating.
+        """
+        self._ensure_loop()
+        request = self._build_request(method, path, body, headers)
+
+        self._stats["requests"] += 1
+        async with self._slots:
+            conn, reused, status, resp_headers = await self._start(request)
+            reader = _BodyReader(conn.reader, resp_headers)
+            try:
+                yield status, reader
+            except BaseException:
+                self._discard(conn)
+                self._stats["errors"] += 1
+                raise
+            self._release(conn, reused, resp_headers, reader.complete)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["idle_connections"] = len(self._idle)
+        return stats
+
+    def close(self) -> None:
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
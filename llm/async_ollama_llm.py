@@ -0,0 +1,131 @@
+import json
+import time
+import logging
+from typing import Dict, Any, Optional, Sequence
+
+from .async_base_llm import AsyncBaseLLM
+from .async_http import AsyncHTTPConnectionPool
+from .streaming import JSONObjectScanner, StreamStats, ServerTimings
+
+logger = logging.getLogger(__name__)
+
+class AsyncOllamaLLM(AsyncBaseLLM):
+    """Asyncio client for a local Ollama instance, using pooled keep-alive connections."""
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.base_url = config.get("base_url", "http://localhost:11434").rstrip("/")
+        self.endpoint = f"{self.base_url}/api/generate"
+        self.pool = AsyncHTTPConnectionPool(self.base_url, max_size=config.get("pool_size", 8), timeout=self.timeout)
+        self.stream = config.get("stream", False)
+        self.stream_stats = StreamStats()
+        self.stream_tail_tokens = config.get("stream_tail_tokens", 64)
+        self.keep_alive = config.get("keep_alive")
+        self.timings = ServerTimings()
+        
+    async def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                        required_keys: Optional[Sequence[str]] = None) -> str:
+        """Sends a POST request to the Ollama API."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": self.stream,
+            "options": {
+                "temperature": self.temperature
+            }
+        }
+        
+        if system_prompt:
+            payload["system"] = system_prompt
+            
+        if json_format:
+            payload["format"] = "json"
+            
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive # Keep the model (and its prompt cache) loaded between calls
+            
+        data = json.dumps(payload).encode("utf-8")
+        
+        if self.stream:
+            return await self._generate_stream(data, json_format, required_keys)
+            
+        try:
+            status, body = await self.pool.request("POST", "/api/generate", body=data, headers={"Content-Type": "application/json"})
+        except OSError as e:
+             raise Exception(f"Failed to connect to Ollama at {self.endpoint}. Is it running?: {e}")
+             
+        if status >= 400:
+             raise Exception(f"Ollama generation error: HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+             
+        try:
+            result = json.loads(body.decode("utf-8"))
+            self.timings.record(result)
+            return result.get("response", "")
+        except Exception as e:
+             raise Exception(f"Ollama generation error: {e}")
+             
+    async def _generate_stream(self, data: bytes, json_format: bool, required_keys: Optional[Sequence[str]]) -> str:
+        """Async counterpart of OllamaLLM._generate_stream."""
+        scanner = JSONObjectScanner(required_keys) if json_format else None
+        parts = []
+        start = time.monotonic()
+        ttft = None
+        answered = False
+        tail_tokens = 0
+        early_stop = False
+        
+        try:
+            async with self.pool.stream("POST", "/api/generate", body=data, headers={"Content-Type": "application/json"}) as (status, body):
+                if status >= 400:
+                    raise Exception(f"Ollama generation error: HTTP {status}: {(await body.read())[:200].decode('utf-8', 'replace')}")
+                    
+                async for line in body.lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise Exception(f"Ollama generation error: bad stream line: {e}")
+                    if event.get("error"):
+                        raise Exception(f"Ollama generation error: {event['error']}")
+                        
+                    token = event.get("response", "")
+                    if token and ttft is None:
+                        ttft = time.monotonic() - start
+                    if event.get("done"):
+                        parts.append(token)
+                        self.timings.record(event)
+                        await body.read() # Drain the chunked terminator so the connection is reusable
+                        break
+                    if answered:
+                        # Keep reading to "done" for the token counts and timings; only runaway output is cut off
+                        tail_tokens += 1
+                        if tail_tokens > self.stream_tail_tokens:
+                            early_stop = True
+                            break
+                        continue
+                    parts.append(token)
+                    if scanner is not None and scanner.feed(token):
+                        answered = True
+        except OSError as e:
+             raise Exception(f"Failed to connect to Ollama at {self.endpoint}. Is it running?: {e}")
+             
+        total = time.monotonic() - start
+        self.stream_stats.record(ttft, total, early_stop)
+        if early_stop:
+            self.timings.record_incomplete()
+        logger.debug(f"Ollama stream: ttft={ttft if ttft is not None else float('nan'):.3f}s total={total:.3f}s early_stop={early_stop}")
+        if answered:
+            return scanner.text
+        return "".join(parts)
+             
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats["http"] = self.pool.get_stats()
+        stats["prompt_eval"] = self.timings.get_stats()
+        if self.stream:
+            stats["stream"] = self.stream_stats.get_stats()
+        return stats
+        
+    def close(self) -> None:
+        self.pool.close()
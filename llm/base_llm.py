@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Sequence, Tuple
+import random
 import time
 import logging
 
+from .prompting import document_prompt
+
 logger = logging.getLogger(__name__)
 
 class BaseLLM(ABC):
@@ -13,13 +17,18 @@ class BaseLLM(ABC):
         self.model = config.get("model", "llama3.2")
         self.max_retries = config.get("max_retries", 3)
         self.timeout = config.get("timeout", 60)
+        self.temperature = config.get("temperature", 0.3)
+        self.prefix_prompts = config.get("prefix_prompts", False)
+        self.limiter = None # Optional AdaptiveConcurrencyLimiter, attached by create_llm
         
     @abstractmethod
-    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False) -> str:
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                  required_keys: Optional[Sequence[str]] = None) -> str:
         """Internal method to be implemented by subclasses."""
         pass
         
-    def generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False) -> str:
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                 required_keys: Optional[Sequence[str]] = None) -> str:
         """
         Generates text using the LLM with built-in retry logic.
         
@@ -27,6 +36,8 @@ class BaseLLM(ABC):
             prompt: The main user prompt.
             system_prompt: Optional system instructions.
             json_format: If true, requests the LLM to output valid JSON.
+            required_keys: Keys the JSON answer must contain; a streaming backend may
+                stop generating once an object with all of them is complete.
             
         Returns:
             The generated text string.
@@ -40,9 +51,10 @@ class BaseLLM(ABC):
             try:
                 # Add a small delay between retries
                 if attempt > 1:
-                    time.sleep(2 ** (attempt - 1)) # Exponential backoff: 2s, 4s, ...
+                    time.sleep(self._backoff(attempt))
                     
-                response = self._generate(prompt, system_prompt, json_format)
+                with self.limiter.slot() if self.limiter else nullcontext():
+                    response = self._generate(prompt, system_prompt, json_format, required_keys)
                 return response
                 
             except Exception as e:
@@ -51,3 +63,25 @@ class BaseLLM(ABC):
                 
         logger.error(f"LLM generation failed after {self.max_retries} attempts.")
         raise last_exception or Exception("Unknown LLM error")
+        
+    def _backoff(self, attempt: int) -> float:
+        """
+        Delay before retry `attempt`: exponential backoff (2s, 4s, ...).
+        
+        With a limiter the overload response is the limit cut itself, so the delay is
+        jittered to keep the failed requests from coming back in lockstep.
+        """
+        delay = 2 ** (attempt - 1)
+        return random.uniform(0, delay) if self.limiter else delay
+        
+    def document_prompt(self, instructions: str, document: str, heading: str = "Text") -> Tuple[str, str]:
+        """Returns (system_prompt, user_prompt) for a task on a document, laid out per `prefix_prompts`."""
+        return document_prompt(instructions, document, heading, prefix_first=self.prefix_prompts)
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns backend-specific runtime counters (limiter state if one is attached)."""
+        return {"concurrency": self.limiter.get_stats()} if self.limiter else {}
+        
+    def close(self) -> None:
+        """Releases any resources held by the backend (no-op by default)."""
+        pass
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter for in-flight LLM requests.
+
+    The limit grows by roughly one request per round trip while latency stays within
+    `latency_tolerance` x the best latency seen in the last `window` seconds, shrinks
+    gently when latency inflates (the server is queueing) and is cut by `backoff_ratio`
+    on errors and timeouts. At most one decrease is applied per observed round trip.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 latency_tolerance: float = 1.5, backoff_ratio: float = 0.5, window: float = 10.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self.in_flight = 0
+        self.waiting = 0
+        self._min_latencies: deque = deque() # (timestamp, latency), increasing latencies: sliding-window minimum
+        self._last_latency = 0.0
+        self._last_decrease = 0.0
+        self._completions: deque = deque() # (timestamp, ok) within the throughput window
+        self.total_ok = 0
+        self.total_errors = 0
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _baseline(self) -> Optional[float]:
+        return self._min_latencies[0][1] if self._min_latencies else None
+
+    def _decrease(self, factor: float, now: float) -> None:
+        if now - self._last_decrease < max(self._last_latency, 0.001):
+            return # Already reacted to this round trip
+        old = self.limit
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self._last_decrease = now
+        if int(old) != int(self.limit):
+            logger.debug(f"Concurrency limit decreased {old:.1f} -> {self.limit:.1f}")
+
+    def _on_complete(self, latency: float, ok: bool) -> None:
+        """Updates the limit from one finished request. Caller holds the lock."""
+        now = time.monotonic()
+        self.in_flight -= 1
+        self._last_latency = latency
+        self._completions.append((now, ok))
+        while self._completions and now - self._completions[0][0] > self.window:
+            self._completions.popleft()
+
+        if not ok:
+            self.total_errors += 1
+            self._decrease(self.backoff_ratio, now)
+            return
+
+        self.total_ok += 1
+        while self._min_latencies and self._min_latencies[-1][1] >= latency:
+            self._min_latencies.pop()
+        self._min_latencies.append((now, latency))
+        while now - self._min_latencies[0][0] > self.window:
+            self._min_latencies.popleft()
+
+        if latency > self._baseline() * self.latency_tolerance:
+            self._decrease(0.9, now)
+        elif self.in_flight + 1 >= self.limit / 2:
+            # Only grow while the current limit is actually being used
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    @contextmanager
+    def slot(self):
+        """Blocks until a request slot is free, then measures the request it guards."""
+        with self._cond:
+            self.waiting += 1
+            while not self._has_capacity():
+                self._cond.wait()
+            self.waiting -= 1
+            self.in_flight += 1
+
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._cond:
+                self._on_complete(time.monotonic() - start, ok)
+                self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            recent = [c for c in self._completions if now - c[0] <= self.window]
+            span = min(self.window, now - recent[0][0]) if recent else 0.0
+            errors = sum(1 for _, ok in recent if not ok)
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "throughput_rps": len(recent) / span if span > 0 else 0.0,
+                "error_rate": errors / len(recent) if recent else 0.0,
+                "baseline_latency_s": self._baseline(),
+                "last_latency_s": self._last_latency,
+                "total_ok": self.total_ok,
+                "total_errors": self.total_errors,
+            }
+
+class AsyncAdaptiveConcurrencyLimiter(AdaptiveConcurrencyLimiter):
+    """Same AIMD policy for coroutines: waiting requests suspend instead of blocking a thread."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._async_cond: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._async_cond is None or self._loop is not loop:
+            self._async_cond = asyncio.Condition()
+            self._loop = loop
+        return self._async_cond
+
+    @asynccontextmanager
+    async def slot(self):
+        cond = self._get_condition()
+        async with cond:
+            self.waiting += 1
+            try:
+                await cond.wait_for(self._has_capacity)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._lock:
+                self._on_complete(time.monotonic() - start, ok)
+            async with cond:
+                cond.notify_all()
+
+def limiter_from_config(config: Dict[str, Any], async_mode: bool = False) -> Optional[AdaptiveConcurrencyLimiter]:
+    """Builds a limiter from llm.adaptive_concurrency, or None if it is disabled."""
+    settings = config.get("adaptive_concurrency", {})
+    if not settings.get("enabled", False):
+        return None
+    cls = AsyncAdaptiveConcurrencyLimiter if async_mode else AdaptiveConcurrencyLimiter
+    return cls(
+        initial=settings.get("initial", 4),
+        min_limit=settings.get("min", 1),
+        max_limit=settings.get("max", 64),
+        latency_tolerance=settings.get("latency_tolerance", 1.5),
+        backoff_ratio=settings.get("backoff_ratio", 0.5),
+    )
@@ -0,0 +1,156 @@
+import http.client
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple, Iterator
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+class HTTPConnectionPool:
+    """Thread-safe pool of persistent (keep-alive) HTTP connections to a single host.
+
+    Connections are checked out for one request/response cycle and returned to the
+    pool afterwards, so concurrent callers never share a socket mid-request.
+    """
+
+    def __init__(self, base_url: str, max_size: int = 8, timeout: float = 60):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=self.max_size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "connections_discarded": 0,
+            "errors": 0,
+        }
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        conn_cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self._bump("connections_created")
+        return conn_cls(self.host, self.port, timeout=timeout)
+
+    def _checkout(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Returns (connection, reused) - an idle pooled connection if available."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_connection(timeout), False
+
+        # Timeout may differ per request; apply it to the live socket too
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn: http.client.HTTPConnection) -> None:
+        self._bump("connections_discarded")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _send(self, method: str, path: str, body: Optional[bytes], headers: Optional[Dict[str, str]],
+              timeout: Optional[float], read_body: bool):
+        """
+        Sends a request and returns (connection, reused, response, body).
+
+        A request that fails on a reused connection (e.g. the server closed an idle
+        keep-alive socket) is retried once on a fresh connection. With read_body=False
+        the response is returned unread and the caller owns the connection.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        headers = dict(headers or {})
+        headers.setdefault("Connection", "keep-alive")
+        url = f"{self.base_path}{path}"
+
+        self._bump("requests")
+        conn, reused = self._checkout(timeout)
+
+        while True:
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read() if read_body else None # Must drain the body before the socket can be reused
+                return conn, reused, response, data
+            except (http.client.HTTPException, OSError) as e:
+                self._discard(conn)
+                # A timeout is a slow server, not a stale socket - don't double the wait
+                if reused and not isinstance(e, TimeoutError):
+                    logger.debug(f"Stale pooled connection to {self.host}, retrying on a new one: {e}")
+                    conn, reused = self._new_connection(timeout), False
+                    continue
+                self._bump("errors")
+                raise
+
+    def _release(self, conn: http.client.HTTPConnection, reused: bool, response: http.client.HTTPResponse) -> None:
+        if reused:
+            self._bump("connections_reused")
+        # An unread remainder (closed stream) would corrupt the next response on this socket
+        if response.will_close or not response.isclosed():
+            self._discard(conn)
+        else:
+            self._checkin(conn)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """Sends a request over a pooled connection and returns (status, body)."""
+        conn, reused, response, data = self._send(method, path, body, headers, timeout, read_body=True)
+        self._release(conn, reused, response)
+        return response.status, data
+
+    @contextmanager
+    def stream(self, method: str, path: str, body: Optional[bytes] = None,
+               headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Iterator[http.client.HTTPResponse]:
+        """
+        Sends a request and yields the unread response for incremental reading.
+
+        If the caller stops before the end of the body, the connection is closed rather
+        than pooled; for a streaming generation this also tells the server to stop.
+        """
+        conn, reused, response, _ = self._send(method, path, body, headers, timeout, read_body=False)
+        try:
+            yield response
+        except BaseException:
+            self._discard(conn)
+            self._bump("errors")
+            raise
+        self._release(conn, reused, response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns connection-reuse counters and the current number of idle connections."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["idle_connections"] = self._idle.qsize()
+        return stats
+
+    def close(self) -> None:
+        """Closes all idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,193 @@
+import threading
+import time
+import logging
+import urllib.request
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, List, Sequence
+
+from .base_llm import BaseLLM
+from .async_base_llm import AsyncBaseLLM
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("least_outstanding", "latency")
+
+class Endpoint:
+    """Routing state for one Ollama host."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.base_url = llm.base_url
+        self.outstanding = 0
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+
+class EndpointSet:
+    """
+    Picks an endpoint per request and tracks host health.
+
+    "least_outstanding" sends each request to the host with the fewest requests in
+    flight (ties go to the faster host); "latency" minimises expected completion time,
+    (outstanding + 1) x EWMA latency. A host is taken out of rotation after
+    `unhealthy_after` consecutive failures and put back once its /api/tags answers.
+    """
+
+    def __init__(self, llms: Sequence, policy: str = "least_outstanding", unhealthy_after: int = 3,
+                 health_check_interval: float = 5.0):
+        if not llms:
+            raise ValueError("At least one endpoint is required")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown balance policy '{policy}', expected one of {POLICIES}")
+        self.endpoints = [Endpoint(llm) for llm in llms]
+        self.policy = policy
+        self.unhealthy_after = max(1, unhealthy_after)
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._rotation = 0 # Spreads ties instead of always picking the first host
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+        if health_check_interval > 0:
+            self._checker = threading.Thread(target=self._health_loop, name="ollama-health", daemon=True)
+            self._checker.start()
+
+    def _cost(self, ep: Endpoint):
+        latency = ep.latency_ewma or 0.0 # Unmeasured hosts look fast so they get explored
+        if self.policy == "latency":
+            return (ep.outstanding + 1) * latency, ep.outstanding
+        return ep.outstanding, latency
+
+    def acquire(self) -> Endpoint:
+        """Chooses an endpoint and counts the request as outstanding on it."""
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep.healthy]
+            if not candidates:
+                # Nothing known-good: keep trying every host rather than failing outright
+                candidates = self.endpoints
+            self._rotation = (self._rotation + 1) % len(candidates)
+            ordered = candidates[self._rotation:] + candidates[:self._rotation]
+            ep = min(ordered, key=self._cost)
+            ep.outstanding += 1
+            ep.requests += 1
+            return ep
+
+    def release(self, ep: Endpoint, latency: float, ok: bool) -> None:
+        with self._lock:
+            ep.outstanding -= 1
+            if ok:
+                ep.consecutive_failures = 0
+                ep.latency_ewma = latency if ep.latency_ewma is None else 0.8 * ep.latency_ewma + 0.2 * latency
+                if not ep.healthy:
+                    ep.healthy = True
+                    logger.info(f"Ollama endpoint {ep.base_url} is healthy again")
+                return
+            ep.failures += 1
+            ep.consecutive_failures += 1
+            if ep.healthy and ep.consecutive_failures >= self.unhealthy_after:
+                ep.healthy = False
+                logger.warning(f"Ollama endpoint {ep.base_url} marked unhealthy after {ep.consecutive_failures} failures")
+
+    def check(self, ep: Endpoint, timeout: float = 2.0) -> bool:
+        """Active health probe: the host is up if its model list answers."""
+        try:
+            with urllib.request.urlopen(f"{ep.base_url}/api/tags", timeout=timeout) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_check_interval):
+            for ep in [ep for ep in self.endpoints if not ep.healthy]:
+                if self.check(ep):
+                    with self._lock:
+                        ep.healthy = True
+                        ep.consecutive_failures = 0
+                    logger.info(f"Ollama endpoint {ep.base_url} passed health check, back in rotation")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                ep.base_url: {
+                    "healthy": ep.healthy,
+                    "outstanding": ep.outstanding,
+                    "requests": ep.requests,
+                    "failures": ep.failures,
+                    "latency_ewma_s": ep.latency_ewma,
+                } for ep in self.endpoints
+            }
+        for ep in self.endpoints:
+            stats[ep.base_url].update(ep.llm.get_stats())
+        return stats
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join(timeout=1)
+        for ep in self.endpoints:
+            ep.llm.close()
+
+class LoadBalancedLLM(BaseLLM):
+    """Spreads requests over several Ollama hosts; retries in generate() pick a host afresh."""
+
+    def __init__(self, config: Dict[str, Any], backends: List[BaseLLM]):
+        super().__init__(config)
+        self.endpoints = EndpointSet(
+            backends,
+            policy=config.get("balance_policy", "least_outstanding"),
+            unhealthy_after=config.get("unhealthy_after", 3),
+            health_check_interval=config.get("health_check_interval", 5.0),
+        )
+
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                  required_keys: Optional[Sequence[str]] = None) -> str:
+        ep = self.endpoints.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            # Each host keeps its own adaptive limit
+            with ep.llm.limiter.slot() if ep.llm.limiter else nullcontext():
+                response = ep.llm._generate(prompt, system_prompt, json_format, required_keys)
+            ok = True
+            return response
+        finally:
+            self.endpoints.release(ep, time.monotonic() - start, ok)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"endpoints": self.endpoints.get_stats()}
+
+    def close(self) -> None:
+        self.endpoints.close()
+
+class AsyncLoadBalancedLLM(AsyncBaseLLM):
+    """Asyncio counterpart of LoadBalancedLLM."""
+
+    def __init__(self, config: Dict[str, Any], backends: List[AsyncBaseLLM]):
+        super().__init__(config)
+        self.endpoints = EndpointSet(
+            backends,
+            policy=config.get("balance_policy", "least_outstanding"),
+            unhealthy_after=config.get("unhealthy_after", 3),
+            health_check_interval=config.get("health_check_interval", 5.0),
+        )
+
+    async def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                        required_keys: Optional[Sequence[str]] = None) -> str:
+        ep = self.endpoints.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            async with ep.llm.limiter.slot() if ep.llm.limiter else nullcontext():
+                response = await ep.llm._generate(prompt, system_prompt, json_format, required_keys)
+            ok = True
+            return response
+        finally:
+            self.endpoints.release(ep, time.monotonic() - start, ok)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"endpoints": self.endpoints.get_stats()}
+
+    def close(self) -> None:
+        self.endpoints.close()
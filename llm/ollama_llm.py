@@ -1,29 +1,43 @@
-import urllib.request
-import urllib.error
+import http.client
 import json
+import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 
 from .base_llm import BaseLLM
+from .http_pool import HTTPConnectionPool
+from .streaming import JSONObjectScanner, StreamStats, ServerTimings
 
 logger = logging.getLogger(__name__)
 
 class OllamaLLM(BaseLLM):
-    """LLM implementation that communicates with a local Ollama instance via HTTP."""
+    """LLM implementation that communicates with a local Ollama instance via HTTP.
+    
+    Requests go through a shared keep-alive connection pool, so one instance can be
+    used from many threads without paying TCP setup on every prompt. With `stream`
+    enabled, tokens are read as they arrive and output running on after a complete
+    JSON answer is cut off.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.base_url = config.get("base_url", "http://localhost:11434").rstrip("/")
         self.endpoint = f"{self.base_url}/api/generate"
-        self.temperature = config.get("temperature", 0.3)
+        self.pool = HTTPConnectionPool(self.base_url, max_size=config.get("pool_size", 8), timeout=self.timeout)
+        self.stream = config.get("stream", False)
+        self.stream_stats = StreamStats()
+        self.stream_tail_tokens = config.get("stream_tail_tokens", 64)
+        self.keep_alive = config.get("keep_alive")
+        self.timings = ServerTimings()
 
-    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False) -> str:
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                  required_keys: Optional[Sequence[str]] = None) -> str:
         """Sends a POST request to the Ollama API."""
         
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": self.stream,
             "options": {
                 "temperature": self.temperature
             }
@@ -35,15 +49,99 @@ class OllamaLLM(BaseLLM):
         if json_format:
             payload["format"] = "json"
             
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive # Keep the model (and its prompt cache) loaded between calls
+            
         data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(self.endpoint, data=data, method="POST")
-        req.add_header("Content-Type", "application/json")
+        headers = {"Content-Type": "application/json"}
         
+        if self.stream:
+            return self._generate_stream(data, headers, json_format, required_keys)
+            
         try:
-            with urllib.request.urlopen(req, timeout=self.timeout) as response:
-                result_json = json.loads(response.read().decode("utf-8"))
-                return result_json.get("response", "")
-        except urllib.error.URLError as e:
+            status, body = self.pool.request("POST", "/api/generate", body=data, headers=headers, timeout=self.timeout)
+        except (http.client.HTTPException, OSError) as e:
              raise Exception(f"Failed to connect to Ollama at {self.endpoint}. Is it running?: {e}")
+             
+        if status >= 400:
+             raise Exception(f"Ollama generation error: HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+             
+        try:
+            result_json = json.loads(body.decode("utf-8"))
+            self.timings.record(result_json)
+            return result_json.get("response", "")
         except Exception as e:
              raise Exception(f"Ollama generation error: {e}")
+             
+    def _generate_stream(self, data: bytes, headers: Dict[str, str], json_format: bool,
+                         required_keys: Optional[Sequence[str]]) -> str:
+        """
+        Reads Ollama's NDJSON token stream. For JSON answers, the answer is the first complete
+        object holding `required_keys`; reading goes on to the final "done" message for its
+        timings, unless more than `stream_tail_tokens` tokens follow the object, in which case
+        the connection is dropped so the server stops generating the runaway tail.
+        """
+        scanner = JSONObjectScanner(required_keys) if json_format else None
+        parts = []
+        start = time.monotonic()
+        ttft = None
+        answered = False
+        tail_tokens = 0
+        early_stop = False
+        
+        try:
+            with self.pool.stream("POST", "/api/generate", body=data, headers=headers, timeout=self.timeout) as response:
+                if response.status >= 400:
+                    raise Exception(f"Ollama generation error: HTTP {response.status}: {response.read()[:200].decode('utf-8', 'replace')}")
+                    
+                for line in response:
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise Exception(f"Ollama generation error: bad stream line: {e}")
+                    if event.get("error"):
+                        raise Exception(f"Ollama generation error: {event['error']}")
+                        
+                    token = event.get("response", "")
+                    if token and ttft is None:
+                        ttft = time.monotonic() - start
+                    if event.get("done"):
+                        parts.append(token)
+                        self.timings.record(event)
+                        response.read() # Drain the chunked terminator so the connection is reusable
+                        break
+                    if answered:
+                        # Keep reading to "done" for the token counts and timings; only runaway output is cut off
+                        tail_tokens += 1
+                        if tail_tokens > self.stream_tail_tokens:
+                            early_stop = True
+                            break
+                        continue
+                    parts.append(token)
+                    if scanner is not None and scanner.feed(token):
+                        answered = True
+        except (http.client.HTTPException, OSError) as e:
+             raise Exception(f"Failed to connect to Ollama at {self.endpoint}. Is it running?: {e}")
+             
+        total = time.monotonic() - start
+        self.stream_stats.record(ttft, total, early_stop)
+        if early_stop:
+            self.timings.record_incomplete()
+        logger.debug(f"Ollama stream: ttft={ttft if ttft is not None else float('nan'):.3f}s total={total:.3f}s early_stop={early_stop}")
+        if answered:
+            return scanner.text
+        return "".join(parts)
+             
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns HTTP connection-reuse counters, limiter state and streaming timings for this backend."""
+        stats = super().get_stats()
+        stats["http"] = self.pool.get_stats()
+        stats["prompt_eval"] = self.timings.get_stats()
+        if self.stream:
+            stats["stream"] = self.stream_stats.get_stats()
+        return stats
+        
+    def close(self) -> None:
+        self.pool.close()
@@ -0,0 +1,23 @@
+"""Prompt layout shared by every LLM stage that works on a document body."""
+import textwrap
+from typing import Tuple
+
+SHARED_SYSTEM_PROMPT = (
+    "You are an expert assistant in a pipeline that evaluates and refines documents for a "
+    "Retrieval-Augmented Generation (RAG) system. Follow the task given after the document exactly."
+)
+DOCUMENT_HEADER = "Document:\n\n"
+
+def document_prompt(instructions: str, document: str, heading: str = "Text", prefix_first: bool = True) -> Tuple[str, str]:
+    """
+    Lays out (system_prompt, user_prompt) for a task on `document`.
+
+    With prefix_first, every task on the same document starts with the same system
+    prompt and document body, so the server can reuse the KV cache for that prefix and
+    only prefill the task text. Otherwise the task is the system prompt and the body
+    follows `heading` (the original layout).
+    """
+    if not prefix_first:
+        return instructions, f"{heading}:\n\n{document}"
+    task = textwrap.dedent(instructions).strip()
+    return SHARED_SYSTEM_PROMPT, f"{DOCUMENT_HEADER}{document}\n\n---\nTask (the text is the document above):\n{task}"
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional, Sequence
+
+from .base_llm import BaseLLM
+from .async_base_llm import AsyncBaseLLM
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Persistent, size-capped LLM response store backed by SQLite with LRU eviction."""
+
+    def __init__(self, path: str, max_size_mb: float = 512):
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses").fetchone()
+        self._size_bytes, self._entries = int(row[0]), int(row[1])
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, temperature: Any, system_prompt: Optional[str], prompt: str, json_format: bool) -> str:
+        """Content address of a request: every input that can change the model's output."""
+        material = json.dumps([model, temperature, system_prompt or "", prompt, bool(json_format)], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        size = len(response.encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return # Never evict the whole cache for a single oversized entry
+
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time())
+            )
+            if old:
+                self._size_bytes -= old[0]
+            else:
+                self._entries += 1
+            self._size_bytes += size
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        """Drops least-recently-used entries until the cache fits its size cap."""
+        while self._size_bytes > self.max_bytes and self._entries > 0:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._size_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size_bytes -= size
+                self._entries -= 1
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": self._entries,
+                "size_bytes": self._size_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class CachedLLM(BaseLLM):
+    """Wraps another LLM and serves repeated prompts from a persistent ResponseCache."""
+
+    def __init__(self, llm: BaseLLM, cache: ResponseCache):
+        super().__init__(llm.config)
+        self.llm = llm
+        self.cache = cache
+
+    def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                  required_keys: Optional[Sequence[str]] = None) -> str:
+        return self.llm._generate(prompt, system_prompt, json_format, required_keys)
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                 required_keys: Optional[Sequence[str]] = None) -> str:
+        key = ResponseCache.make_key(self.llm.model, self.llm.temperature, system_prompt, prompt, json_format)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Retries stay in the wrapped backend; failures are never cached
+        response = self.llm.generate(prompt, system_prompt, json_format, required_keys)
+        if response:
+            self.cache.put(key, response)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.llm.get_stats())
+        stats["cache"] = self.cache.get_stats()
+        return stats
+
+    def close(self) -> None:
+        self.llm.close()
+        self.cache.close()
+
+class AsyncCachedLLM(AsyncBaseLLM):
+    """Async counterpart of CachedLLM; can share one ResponseCache with a sync backend."""
+
+    def __init__(self, llm: AsyncBaseLLM, cache: ResponseCache):
+        super().__init__(llm.config)
+        self.llm = llm
+        self.cache = cache
+
+    async def _generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                        required_keys: Optional[Sequence[str]] = None) -> str:
+        return await self.llm._generate(prompt, system_prompt, json_format, required_keys)
+
+    async def generate(self, prompt: str, system_prompt: Optional[str] = None, json_format: bool = False,
+                       required_keys: Optional[Sequence[str]] = None) -> str:
+        key = ResponseCache.make_key(self.llm.model, self.llm.temperature, system_prompt, prompt, json_format)
+        cached = self.cache.get(key) # Local SQLite lookup; short enough to run on the loop
+        if cached is not None:
+            return cached
+
+        response = await self.llm.generate(prompt, system_prompt, json_format, required_keys)
+        if response:
+            self.cache.put(key, response)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.llm.get_stats())
+        stats["cache"] = self.cache.get_stats()
+        return stats
+
+    def close(self) -> None:
+        self.llm.close()
@@ -0,0 +1,142 @@
+import json
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+class JSONObjectScanner:
+    """
+    Incrementally finds the first complete top-level JSON object in streamed text.
+
+    Tracks bracket depth outside string literals so each token is scanned once; the
+    buffer is only handed to json.loads when a top-level value closes. An object missing
+    any of `required_keys` is skipped and scanning continues. A top-level array (e.g. a
+    batched evaluation) is only accepted whole, never cut at its first element.
+    """
+
+    def __init__(self, required_keys: Optional[Sequence[str]] = None):
+        self.required_keys = tuple(required_keys or ())
+        self.text = ""
+        self.result: Optional[Any] = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """Appends a chunk; returns True once a complete object has been parsed."""
+        if self.result is not None:
+            return True
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif c in "}]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0 and self._accept(text[self._start:i + 1]):
+                    self.text = text[self._start:i + 1]
+                    return True
+        self._pos = len(text)
+        return False
+
+    def _accept(self, candidate: str) -> bool:
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            return False
+        if isinstance(data, list):
+            if self.required_keys:
+                return False
+        elif not isinstance(data, dict) or any(k not in data for k in self.required_keys):
+            return False
+        self.result = data
+        return True
+
+class StreamStats:
+    """Thread-safe totals for streamed generations: time-to-first-token, total time, runaway cut-offs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.early_stops = 0
+        self.ttft_total = 0.0
+        self.ttft_max = 0.0
+        self.time_total = 0.0
+        self.last: Dict[str, Any] = {}
+
+    def record(self, ttft: Optional[float], total: float, early_stop: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.early_stops += int(early_stop)
+            if ttft is not None:
+                self.ttft_total += ttft
+                self.ttft_max = max(self.ttft_max, ttft)
+            self.time_total += total
+            self.last = {"ttft_s": ttft, "total_s": total, "early_stop": early_stop}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "early_stops": self.early_stops,
+                "avg_ttft_s": self.ttft_total / self.calls if self.calls else 0.0,
+                "max_ttft_s": self.ttft_max,
+                "avg_total_s": self.time_total / self.calls if self.calls else 0.0,
+                "last_call": dict(self.last),
+            }
+
+class ServerTimings:
+    """
+    Thread-safe totals of the token counts and durations Ollama reports with each finished answer.
+
+    A stream cut off before its "done" message has no counters; such calls are counted in
+    `incomplete_calls`, and the totals understate the real work while it is non-zero.
+    """
+
+    FIELDS = ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "load_duration")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.incomplete = 0
+        self.totals = {field: 0 for field in self.FIELDS}
+
+    def record(self, result: Dict[str, Any]) -> None:
+        """Adds the counters of a final (non-streamed or done) Ollama response, if it has them."""
+        if "prompt_eval_duration" not in result and "eval_count" not in result:
+            return # Stream stopped early, or a backend that doesn't report timings
+        with self._lock:
+            self.calls += 1
+            for field in self.FIELDS:
+                self.totals[field] += result.get(field, 0) or 0
+
+    def record_incomplete(self) -> None:
+        """Counts a call whose stream was cut off before Ollama reported its counters."""
+        with self._lock:
+            self.incomplete += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, incomplete, totals = self.calls, self.incomplete, dict(self.totals)
+        return {
+            "calls": calls,
+            "incomplete_calls": incomplete,
+            "prompt_tokens": totals["prompt_eval_count"],
+            "prompt_eval_s": totals["prompt_eval_duration"] / 1e9, # Ollama reports nanoseconds
+            "avg_prompt_eval_s": totals["prompt_eval_duration"] / 1e9 / calls if calls else 0.0,
+            "eval_tokens": totals["eval_count"],
+            "eval_s": totals["eval_duration"] / 1e9,
+            "load_s": totals["load_duration"] / 1e9,
+        }
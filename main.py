@@ -1,9 +1,11 @@
 import argparse
+import hashlib
 import os
-import uuid
 import logging
 from config import CONFIG
 from pipeline import RAGPipeline
+from pipeline_async import AsyncRAGPipeline
+from manifest import SourceManifest
 
 # Setup basic logging
 logging.basicConfig(
@@ -12,42 +14,120 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS = (".txt", ".md")
+
+def make_doc_id(source: str, content: str) -> str:
+    """Content-addressed doc_id: stable across runs, changes whenever the file does."""
+    return hashlib.sha256(f"{source}\0{content}".encode("utf-8")).hexdigest()[:16]
+
+def _iter_source_paths(directory: str, recursive: bool):
+    """Yields (filepath, source) for supported files, in a stable order."""
+    if not recursive:
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(directory, filename), filename
+        return
+        
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames.sort() # Walk subdirectories deterministically
+        for filename in sorted(filenames):
+            if filename.endswith(SUPPORTED_EXTENSIONS):
+                filepath = os.path.join(root, filename)
+                yield filepath, os.path.relpath(filepath, directory).replace(os.sep, "/")
+
+def iter_documents_from_dir(directory: str, recursive: bool = True):
+    """Lazily yields (content, doc_id, source) for text files, reading one file at a time."""
+    if not os.path.exists(directory):
+        logger.error(f"Input directory {directory} does not exist.")
+        return
+        
+    for filepath, source in _iter_source_paths(directory, recursive):
+         try:
+             with open(filepath, 'r', encoding='utf-8') as f:
+                 content = f.read()
+         except Exception as e:
+             logger.error(f"Failed to read file {source}: {e}")
+             continue
+         yield content, make_doc_id(source, content), source
+
 def load_documents_from_dir(directory: str):
     """Loads all text files from a directory."""
-    docs = []
+    return list(iter_documents_from_dir(directory, recursive=False))
+
+def run_incremental(pipeline: RAGPipeline, directory: str, output_dir: str, batch_size=None):
+    """Processes only new or changed files and retracts output of changed or deleted ones."""
     if not os.path.exists(directory):
         logger.error(f"Input directory {directory} does not exist.")
-        return docs
+        return {}
         
-    for filename in os.listdir(directory):
-         if filename.endswith(".txt") or filename.endswith(".md"):
-             filepath = os.path.join(directory, filename)
-             try:
-                 with open(filepath, 'r', encoding='utf-8') as f:
-                     content = f.read()
-                     doc_id = str(uuid.uuid4())[:8] # Short UUID for simpler logging
-                     docs.append((content, doc_id, filename))
-             except Exception as e:
-                 logger.error(f"Failed to read file {filename}: {e}")
-    return docs
+    manifest = SourceManifest(output_dir)
+    pipeline.manifest = manifest
+    plan = manifest.plan(_iter_source_paths(directory, recursive=True))
+    logger.info(f"Incremental plan: {len(plan.to_process)} new/changed, {len(plan.deleted)} deleted, {plan.unchanged} unchanged")
+    
+    # Old chunks of changed and deleted files go first; changed files are then re-exported under their new doc_id
+    retracted_chunks = pipeline.exporter.retract(plan.retracted_doc_ids)
+    manifest.forget(plan.deleted)
+    if pipeline.checkpoint:
+        pipeline.checkpoint.forget(plan.retracted_doc_ids)
+    
+    def planned_documents():
+        for filepath, source in plan.to_process:
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                logger.error(f"Failed to read file {source}: {e}")
+                continue
+            doc_id = make_doc_id(source, content)
+            manifest.expect(filepath, source, doc_id, content)
+            if pipeline.checkpoint:
+                # A restored or reverted file gets back a doc_id the checkpoint already holds as done,
+                # but its output was retracted when the file went away or changed
+                pipeline.checkpoint.forget([doc_id])
+            yield content, doc_id, source
+            
+    stats = pipeline.process_stream(planned_documents(), batch_size)
+    stats.update({
+        "unchanged_sources": plan.unchanged,
+        "deleted_sources": len(plan.deleted),
+        "retracted_chunks": retracted_chunks,
+    })
+    return stats
 
 def main():
     parser = argparse.ArgumentParser(description="RAGRefiner - Document Processing Pipeline")
     parser.add_argument("--input", "-i", type=str, required=True, help="Input directory containing .txt or .md files")
     parser.add_argument("--output", "-o", type=str, required=True, help="Output directory for processed data")
+    parser.add_argument("--stream", action="store_true", help="Read, process and export recursively in bounded micro-batches (constant memory)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Micro-batch size for --stream/--incremental (default: pipeline.stream_batch_size)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio pipeline driver (pipeline.max_in_flight documents in flight)")
+    parser.add_argument("--incremental", action="store_true", help="Only process new or changed files (tracked in <output>/manifest.jsonl); implies --stream")
     
     args = parser.parse_args()
     
     # Initialize pipeline
-    pipeline = RAGPipeline(CONFIG, args.output)
+    use_async = args.use_async or CONFIG.get("pipeline", {}).get("async", False)
+    pipeline = (AsyncRAGPipeline if use_async else RAGPipeline)(CONFIG, args.output)
     
     # Load and process
-    docs_input = load_documents_from_dir(args.input)
-    if not docs_input:
+    try:
+        if args.incremental:
+            stats = run_incremental(pipeline, args.input, args.output, args.batch_size)
+        elif args.stream:
+            # Files are read lazily and exported per micro-batch
+            stats = pipeline.process_stream(iter_documents_from_dir(args.input), args.batch_size)
+        else:
+            docs_input = load_documents_from_dir(args.input)
+            stats = pipeline.process_batch(docs_input) if docs_input else {}
+        if stats:
+            pipeline.write_metrics()
+    finally:
+        pipeline.close()
+        
+    if not stats:
          logger.info("No documents to process. Exiting.")
          return
-         
-    stats = pipeline.process_batch(docs_input)
     
     print("\n" + "="*40)
     print("🎉 Pipeline Execution Complete 🎉")
@@ -0,0 +1,141 @@
+"""Source manifest used by incremental runs to process only new or changed files."""
+import hashlib
+import json
+import os
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Iterable, Tuple, Optional
+
+from models import ProcessingDocument
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SourcePlan:
+    """What an incremental run has to do for the current input directory."""
+    to_process: List[Tuple[str, str]] = field(default_factory=list) # (filepath, source) of new/changed files
+    retracted_doc_ids: List[str] = field(default_factory=list) # outputs of changed or deleted files
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+class SourceManifest:
+    """
+    Append-only record of every source file a run has consumed: path, mtime, size,
+    content hash and the doc_id / chunk ids it produced. Stored as manifest.jsonl in the
+    output directory and compacted to the latest entry per source on load.
+    """
+
+    FILENAME = "manifest.jsonl"
+
+    def __init__(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {} # source -> entry
+        self._pending: Dict[str, Dict[str, Any]] = {} # doc_id -> file stats awaiting results
+
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Partial line from a crash mid-write
+                if entry.get("deleted"):
+                    self.entries.pop(entry["source"], None)
+                else:
+                    self.entries[entry["source"]] = entry
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def plan(self, sources: Iterable[Tuple[str, str]]) -> SourcePlan:
+        """
+        Compares the current (filepath, source) listing against the manifest.
+
+        Files whose mtime and size are unchanged are not opened. Files that were touched
+        but hash to the same content keep their output and just get their stats refreshed.
+        """
+        plan = SourcePlan()
+        seen = set()
+
+        for filepath, source in sources:
+            seen.add(source)
+            stat = os.stat(filepath)
+            entry = self.entries.get(source)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                plan.unchanged += 1
+                continue
+
+            if entry:
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        same_content = self.content_hash(f.read()) == entry["content_hash"]
+                except Exception:
+                    same_content = False
+                if same_content:
+                    entry = dict(entry, mtime=stat.st_mtime, size=stat.st_size)
+                    self.entries[source] = entry
+                    self._write(entry)
+                    plan.unchanged += 1
+                    continue
+                plan.retracted_doc_ids.append(entry["doc_id"])
+
+            plan.to_process.append((filepath, source))
+
+        for source in [s for s in self.entries if s not in seen]:
+            plan.deleted.append(source)
+            plan.retracted_doc_ids.append(self.entries[source]["doc_id"])
+
+        return plan
+
+    def forget(self, sources: Iterable[str]) -> None:
+        """Drops deleted sources from the manifest (after their output has been retracted)."""
+        for source in sources:
+            self.entries.pop(source, None)
+            self._write({"source": source, "deleted": True})
+
+    def expect(self, filepath: str, source: str, doc_id: str, content: str) -> None:
+        """Registers a file about to be processed; its entry is written once results exist."""
+        stat = os.stat(filepath)
+        with self._lock:
+            self._pending[doc_id] = {
+                "source": source,
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "content_hash": self.content_hash(content),
+            }
+
+    def record_outputs(self, docs: Iterable[ProcessingDocument]) -> None:
+        """Stores the doc_id and exported chunk ids of processed documents."""
+        for doc in docs:
+            with self._lock:
+                pending = self._pending.pop(doc.metadata.doc_id, None)
+            if pending is None:
+                continue
+            chunk_ids = [c.chunk_id for c in doc.chunks] if doc.chunks else []
+            entry = dict(pending, doc_id=doc.metadata.doc_id, status=doc.status.value, chunk_ids=chunk_ids)
+            self.entries[entry["source"]] = entry
+            self._write(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
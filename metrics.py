@@ -0,0 +1,186 @@
+"""Lightweight in-process metrics: per-stage counters, latency histograms and run summaries."""
+import bisect
+import json
+import os
+import random
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the Prometheus histogram buckets; stages range from microseconds to minutes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class Histogram:
+    """
+    Latency distribution for one stage.
+
+    Keeps exact count/sum/max, fixed buckets for Prometheus and a uniform reservoir
+    sample (Algorithm R) for percentiles, so memory stays bounded on long runs.
+    """
+
+    def __init__(self, reservoir_size: int = 4096):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1) # Last slot is +Inf
+        self.reservoir_size = reservoir_size
+        self.samples: List[float] = []
+        self._random = random.Random(0)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.samples[slot] = value
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+class Metrics:
+    """
+    Thread-safe registry of counters and per-stage latency histograms for one run.
+
+    Components record into a shared instance via `time(stage)` and `inc(name)`;
+    `summary()` turns it into a JSON-friendly dict and `to_prometheus()` into the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def inc(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        """Records the duration of the enclosed block (also for coroutines awaiting inside it)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Per-stage count, latency percentiles and throughput over the run so far."""
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "total_s": h.total,
+                    "mean_s": h.total / h.count if h.count else 0.0,
+                    "p50_s": h.percentile(0.50),
+                    "p95_s": h.percentile(0.95),
+                    "p99_s": h.percentile(0.99),
+                    "max_s": h.max,
+                    "per_sec": h.count / elapsed if elapsed > 0 else 0.0,
+                } for stage, h in sorted(self.histograms.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        summary = {"elapsed_s": elapsed, "stages": stages, "counters": counters}
+        if extra:
+            summary.update(extra)
+        return summary
+
+    def to_prometheus(self, prefix: str = "ragrefiner", extra_gauges: Optional[Dict[str, float]] = None) -> str:
+        """Renders counters, stage histograms and optional gauges in Prometheus text format."""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{_metric_name(name)}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+            metric = f"{prefix}_stage_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), h.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {h.total}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {h.count}')
+
+        for name, value in sorted((extra_gauges or {}).items()):
+            metric = f"{prefix}_{_metric_name(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name).lower()
+
+def llm_totals(stats_list: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Sums Ollama token counts/durations and cache counters over LLM backend get_stats() dicts.
+    "complete" is False when some streamed calls were cut off before reporting their counters.
+    """
+    totals = {"prompt_tokens": 0, "prompt_eval_s": 0.0, "eval_tokens": 0, "eval_s": 0.0, "incomplete_calls": 0,
+              "cache_hits": 0, "cache_misses": 0}
+    for stats in stats_list:
+        sources = list(stats["endpoints"].values()) if "endpoints" in stats else [stats]
+        for source in sources:
+            timings = source.get("prompt_eval", {})
+            for key in ("prompt_tokens", "prompt_eval_s", "eval_tokens", "eval_s", "incomplete_calls"):
+                totals[key] += timings.get(key, 0)
+        cache = stats.get("cache")
+        if cache:
+            # A cache shared by two backends reports the same counters twice; keep one copy
+            totals["cache_hits"] = max(totals["cache_hits"], cache["hits"])
+            totals["cache_misses"] = max(totals["cache_misses"], cache["misses"])
+    totals["complete"] = totals["incomplete_calls"] == 0
+    return totals
+
+def write_summary(summary: Dict[str, Any], output_dir: str, filename: str = "metrics.json") -> str:
+    path = os.path.join(output_dir, filename)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+def serve_prometheus(render, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves `render()` at /metrics from a daemon thread; call shutdown() on the result to stop."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Prometheus metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -1,4 +1,9 @@
-"""Data schemas for RAGRefiner"""
+"""
+Data schemas for RAGRefiner
+
+Every model uses __slots__ (no per-instance __dict__), since millions of documents and
+chunks can be in flight; DocStatus members are singletons, so a status costs one pointer.
+"""
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from enum import Enum
@@ -9,7 +14,7 @@ class DocStatus(Enum):
     IMPROVE = "IMPROVE"
     REJECT = "REJECT"
 
-@dataclass
+@dataclass(slots=True)
 class EvalScore:
     """Stores the evaluation scores and feedback from the AI evaluator"""
     coherence: float = 0.0
@@ -21,8 +26,9 @@ class EvalScore:
     final_score: float = 0.0
     reasoning: str = ""
     improvement_hints: List[str] = field(default_factory=list)
+    decided_by: str = "llm" # "prescore" when the heuristic gate decided without the LLM (criteria left unscored)
 
-@dataclass
+@dataclass(slots=True)
 class DocumentMetadata:
     """Metadata for a document or chunk"""
     doc_id: str
@@ -37,18 +43,28 @@ class DocumentMetadata:
     
     # Internal tracking
     improve_attempts: int = 0
+    evaluator_calls_saved: int = 0 # Evaluator re-runs skipped by the targeted improve loop
     reject_reason: str = ""
     
-@dataclass
+@dataclass(frozen=True, slots=True)
+class Chunk:
+    """An immutable slice of a processed document; `metadata` is the parent's object, shared rather than copied"""
+    content: str
+    metadata: DocumentMetadata
+    chunk_id: int
+    start_char: int # Offsets into the parent's final (cleaned/rewritten) content
+    end_char: int
+    
+@dataclass(slots=True)
 class ProcessingDocument:
     """Internal representation of a document moving through the pipeline"""
     content: str
     metadata: DocumentMetadata
     status: DocStatus = DocStatus.PENDING
     eval_details: Optional[EvalScore] = None
-    chunks: List["ProcessingDocument"] = field(default_factory=list) # Only used after chunking
+    chunks: List[Chunk] = field(default_factory=list) # Only used after chunking
 
-@dataclass
+@dataclass(slots=True)
 class FilterResult:
     """Result of a filter operation"""
     passed: bool
@@ -0,0 +1,65 @@
+"""Compacts the append-only JSONL logs into the legacy JSON array files.
+
+Usage: python -m output.compact --output ./output/
+"""
+import argparse
+import json
+import os
+import logging
+from typing import List, Dict, Any
+
+from .exporter import REJECTED_LOG, REPORT_LOG, segment_paths
+
+logger = logging.getLogger(__name__)
+
+# Append-only log -> legacy JSON array layout
+COMPACT_TARGETS = {
+    REJECTED_LOG: "rejected.json",
+    REPORT_LOG: "eval_report.json",
+}
+
+def read_jsonl_log(output_dir: str, filename: str) -> List[Dict[str, Any]]:
+    """Reads every record of a (possibly rotated) JSONL log, oldest first."""
+    records = []
+    for path in segment_paths(output_dir, filename):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Typically a line truncated by a crash mid-append; the rest of the log is intact
+                    logger.warning(f"Skipping malformed line {line_no} in {path}")
+    return records
+
+def compact(output_dir: str) -> Dict[str, int]:
+    """Writes rejected.json / eval_report.json from their JSONL logs; returns record counts."""
+    counts = {}
+    for log_name, target_name in COMPACT_TARGETS.items():
+        # A document whose export was interrupted and redone is logged twice; keep its latest record
+        latest = {}
+        for record in read_jsonl_log(output_dir, log_name):
+            latest[record.get("doc_id")] = record
+        records = list(latest.values())
+        target = os.path.join(output_dir, target_name)
+        tmp_path = target + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, target) # Atomic: readers never see a half-written array
+        counts[target_name] = len(records)
+        logger.info(f"Compacted {len(records)} records into {target}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact RAGRefiner JSONL logs into JSON arrays")
+    parser.add_argument("--output", "-o", type=str, required=True, help="Output directory of a pipeline run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    for name, count in compact(args.output).items():
+        print(f"{name}: {count} records")
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,114 @@
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from models import ProcessingDocument, DocStatus
+from metrics import Metrics
 from .formatter import OutputFormatter
 import logging
 
 logger = logging.getLogger(__name__)
 
+REJECTED_LOG = "rejected.jsonl"
+REPORT_LOG = "eval_report.jsonl"
+
+def segment_paths(output_dir: str, filename: str) -> List[str]:
+    """Returns rotated segments of an append-only log (oldest first), followed by the active file."""
+    stem, ext = os.path.splitext(filename)
+    segments = []
+    index = 1
+    while os.path.exists(os.path.join(output_dir, f"{stem}.{index}{ext}")):
+        segments.append(os.path.join(output_dir, f"{stem}.{index}{ext}"))
+        index += 1
+    active = os.path.join(output_dir, filename)
+    if os.path.exists(active):
+        segments.append(active)
+    return segments
+
 class Exporter:
     """Handles writing formatted documents and reports to disk."""
     
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, rotate_max_bytes: int = 0, metrics: Optional[Metrics] = None):
         self.output_dir = output_dir
+        self.metrics = metrics or Metrics()
+        self.rotate_max_bytes = rotate_max_bytes # 0 disables rotation of the append-only logs
         os.makedirs(output_dir, exist_ok=True)
         
+    def _rotate_if_needed(self, filename: str) -> None:
+        """Atomically renames a full log to the next numbered segment (e.g. rejected.3.jsonl)."""
+        path = os.path.join(self.output_dir, filename)
+        if not self.rotate_max_bytes or not os.path.exists(path) or os.path.getsize(path) < self.rotate_max_bytes:
+            return
+        stem, ext = os.path.splitext(filename)
+        index = len(segment_paths(self.output_dir, filename)) # active file becomes the newest segment
+        rotated = os.path.join(self.output_dir, f"{stem}.{index}{ext}")
+        os.replace(path, rotated)
+        logger.info(f"Rotated {path} -> {rotated}")
+        
+    def _append_jsonl(self, filename: str, records: List[Dict[str, Any]]) -> str:
+        """Appends records as JSON lines with a single buffered write; returns the file path."""
+        self._rotate_if_needed(filename)
+        path = os.path.join(self.output_dir, filename)
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(path, 'a', encoding='utf-8', buffering=1 << 16) as f:
+            f.write(payload)
+        return path
+        
     def export_passed(self, docs: List[ProcessingDocument]) -> None:
         """Exports passed documents and their chunks to documents.jsonl"""
         path = os.path.join(self.output_dir, "documents.jsonl")
-        formatted = OutputFormatter.format_batch(docs)
-        
-        chunk_count = 0
-        with open(path, 'a', encoding='utf-8') as f:
-            for item in formatted:
-                f.write(json.dumps(item, ensure_ascii=False) + "\n")
-                chunk_count += 1
-                
+        with self.metrics.time("export.passed"):
+            formatted = OutputFormatter.format_batch(docs)
+            
+            chunk_count = 0
+            with open(path, 'a', encoding='utf-8') as f:
+                for item in formatted:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    chunk_count += 1
+                    
+        self.metrics.inc("chunks_exported", chunk_count)
         logger.info(f"Exported {chunk_count} chunks to {path}")
         
+    def read_passed(self) -> Iterator[Dict[str, Any]]:
+        """Yields the chunk records already in documents.jsonl, oldest first (malformed lines skipped)."""
+        path = os.path.join(self.output_dir, "documents.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Typically a line truncated by a crash mid-append
+                    
+    def retract(self, doc_ids: Iterable[str]) -> int:
+        """Removes every chunk of the given documents from documents.jsonl; returns chunks removed."""
+        doc_ids = set(doc_ids)
+        path = os.path.join(self.output_dir, "documents.jsonl")
+        if not doc_ids or not os.path.exists(path):
+            return 0
+            
+        removed = 0
+        tmp_path = path + ".tmp"
+        with open(path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+            for line in src:
+                try:
+                    doc_id = json.loads(line)["metadata"]["doc_id"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    doc_id = None
+                if doc_id in doc_ids:
+                    removed += 1
+                    continue
+                dst.write(line) # Untouched lines are copied byte-for-byte
+        os.replace(tmp_path, path)
+        
+        logger.info(f"Retracted {removed} chunks of {len(doc_ids)} documents from {path}")
+        return removed
+        
     def export_rejected(self, docs: List[ProcessingDocument]) -> None:
-        """Exports rejected documents to rejected.json"""
+        """Appends rejected documents to rejected.jsonl"""
         if not docs:
             return
             
-        path = os.path.join(self.output_dir, "rejected.json")
         rejected_data = []
         for doc in docs:
             rejected_data.append({
@@ -41,28 +117,13 @@ class Exporter:
                 "reason": doc.metadata.reject_reason
             })
             
-        # Append logic or overwrite; for simplicity, overwriting/creating new array here
-        # In a real batch pipeline, you might want to append.
-        existing = []
-        if os.path.exists(path):
-             try:
-                 with open(path, 'r', encoding='utf-8') as f:
-                     content = f.read()
-                     if content:
-                        existing = json.loads(content)
-             except Exception as e:
-                 logger.warning(f"Could not read existing rejected.json: {e}")
-                 
-        existing.extend(rejected_data)
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
-            
+        # Append-only: cost is proportional to this batch, not to the whole history
+        with self.metrics.time("export.rejected"):
+            path = self._append_jsonl(REJECTED_LOG, rejected_data)
         logger.info(f"Exported {len(docs)} rejected records to {path}")
         
     def export_report(self, docs: List[ProcessingDocument]) -> None:
-        """Exports evaluation reports to eval_report.json"""
-        path = os.path.join(self.output_dir, "eval_report.json")
+        """Appends evaluation reports to eval_report.jsonl"""
         report_data = []
         
         for doc in docs:
@@ -72,7 +133,9 @@ class Exporter:
                     "source": doc.metadata.source,
                     "status": doc.status.value,
                     "final_score": doc.eval_details.final_score,
-                    "scores": {
+                    "decided_by": doc.eval_details.decided_by,
+                    # Pre-scored documents have no per-criterion scores; null rather than zeros
+                    "scores": None if doc.eval_details.decided_by == "prescore" else {
                         "coherence": doc.eval_details.coherence,
                         "completeness": doc.eval_details.completeness,
                         "factual_clarity": doc.eval_details.factual_clarity,
@@ -80,22 +143,13 @@ class Exporter:
                         "language_quality": doc.eval_details.language_quality
                     },
                     "reasoning": doc.eval_details.reasoning,
-                     "improve_attempts": doc.metadata.improve_attempts
+                     "improve_attempts": doc.metadata.improve_attempts,
+                     "evaluator_calls_saved": doc.metadata.evaluator_calls_saved
                 })
                 
-        existing = []
-        if os.path.exists(path):
-             try:
-                 with open(path, 'r', encoding='utf-8') as f:
-                     content = f.read()
-                     if content:
-                        existing = json.loads(content)
-             except Exception:
-                 pass
-                 
-        existing.extend(report_data)
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
+        if not report_data:
+            return
             
+        with self.metrics.time("export.report"):
+            path = self._append_jsonl(REPORT_LOG, report_data)
         logger.info(f"Exported evaluation report to {path}")
@@ -1,30 +1,41 @@
 import json
-from typing import Dict, Any, List
-from models import ProcessingDocument
+from typing import Dict, Any, List, Optional
+from models import ProcessingDocument, DocumentMetadata, Chunk
 
 class OutputFormatter:
     """Formats processed and chunked documents into exportable schemas."""
     
     @staticmethod
-    def to_langchain_schema(doc: ProcessingDocument) -> Dict[str, Any]:
-        """Converts a document chunk into LangChain's Document schema."""
+    def _langchain_schema(content: str, meta: DocumentMetadata, chunk_id: Optional[int], start: int, end: int) -> Dict[str, Any]:
         metadata = {
-            "doc_id": doc.metadata.doc_id,
-            "source": doc.metadata.source,
-            "chunk_id": doc.metadata.chunk_id,
-            "keywords": doc.metadata.keywords,
-            "summary": doc.metadata.summary,
-            "topic_tags": doc.metadata.topic_tags,
-            "language": doc.metadata.language,
-            "eval_score": doc.metadata.eval_score,
-            "created_at": doc.metadata.created_at
+            "doc_id": meta.doc_id,
+            "source": meta.source,
+            "chunk_id": chunk_id,
+            "start_index": start, # Character offsets into the processed document text
+            "end_index": end,
+            "keywords": meta.keywords,
+            "summary": meta.summary,
+            "topic_tags": meta.topic_tags,
+            "language": meta.language,
+            "eval_score": meta.eval_score,
+            "created_at": meta.created_at
         }
         
         return {
-            "page_content": doc.content,
+            "page_content": content,
             "metadata": metadata
         }
         
+    @staticmethod
+    def to_langchain_schema(doc: ProcessingDocument) -> Dict[str, Any]:
+        """Converts a whole (unchunked) document into LangChain's Document schema."""
+        return OutputFormatter._langchain_schema(doc.content, doc.metadata, doc.metadata.chunk_id, 0, len(doc.content))
+        
+    @staticmethod
+    def chunk_to_langchain_schema(chunk: Chunk) -> Dict[str, Any]:
+        """Converts a document chunk into LangChain's Document schema."""
+        return OutputFormatter._langchain_schema(chunk.content, chunk.metadata, chunk.chunk_id, chunk.start_char, chunk.end_char)
+        
     @staticmethod
     def format_batch(docs: List[ProcessingDocument]) -> List[Dict[str, Any]]:
         """Formats a batch of parsed document chunks."""
@@ -34,7 +45,7 @@ class OutputFormatter:
             # which each contain their chunks
             if hasattr(doc, 'chunks') and doc.chunks:
                 for chunk in doc.chunks:
-                    formatted_chunks.append(OutputFormatter.to_langchain_schema(chunk))
+                    formatted_chunks.append(OutputFormatter.chunk_to_langchain_schema(chunk))
             else:
                  # If no chunks, just format the whole doc
                  formatted_chunks.append(OutputFormatter.to_langchain_schema(doc))
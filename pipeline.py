@@ -1,37 +1,192 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Set
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import os
 import time
 import logging
 from models import ProcessingDocument, DocumentMetadata, DocStatus
-from llm import create_llm
-from filters import FilterPipeline, QualityFilter, DedupFilter, RelevanceFilter
-from evaluators import ScoreAggregator
+from llm import create_llm, BaseLLM
+from filters import FilterPipeline, QualityFilter, DedupFilter, RelevanceFilter, ChunkDeduplicator
+from evaluators import ScoreAggregator, HeuristicScorer
 from improvers import ImprovePipeline
 from output import Exporter
+from checkpoint import CheckpointJournal, STAGE_EVALUATED
+from manifest import SourceManifest
+from metrics import Metrics, llm_totals, write_summary, serve_prometheus
 
 logger = logging.getLogger(__name__)
 
+# Stats reported by process_batch as running totals rather than per-batch counts
+CUMULATIVE_STATS = {"llm_cache_hits", "llm_cache_misses", "prescore_pass", "prescore_reject", "prescore_uncertain", "llm_calls_avoided"}
+
 class RAGPipeline:
     """The main orchestrator for the RAGRefiner system."""
     
-    def __init__(self, config: Dict[str, Any], output_dir: str):
+    def __init__(self, config: Dict[str, Any], output_dir: str, llm: Optional[BaseLLM] = None):
         self.config = config
-        self.llm = create_llm(config)
+        self.output_dir = output_dir
+        self.llm = llm or create_llm(config, output_dir)
+        
+        # Per-stage counters and latency histograms shared by every component below
+        self.metrics = Metrics()
+        metrics_config = config.get("metrics", {})
+        self.write_prometheus = metrics_config.get("prometheus", False)
+        
+        # Number of documents allowed to be in evaluate -> improve -> enrich -> chunk at once
+        self.max_workers = config.get("pipeline", {}).get("max_workers", 1)
+        self.stream_batch_size = config.get("pipeline", {}).get("stream_batch_size", 32)
+        self._executor: Optional[ThreadPoolExecutor] = None
         
         # 1. Filters
         self.filter_pipeline = FilterPipeline([
             QualityFilter(),
             DedupFilter(),
             RelevanceFilter() # By default, accepts all if no keywords provided
-        ])
+        ], metrics=self.metrics)
         
-        # 2. Evaluators
-        self.evaluator = ScoreAggregator(self.llm, config)
+        # 2. Evaluators (a rule-based pre-score gate decides obvious cases without the LLM)
+        self.evaluator = ScoreAggregator(self.llm, config, metrics=self.metrics)
+        self.prescorer = HeuristicScorer(config, llm_calls_per_eval=len(self.evaluator.evaluators))
         
         # 3. Improvers
-        self.improve_pipeline = ImprovePipeline(self.llm, config, self.evaluator)
+        self.improve_pipeline = ImprovePipeline(self.llm, config, self.evaluator, metrics=self.metrics)
+        
+        # Near-duplicate chunks across the whole run (boilerplate that survives document-level dedup)
+        self.chunk_dedup: Optional[ChunkDeduplicator] = None
+        if config.get("chunking", {}).get("dedup", {}).get("enabled", False):
+            self.chunk_dedup = ChunkDeduplicator(config, embedder=self.improve_pipeline.chunker.embedder)
+        # Seeded from documents.jsonl on first use, i.e. after any retraction of stale output
+        self._chunk_dedup_seeded = not config.get("chunking", {}).get("dedup", {}).get("across_runs", True)
         
         # 4. Output
-        self.exporter = Exporter(output_dir)
+        output_config = config.get("output", {})
+        self.exporter = Exporter(output_dir, rotate_max_bytes=int(output_config.get("rotate_max_mb", 0) * 1024 * 1024),
+                                 metrics=self.metrics)
+        
+        # Resumable runs: per-document stage journal in the output directory
+        self.checkpoint: Optional[CheckpointJournal] = None
+        if config.get("pipeline", {}).get("checkpoint", False):
+            self.checkpoint = CheckpointJournal(output_dir)
+            # A crash between export and mark_done leaves chunks the resumed run would export
+            # again; drop them so those documents are redone cleanly from their last stage
+            interrupted = self.checkpoint.interrupted_exports()
+            if interrupted:
+                logger.warning(f"Retracting output of {len(interrupted)} documents whose export was interrupted")
+                self.exporter.retract(interrupted)
+            
+        # Set by incremental runs to record which doc_id / chunks each source produced
+        self.manifest: Optional[SourceManifest] = None
+        
+        self._metrics_server = None
+        if metrics_config.get("prometheus_port") is not None:
+            self._metrics_server = serve_prometheus(self.prometheus_text, metrics_config["prometheus_port"],
+                                                    metrics_config.get("prometheus_host", "127.0.0.1"))
+        
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily creates the bounded document worker pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.max_workers),
+                thread_name_prefix="doc-worker"
+            )
+        return self._executor
+        
+    def close(self) -> None:
+        """Shuts down the worker pools owned by the pipeline."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.evaluator.shutdown()
+        self.improve_pipeline.chunker.close()
+        if self.chunk_dedup is not None:
+            self.chunk_dedup.close()
+        self.llm.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.manifest is not None:
+            self.manifest.close()
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server = None
+            
+    def _llm_stats(self) -> List[Dict[str, Any]]:
+        """get_stats() of every LLM backend the pipeline drives."""
+        return [self.llm.get_stats()]
+        
+    def metrics_summary(self) -> Dict[str, Any]:
+        """JSON-friendly run summary: stage latencies/throughput, counters and LLM token totals."""
+        return self.metrics.summary({"llm": llm_totals(self._llm_stats())})
+        
+    def prometheus_text(self) -> str:
+        return self.metrics.to_prometheus(extra_gauges={f"llm_{k}": int(v) if isinstance(v, bool) else v
+                                                             for k, v in llm_totals(self._llm_stats()).items()})
+        
+    def write_metrics(self) -> str:
+        """Writes metrics.json (and metrics.prom if enabled) to the output directory; returns the JSON path."""
+        path = write_summary(self.metrics_summary(), self.output_dir)
+        if self.write_prometheus:
+            prom_path = os.path.join(self.output_dir, "metrics.prom")
+            with open(prom_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+        logger.info(f"Run metrics written to {path}")
+        return path
+        
+    def _batch_candidates(self, docs: List[ProcessingDocument]) -> Tuple[List[ProcessingDocument], List[ProcessingDocument]]:
+        """
+        Short, not yet evaluated documents for packed evaluation (evaluation.batching).
+        Returns (candidates, undecided): all of them, and those the pre-score gate left for the LLM.
+        """
+        candidates = [doc for doc in docs if self.evaluator.can_batch(doc)
+                      and not (self.checkpoint and self.checkpoint.stage_of(doc.metadata.doc_id))]
+        undecided = []
+        for doc in candidates:
+            with self.metrics.time("prescore"):
+                decided = self.prescorer.gate(doc)
+            if not decided:
+                undecided.append(doc)
+        return candidates, undecided
+        
+    def _mark_evaluated(self, docs: List[ProcessingDocument]) -> Set[int]:
+        """Checkpoints documents evaluated ahead of their per-document stages; returns their id()s."""
+        if self.checkpoint:
+            for doc in docs:
+                self.checkpoint.record(doc, STAGE_EVALUATED)
+        return {id(doc) for doc in docs}
+        
+    def _pre_evaluate(self, docs: List[ProcessingDocument]) -> Set[int]:
+        """Evaluates the short documents of a batch several to a request; returns the id()s done here."""
+        if self.evaluator.batcher is None:
+            return set()
+        candidates, undecided = self._batch_candidates(docs)
+        if undecided:
+            self.evaluator.evaluate_packed(undecided)
+        return self._mark_evaluated(candidates)
+        
+    def _evaluate_and_improve(self, doc: ProcessingDocument, evaluated: bool = False) -> ProcessingDocument:
+        """
+        Runs the LLM-bound stages (evaluate, improve, enrich, chunk) for one filtered document.
+        `evaluated` skips evaluation for documents already scored by _pre_evaluate().
+        """
+        with self.metrics.time("document"):
+            # A document interrupted in a previous run continues after its last completed stage
+            stage = self.checkpoint.restore(doc) if self.checkpoint else None
+            if stage is None and not evaluated:
+                with self.metrics.time("prescore"):
+                    decided = self.prescorer.gate(doc)
+                if not decided:
+                    self.evaluator.evaluate(doc)
+                if self.checkpoint:
+                    self.checkpoint.record(doc, STAGE_EVALUATED)
+            return self.improve_pipeline.process_one(doc, self.checkpoint)
+        
+    def _run_llm_stages(self, docs: List[ProcessingDocument]) -> List[ProcessingDocument]:
+        """Runs the LLM-bound stages over many documents, preserving input order."""
+        evaluated = self._pre_evaluate(docs)
+        flags = [id(doc) in evaluated for doc in docs]
+        if self.max_workers <= 1 or len(docs) < 2:
+            return [self._evaluate_and_improve(doc, flag) for doc, flag in zip(docs, flags)]
+        # executor.map yields results in submission order, keeping output and stats deterministic
+        return list(self._get_executor().map(self._evaluate_and_improve, docs, flags))
         
     def process_document(self, content: str, doc_id: str, source: str) -> ProcessingDocument:
         """Processes a single document through the pipeline."""
@@ -47,12 +202,8 @@ class RAGPipeline:
         if doc.status == DocStatus.REJECT:
             return doc
             
-        # Step 2: Evaluation
-        doc = self.evaluator.evaluate(doc)
-        
-        # Step 3: Improvement & Chunking (handled as a list of 1)
-        docs = self.improve_pipeline.process_and_chunk([doc])
-        return docs[0] if docs else doc
+        # Step 2 & 3: Evaluation, improvement & chunking
+        return self._evaluate_and_improve(doc)
 
     def process_batch(self, docs_input: List[Tuple[str, str, str]]) -> Dict[str, int]:
         """
@@ -61,25 +212,48 @@ class RAGPipeline:
         Returns: processing statistics
         """
         logger.info(f"Starting batch processing of {len(docs_input)} documents...")
+        with self.metrics.time("batch"):
+            passed_filters, rejected_filters, completed_before = self._prepare_batch(docs_input)
+            
+            # Step 2 & 3: Evaluation, improvement loop & chunking (up to max_workers docs in flight)
+            final_docs = self._run_llm_stages(passed_filters)
+            
+            return self._finish_batch(len(docs_input), passed_filters, rejected_filters, completed_before, final_docs)
         
+    def _prepare_batch(self, docs_input: List[Tuple[str, str, str]]) -> Tuple[List[ProcessingDocument], List[ProcessingDocument], List[ProcessingDocument]]:
+        """Builds documents and runs the pre-filters; returns (passed, rejected, completed_before)."""
         all_docs = []
+        created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()) # One string shared by the whole batch
         for content, doc_id, source in docs_input:
              metadata = DocumentMetadata(
                  doc_id=doc_id,
                  source=source,
-                 created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                 created_at=created_at
              )
              all_docs.append(ProcessingDocument(content=content, metadata=metadata))
              
         # Step 1: Filters
+        # Kept sequential on purpose: DedupFilter state depends on arrival order,
+        # so the set of rejected near-duplicates is the same for any worker count.
         passed_filters, rejected_filters = self.filter_pipeline.run_batch(all_docs)
         
-        # Step 2: Evaluation
-        for doc in passed_filters:
-            self.evaluator.evaluate(doc)
-
-        # Step 3: Improvement loop & chunking
-        final_docs = self.improve_pipeline.process_and_chunk(passed_filters)
+        # Documents finished by an earlier run still go through the (cheap) filters above so
+        # DedupFilter sees them, but nothing else is repeated and they are not re-exported
+        completed_before: List[ProcessingDocument] = []
+        if self.checkpoint:
+            completed_before = [d for d in all_docs if self.checkpoint.is_done(d.metadata.doc_id)]
+            passed_filters = [d for d in passed_filters if not self.checkpoint.is_done(d.metadata.doc_id)]
+            rejected_filters = [d for d in rejected_filters if not self.checkpoint.is_done(d.metadata.doc_id)]
+            if completed_before:
+                logger.warning(f"Skipping {len(completed_before)} documents already completed according to "
+                               f"{self.checkpoint.path}; delete it or set pipeline.checkpoint to False to reprocess them")
+            
+        return passed_filters, rejected_filters, completed_before
+        
+    def _finish_batch(self, total_input: int, passed_filters: List[ProcessingDocument], rejected_filters: List[ProcessingDocument],
+                      completed_before: List[ProcessingDocument], final_docs: List[ProcessingDocument]) -> Dict[str, int]:
+        """Exports the results of a batch, updates the run journals and returns its statistics."""
+        chunks_removed = self._dedup_chunks([d for d in final_docs if d.status == DocStatus.PASS])
         
         # Separate passed and rejected out of final_docs
         final_passed = [d for d in final_docs if d.status == DocStatus.PASS]
@@ -87,6 +261,8 @@ class RAGPipeline:
         all_rejected = rejected_filters + final_rejected
         
         # Step 4: Export
+        if self.checkpoint:
+            self.checkpoint.mark_exporting(rejected_filters + final_docs)
         if final_passed:
             self.exporter.export_passed(final_passed)
         if all_rejected:
@@ -94,14 +270,88 @@ class RAGPipeline:
             
         # Export report for all documents that reached evaluation phase
         self.exporter.export_report(passed_filters)
+        
+        if self.manifest:
+            # Checkpoint-skipped documents were not re-chunked here; their entries from the earlier run stand
+            self.manifest.record_outputs(rejected_filters + final_docs)
+        if self.checkpoint:
+            self.checkpoint.mark_done(rejected_filters + final_docs)
             
         stats = {
-            "total_input": len(docs_input),
+            "total_input": total_input,
             "passed": len(final_passed),
             "rejected_filters": len(rejected_filters),
             "rejected_evaluation": len(final_rejected),
             "total_chunks_exported": sum(len(d.chunks) if hasattr(d, 'chunks') and d.chunks else 1 for d in final_passed)
         }
+        if self.chunk_dedup is not None:
+            stats["chunks_deduplicated"] = chunks_removed
+        if self.checkpoint:
+            stats["skipped_completed"] = len(completed_before)
+        if self.prescorer.enabled:
+            stats.update(self.prescorer.get_stats())
+        for key in ("total_input", "passed", "rejected_filters", "rejected_evaluation"):
+            self.metrics.inc(f"docs_{key}", stats[key])
+        
+        # Cumulative LLM response cache counters (only present when the cache is enabled)
+        cache_stats = self.llm.get_stats().get("cache")
+        if cache_stats:
+            stats["llm_cache_hits"] = cache_stats["hits"]
+            stats["llm_cache_misses"] = cache_stats["misses"]
         
         logger.info(f"Batch complete. Stats: {stats}")
+        logger.info(f"LLM backend stats: {self.llm.get_stats()}")
         return stats
+        
+    def _dedup_chunks(self, passed: List[ProcessingDocument]) -> int:
+        """
+        Drops near-duplicate chunks of this batch's passed documents; returns how many.
+        Runs here, sequentially and in input order, so the result is the same for any worker count.
+        """
+        if self.chunk_dedup is None or not passed:
+            return 0
+        if not self._chunk_dedup_seeded:
+            self._chunk_dedup_seeded = True
+            with self.metrics.time("improve.chunk_dedup_seed"):
+                seeded = self.chunk_dedup.seed(
+                    (record["page_content"], record["metadata"]["doc_id"], record["metadata"]["chunk_id"])
+                    for record in self.exporter.read_passed())
+            if seeded:
+                logger.info(f"Chunk dedup index seeded with {seeded} chunks from earlier runs")
+        removed = 0
+        with self.metrics.time("improve.chunk_dedup"):
+            for doc in passed:
+                had_chunks = bool(doc.chunks)
+                removed += self.chunk_dedup.dedup(doc)
+                if had_chunks and not doc.chunks:
+                    # Nothing new left to export; without chunks the whole document would be written instead
+                    doc.status = DocStatus.REJECT
+                    doc.metadata.reject_reason = "[ChunkDeduplicator] Every chunk duplicates earlier output"
+        self.metrics.inc("chunks_deduplicated", removed)
+        return removed
+        
+    def process_stream(self, docs_input: Iterable[Tuple[str, str, str]], batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Processes an arbitrarily long stream of documents in bounded micro-batches.
+        
+        Each micro-batch is filtered, evaluated, improved, chunked and exported before the
+        next one is read, so memory stays flat as the corpus grows and output appears
+        progressively. DedupFilter state persists across micro-batches.
+        Args: docs_input: Iterable of (content, doc_id, source) tuples, e.g. a generator
+        Returns: processing statistics summed over all micro-batches
+        """
+        batch_size = max(1, batch_size or self.stream_batch_size)
+        docs_iter = iter(docs_input)
+        totals: Dict[str, int] = {}
+        
+        while True:
+            batch = list(islice(docs_iter, batch_size))
+            if not batch:
+                break
+                
+            stats = self.process_batch(batch)
+            for key, value in stats.items():
+                totals[key] = value if key in CUMULATIVE_STATS else totals.get(key, 0) + value
+                
+        logger.info(f"Stream complete. Stats: {totals}")
+        return totals
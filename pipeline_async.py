@@ -0,0 +1,121 @@
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterable, Iterable, Union, Set
+import asyncio
+import logging
+from models import ProcessingDocument
+from llm import create_async_llm, AsyncBaseLLM, BaseLLM, CachedLLM
+from pipeline import RAGPipeline, CUMULATIVE_STATS
+from checkpoint import STAGE_EVALUATED
+
+logger = logging.getLogger(__name__)
+
+class AsyncRAGPipeline(RAGPipeline):
+    """
+    asyncio-native driver for RAGRefiner.
+    
+    Filters, export, checkpointing and statistics are shared with RAGPipeline; the
+    LLM-bound stages run as coroutines on one event loop, so thousands of documents can
+    be in flight at once, bounded by a semaphore (pipeline.max_in_flight) rather than
+    by OS threads.
+    """
+    
+    def __init__(self, config: Dict[str, Any], output_dir: str, async_llm: Optional[AsyncBaseLLM] = None,
+                 llm: Optional[BaseLLM] = None):
+        super().__init__(config, output_dir, llm)
+        # Share the sync backend's response cache so both drivers see the same entries and stats
+        cache = self.llm.cache if isinstance(self.llm, CachedLLM) else None
+        self.async_llm = async_llm or create_async_llm(config, cache)
+        self.max_in_flight = config.get("pipeline", {}).get("max_in_flight", 256)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+    def close(self) -> None:
+        super().close()
+        self.async_llm.close()
+        
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(max(1, self.max_in_flight))
+            self._semaphore_loop = loop
+        return self._semaphore
+        
+    def _llm_stats(self) -> List[Dict[str, Any]]:
+        return [self.llm.get_stats(), self.async_llm.get_stats()]
+        
+    async def _apre_evaluate(self, docs: List[ProcessingDocument]) -> Set[int]:
+        """Coroutine version of RAGPipeline._pre_evaluate."""
+        if self.evaluator.batcher is None:
+            return set()
+        candidates, undecided = self._batch_candidates(docs)
+        if undecided:
+            await self.evaluator.aevaluate_packed(undecided, self.async_llm)
+        return self._mark_evaluated(candidates)
+        
+    async def _aevaluate_and_improve(self, doc: ProcessingDocument, evaluated: bool = False) -> ProcessingDocument:
+        """Coroutine version of RAGPipeline._evaluate_and_improve."""
+        async with self._get_semaphore():
+            with self.metrics.time("document"):
+                stage = self.checkpoint.restore(doc) if self.checkpoint else None
+                if stage is None and not evaluated:
+                    with self.metrics.time("prescore"):
+                        decided = self.prescorer.gate(doc)
+                    if not decided:
+                        await self.evaluator.aevaluate(doc, self.async_llm)
+                    if self.checkpoint:
+                        self.checkpoint.record(doc, STAGE_EVALUATED)
+                return await self.improve_pipeline.aprocess_one(doc, self.async_llm, self.checkpoint)
+            
+    async def _arun_llm_stages(self, docs: List[ProcessingDocument]) -> List[ProcessingDocument]:
+        """Runs the LLM-bound stages for all documents concurrently, preserving input order."""
+        evaluated = await self._apre_evaluate(docs)
+        tasks = [asyncio.ensure_future(self._aevaluate_and_improve(doc, id(doc) in evaluated)) for doc in docs]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # Don't leave orphaned requests running if one document fails or we are cancelled
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+            
+    def _run_llm_stages(self, docs: List[ProcessingDocument]) -> List[ProcessingDocument]:
+        # Lets the inherited sync entry points (process_batch/process_stream) drive the event loop
+        return asyncio.run(self._arun_llm_stages(docs)) if docs else []
+        
+    async def aprocess_batch(self, docs_input: List[Tuple[str, str, str]]) -> Dict[str, int]:
+        """Async equivalent of process_batch() for callers already running an event loop."""
+        logger.info(f"Starting async batch processing of {len(docs_input)} documents...")
+        with self.metrics.time("batch"):
+            passed_filters, rejected_filters, completed_before = self._prepare_batch(docs_input)
+            final_docs = await self._arun_llm_stages(passed_filters)
+            return self._finish_batch(len(docs_input), passed_filters, rejected_filters, completed_before, final_docs)
+        
+    async def aprocess_stream(self, docs_input: Union[Iterable[Tuple[str, str, str]], AsyncIterable[Tuple[str, str, str]]],
+                              batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Async equivalent of process_stream(); accepts sync or async iterables."""
+        batch_size = max(1, batch_size or self.stream_batch_size)
+        totals: Dict[str, int] = {}
+        batch: List[Tuple[str, str, str]] = []
+        
+        async def flush():
+            stats = await self.aprocess_batch(batch)
+            for key, value in stats.items():
+                totals[key] = value if key in CUMULATIVE_STATS else totals.get(key, 0) + value
+                
+        if hasattr(docs_input, "__aiter__"):
+            async for item in docs_input:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    await flush()
+                    batch = []
+        else:
+            for item in docs_input:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    await flush()
+                    batch = []
+        if batch:
+            await flush()
+            
+        logger.info(f"Async stream complete. Stats: {totals}")
+        return totals